@@ -0,0 +1 @@
+"""Offline benchmarks for the AI pipeline (see benchmarks/run.py)."""
@@ -0,0 +1,88 @@
+"""Synthetic corpus generator scaling samples/sample_data.py to any size."""
+
+import argparse
+import json
+import random
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from samples.sample_data import get_samples
+
+# Names in the samples and the pools they are swapped with
+SUBSTITUTIONS = {
+    "Apple Inc.": ["Apple Inc.", "Globex Corp.", "Initech Inc.", "Umbrella Group", "Stark Industries"],
+    "Tim Cook": ["Tim Cook", "Maria Garcia", "Ken Tanaka", "Priya Sharma", "John Miller"],
+    "MegaCorp": ["MegaCorp", "DataVault", "CloudNine", "Northwind Bank", "Contoso"],
+    "Washington D.C.": ["Washington D.C.", "London", "Brussels", "Ottawa", "Canberra"],
+    "New York City": ["New York City", "Chicago", "Toronto", "Mumbai", "Sydney"],
+    "Sarah Johnson": ["Sarah Johnson", "Ahmed Khan", "Li Wei", "Elena Petrova", "David Cohen"],
+    "Stanford University": ["Stanford University", "MIT", "Oxford University", "ETH Zurich", "IIT Delhi"],
+    "Berlin, Germany": ["Berlin, Germany", "Paris, France", "Tokyo, Japan", "Austin, Texas", "Seoul, Korea"],
+    "Tesla": ["Tesla", "Rivian", "BYD", "Volkswagen", "Hyundai"],
+    "Toyota": ["Toyota", "Ford", "Honda", "Nissan", "Kia"],
+    "Central Park": ["Central Park", "Hyde Park", "Golden Gate Park", "Stanley Park", "Lodhi Garden"],
+}
+SOURCES = ["tech_news", "security_news", "weather_report", "science_journal", "local_news",
+           "api", "rss", "newsletter"]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _sentences(text: str) -> List[str]:
+    return re.split(r"(?<=[.!?])\s+(?=[A-Z])", _normalize(text))
+
+
+BASES = [_normalize(s["text"]) for s in get_samples()]
+SENTENCES = [sentence for base in BASES for sentence in _sentences(base)]
+
+
+def generate(count: int, seed: int = 0, start: int = 0) -> Iterator[Dict[str, str]]:
+    """
+    Yield synthetic documents {"text", "source"}.
+    
+    Document i depends only on (seed, i), so any slice of a corpus can be
+    regenerated without producing the documents before it. Every text is
+    unique, so the analysis cache never short-circuits a benchmark.
+    
+    Args:
+        count: Number of documents
+        seed: Corpus seed
+        start: Index of the first document
+    """
+    for i in range(start, start + count):
+        rng = random.Random(f"{seed}:{i}")
+        text = BASES[i % len(BASES)]
+        for name, pool in SUBSTITUTIONS.items():
+            if name in text:
+                text = text.replace(name, rng.choice(pool))
+        text = re.sub(r"\d+", lambda m: str(max(1, int(m.group(0)) + rng.randint(-9, 9))), text)
+        
+        extra = [rng.choice(SENTENCES) for _ in range(rng.randint(0, 4))]
+        text = " ".join([text, *extra, f"Reference {seed}-{i}."])
+        yield {"text": text, "source": rng.choice(SOURCES)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic corpus as JSON lines")
+    parser.add_argument("--size", type=int, default=10000, help="Number of documents")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None,
+                        help="Output file (default data/input/corpus_<size>.jsonl)")
+    args = parser.parse_args()
+    
+    out = Path(args.out or f"data/input/corpus_{args.size}.jsonl")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        for doc in generate(args.size, args.seed):
+            f.write(json.dumps(doc) + "\n")
+    print(f"✓ Wrote {args.size} documents to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Offline benchmark suite: ingest throughput and read latency at several scales.
+
+Uses the fake AI provider, so no API key or network is needed. Results are
+written to data/outputs/benchmark-<label>.json; pass --compare with an older
+file to print the change per metric.
+
+    python -m benchmarks.run --scales 10000,100000,1000000 --label 1.1.0
+    python -m benchmarks.run --label 1.2.0 --compare data/outputs/benchmark-1.1.0.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Callable, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import generate
+from src.ai_analyzer import AIAnalyzer
+from src.fake_provider import analyze_text, respond
+from src.local_analyzer import extract_entities
+from src.long_document import estimate_tokens
+from src.pipeline import Pipeline
+from src.prompt_compression import PromptCompressor
+from samples.sample_data import get_samples
+
+WRITE_BATCH = 1000
+QUERY_WORDS = ["earnings", "breach", "weather", "battery", "zoning", "investors", "storage"]
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    """Latency percentiles in milliseconds."""
+    ordered = sorted(samples)
+    
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    
+    return {
+        "p50_ms": round(pct(0.50) * 1000, 3),
+        "p95_ms": round(pct(0.95) * 1000, 3),
+        "p99_ms": round(pct(0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3)
+    }
+
+
+def _time(fn: Callable[[int], Any], repeat: int) -> Dict[str, float]:
+    """Call fn(i) `repeat` times after a short warm-up."""
+    for i in range(min(5, repeat)):
+        fn(i)
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return _summary(samples)
+
+
+def bench_ingest(pipeline: Pipeline, seed: int, count: int, concurrency: int) -> Dict[str, Any]:
+    """Full ingest path (fake AI call, parse, DB write), serial and batched."""
+    serial = max(1, count // 10)
+    docs = list(generate(serial, seed, start=0))
+    start = time.perf_counter()
+    for doc in docs:
+        pipeline.ingest(doc["text"], doc["source"])
+    serial_seconds = time.perf_counter() - start
+    
+    docs = list(generate(count - serial, seed, start=serial))
+    start = time.perf_counter()
+    asyncio.run(pipeline.aingest_batch(docs, concurrency=concurrency))
+    batch_seconds = time.perf_counter() - start
+    
+    return {
+        "serial_docs": serial,
+        "serial_docs_per_s": round(serial / serial_seconds, 1),
+        "batch_docs": len(docs),
+        "batch_concurrency": concurrency,
+        "batch_docs_per_s": round(len(docs) / batch_seconds, 1) if docs else None
+    }
+
+
+def bulk_load(pipeline: Pipeline, seed: int, start: int, count: int) -> Dict[str, Any]:
+    """Fill the database to scale without the AI layer (analyses computed inline)."""
+    began = time.perf_counter()
+    batch = []
+    for doc in generate(count, seed, start=start):
+        analysis = analyze_text(doc["text"])
+        analysis["model"] = "fake-1"
+        analysis["timestamp"] = datetime.utcnow().isoformat()
+        batch.append({"content": doc["text"], "source": doc["source"], "analysis": analysis})
+        if len(batch) >= WRITE_BATCH:
+            pipeline.db.write_ingest_results(batch)
+            batch = []
+    if batch:
+        pipeline.db.write_ingest_results(batch)
+    seconds = time.perf_counter() - began
+    return {"docs": count, "docs_per_s": round(count / seconds, 1) if count else None}
+
+
+def bench_reads(pipeline: Pipeline, total: int, repeat: int) -> Dict[str, Any]:
+    """Latency of the read paths behind the API endpoints."""
+    db = pipeline.db
+    rng = random.Random(total)
+    ids = [rng.randint(1, total) for _ in range(repeat + 5)]
+    
+    cursor = None
+    
+    def walk(_):
+        nonlocal cursor
+        _, cursor = db.list_documents(limit=50, cursor=cursor)
+    
+    # Most common entity (EXISTS probe) and a rarer one (IN-list lookup)
+    entities = [e["entity"] for e in db.top_entities(limit=100)] or ["Apple Inc"]
+    entity, rare_entity = entities[0], entities[-1]
+    topic = db.topic_facets(limit=1)
+    topic = topic[0]["topic"] if topic else "general"
+    
+    return {
+        "get_document": _time(lambda i: db.get_document(ids[i]), repeat),
+        "get_document_json": _time(lambda i: db.get_document_json(ids[i]), repeat),
+        "list_documents_first_page": _time(lambda i: db.list_documents(limit=50), repeat),
+        "list_documents_json_first_page": _time(lambda i: db.list_documents_json(limit=50), repeat),
+        "list_documents_cursor_walk": _time(walk, repeat),
+        "list_documents_deep_offset": _time(
+            lambda i: db.list_documents(limit=50, offset=total // 2), max(10, repeat // 10)),
+        "search_sentiment": _time(lambda i: db.search_documents(sentiment="negative"), repeat),
+        "search_entity_type": _time(lambda i: db.search_documents(entity_type="PERSON"), repeat),
+        "search_entity": _time(lambda i: db.search_documents(entity=entity), repeat),
+        "search_entity_rare": _time(lambda i: db.search_documents(entity=rare_entity), repeat),
+        "search_topic": _time(lambda i: db.search_documents(topic=topic), repeat),
+        "search_text": _time(
+            lambda i: db.search_documents(q=QUERY_WORDS[i % len(QUERY_WORDS)]), repeat),
+        "search_text_filtered": _time(
+            lambda i: db.search_documents(q=QUERY_WORDS[i % len(QUERY_WORDS)], sentiment="positive"),
+            repeat),
+        "search_json_sentiment": _time(lambda i: db.search_documents_json(sentiment="negative"), repeat),
+        "stats": _time(lambda i: db.get_stats(), repeat)
+    }
+
+
+def bench_parse(analyzer: AIAnalyzer, seed: int, count: int) -> Dict[str, Any]:
+    """Cost of _parse_response on realistic responses, plain and markdown-fenced."""
+    responses = [respond(analyzer._build_prompt(doc["text"])) for doc in generate(count, seed)]
+    fenced = [f"```json\n{r}\n```" for r in responses]
+    
+    result = {}
+    for name, batch in (("plain", responses), ("fenced", fenced)):
+        start = time.perf_counter()
+        for response in batch:
+            analyzer._parse_response(response)
+        result[f"{name}_us"] = round((time.perf_counter() - start) / count * 1e6, 2)
+    result["mean_response_bytes"] = round(statistics.fmean(len(r) for r in responses))
+    return result
+
+
+def bench_compression(budgets: List[int], seed: int, count: int) -> Dict[str, Any]:
+    """
+    Prompt compression on samples/sample_data.py and a corpus slice: tokens
+    sent versus the raw text, and the share of entities (found in the raw
+    text) that are still present in what is sent.
+    """
+    sets = {"samples": [s["text"] for s in get_samples()],
+            "corpus": [doc["text"] for doc in generate(count, seed)]}
+    result = {}
+    for budget in budgets:
+        compressor = PromptCompressor(budget_tokens=budget)
+        for name, texts in sets.items():
+            original = sent = entities = kept = 0
+            start = time.perf_counter()
+            compressed = [compressor.compress(t) for t in texts]
+            seconds = time.perf_counter() - start
+            for text, short in zip(texts, compressed):
+                original += estimate_tokens(text)
+                sent += estimate_tokens(short)
+                names = {e["text"].lower() for e in extract_entities(text)}
+                entities += len(names)
+                kept += sum(1 for n in names if n in short.lower())
+            result[f"budget_{budget}.{name}"] = {
+                "original_tokens": original,
+                "sent_tokens": sent,
+                "token_reduction_pct": round((1 - sent / original) * 100, 1),
+                "entity_coverage_pct": round(kept / entities * 100, 1) if entities else None,
+                "compress_us": round(seconds / len(texts) * 1e6, 1)
+            }
+    return result
+
+
+def run_scale(scale: int, args) -> Dict[str, Any]:
+    """Build a database of `scale` documents and benchmark it."""
+    db_path = Path(args.db_dir) / f"bench_{scale}.db"
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    
+    pipeline = Pipeline(db_path=str(db_path), ai_provider="fake", cache_max_entries=0,
+                        batch_max_items=args.batch_items)
+    try:
+        ingest_docs = min(scale, args.ingest_docs)
+        print(f"\n📥 {scale:,} documents: ingesting {ingest_docs:,} through the pipeline...")
+        result = {"ingest": bench_ingest(pipeline, args.seed, ingest_docs, args.concurrency)}
+        
+        print(f"   Bulk loading {scale - ingest_docs:,} more...")
+        result["bulk_load"] = bulk_load(pipeline, args.seed, ingest_docs, scale - ingest_docs)
+        
+        print(f"   Timing reads ({args.repeat} repetitions)...")
+        result["reads"] = bench_reads(pipeline, scale, args.repeat)
+        result["db_size_mb"] = round(db_path.stat().st_size / 1024 ** 2, 1)
+        return result
+    finally:
+        pipeline.db.close()
+        if not args.keep_db:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], prefix: str = ""):
+    """Print every numeric metric that exists in both results with its change."""
+    for key, value in current.items():
+        other = baseline.get(key) if isinstance(baseline, dict) else None
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            compare(value, other or {}, f"{name}.")
+        elif isinstance(value, (int, float)) and isinstance(other, (int, float)) and other:
+            change = (value - other) / other * 100
+            print(f"   {name:<70} {other:>12} → {value:>12}  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks (fake AI provider)")
+    parser.add_argument("--scales", default="10000,100000,1000000",
+                        help="Comma-separated document counts")
+    parser.add_argument("--label", default=datetime.now().strftime("%Y%m%d-%H%M%S"),
+                        help="Name of this run, e.g. a release version")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ingest-docs", type=int, default=2000,
+                        help="Documents per scale sent through the full ingest path")
+    parser.add_argument("--concurrency", type=int, default=16, help="aingest_batch concurrency")
+    parser.add_argument("--batch-items", type=int, default=0,
+                        help="Micro-batch short texts into one AI call (0 = off)")
+    parser.add_argument("--prompt-budgets", default="0,96",
+                        help="Prompt compression token budgets to measure (0 = normalize/dedupe only)")
+    parser.add_argument("--repeat", type=int, default=200, help="Repetitions per read benchmark")
+    parser.add_argument("--db-dir", default="data/processed")
+    parser.add_argument("--keep-db", action="store_true", help="Keep the benchmark databases")
+    parser.add_argument("--out-dir", default="data/outputs")
+    parser.add_argument("--compare", default=None, help="Earlier result file to diff against")
+    args = parser.parse_args()
+    
+    Path(args.db_dir).mkdir(parents=True, exist_ok=True)
+    Path(args.out_dir).mkdir(parents=True, exist_ok=True)
+    
+    print("🚀 Akhila AI Pipeline benchmarks")
+    print("=" * 60)
+    results = {
+        "label": args.label,
+        "created_at": datetime.utcnow().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "config": {
+            "seed": args.seed,
+            "ingest_docs": args.ingest_docs,
+            "concurrency": args.concurrency,
+            "batch_items": args.batch_items,
+            "repeat": args.repeat,
+            "fake_ai_latency_ms": float(os.getenv("FAKE_AI_LATENCY_MS", 0)),
+            "fake_ai_jitter_ms": float(os.getenv("FAKE_AI_JITTER_MS", 0))
+        },
+        "scales": {}
+    }
+    
+    for scale in (int(s) for s in args.scales.split(",") if s.strip()):
+        results["scales"][str(scale)] = run_scale(scale, args)
+    
+    results["parse_response"] = bench_parse(AIAnalyzer(provider="fake"), args.seed, 2000)
+    results["prompt_compression"] = bench_compression(
+        [int(b) for b in args.prompt_budgets.split(",") if b.strip()], args.seed, 2000)
+    
+    out = Path(args.out_dir) / f"benchmark-{args.label}.json"
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Results written to {out}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\n📊 Compared with {baseline.get('label', args.compare)}:")
+        compare({key: results[key] for key in ("scales", "parse_response", "prompt_compression")},
+                baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,51 @@
 """AI analysis module for text processing."""
 
+import asyncio
+import hashlib
 import json
 import os
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from datetime import datetime
+from .long_document import (CHARS_PER_TOKEN, estimate_tokens, chunk_text,
+                            merge_analyses, validate_chunk_analysis, build_reduce_prompt)
+from .local_analyzer import LocalAnalyzer
+from .metrics import metrics
+from .prompt_compression import PromptCompressor
+from .provider_governor import get_governor
+
+ANALYSIS_MARKER = "Text to analyze:\n"  # Precedes the text in _build_prompt()
 
 
 class AIAnalyzer:
     """Handles AI-powered text analysis."""
     
-    def __init__(self, provider: str = "openai", model: Optional[str] = None):
+    def __init__(self, provider: str = "openai", model: Optional[str] = None,
+                 chunk_tokens: int = 1000, max_chunk_concurrency: int = 8):
+        """
+        Initialize analyzer.
+        
+        Args:
+            provider: AI provider (openai, anthropic, ollama, fake)
+            model: Model name (provider default if omitted)
+            chunk_tokens: Token budget per prompt; longer texts are analyzed
+                          in chunks and merged (map-reduce)
+            max_chunk_concurrency: Chunks analyzed at once for one long text
+        """
         self.provider = provider.lower()
         self.model = model or self._default_model()
+        self.chunk_tokens = chunk_tokens
+        self.max_chunk_concurrency = max_chunk_concurrency
+        self._init_provider()
+        self._async_client = None
+        self._http_client = None
+    
+    def _init_provider(self):
+        """Set up the governor, prompt compressor and client for this provider model."""
+        # Rate budgets, adaptive concurrency, retries and the circuit breaker
+        # are shared by every analyzer of this provider model in the process
+        self.governor = get_governor(self.provider, self.model)
+        self.compressor = PromptCompressor.from_env(self.provider, self.model)
         self.client = self._init_client()
     
     def _default_model(self) -> str:
@@ -19,7 +53,8 @@ class AIAnalyzer:
         defaults = {
             "openai": "gpt-4o-mini",
             "anthropic": "claude-3-haiku-20240307",
-            "ollama": "llama3"
+            "ollama": "llama3",
+            "fake": "fake-1"
         }
         return defaults.get(self.provider, "gpt-4o-mini")
     
@@ -30,22 +65,93 @@ class AIAnalyzer:
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OPENAI_API_KEY not set")
-            return OpenAI(api_key=api_key)
+            # Retries are left to the governor
+            return OpenAI(api_key=api_key, timeout=self.governor.timeout, max_retries=0)
         
         elif self.provider == "anthropic":
             from anthropic import Anthropic
             api_key = os.getenv("ANTHROPIC_API_KEY")
             if not api_key:
                 raise ValueError("ANTHROPIC_API_KEY not set")
-            return Anthropic(api_key=api_key)
+            return Anthropic(api_key=api_key, timeout=self.governor.timeout, max_retries=0)
+        
+        elif self.provider == "ollama":
+            import ollama
+            return ollama.Client(timeout=self.governor.timeout)
+        
+        elif self.provider == "fake":
+            # Offline, deterministic responses for benchmarks (no network or key).
+            # FAKE_AI_<SETTING>_<MODEL> (e.g. FAKE_AI_LATENCY_MS_FAKE_SLOW) gives
+            # stand-in backends of one router different behaviour.
+            from .fake_provider import FakeProvider
+            suffix = "_" + self.model.upper().replace("-", "_")
+            
+            def setting(name: str) -> float:
+                return float(os.getenv(name + suffix) or os.getenv(name) or 0)
+            
+            return FakeProvider(
+                latency_ms=setting("FAKE_AI_LATENCY_MS"),
+                jitter_ms=setting("FAKE_AI_JITTER_MS"),
+                seed=int(setting("FAKE_AI_SEED")),
+                error_rate=setting("FAKE_AI_ERROR_RATE"),
+                ms_per_1k_tokens=setting("FAKE_AI_MS_PER_1K_TOKENS")
+            )
+        
+        else:
+            raise ValueError(f"Unsupported provider: {self.provider}")
+    
+    def _http_limits(self):
+        """Connection pool limits shared by all async requests of this analyzer."""
+        import httpx
+        return httpx.Limits(
+            max_connections=int(os.getenv("AI_HTTP_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.getenv("AI_HTTP_MAX_KEEPALIVE", 20))
+        )
+    
+    def _init_async_client(self):
+        """Initialize async AI client backed by a pooled HTTP connection."""
+        import httpx
+        
+        if self.provider == "openai":
+            from openai import AsyncOpenAI
+            self._http_client = httpx.AsyncClient(limits=self._http_limits())
+            return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"),
+                               http_client=self._http_client,
+                               timeout=self.governor.timeout, max_retries=0)
+        
+        elif self.provider == "anthropic":
+            from anthropic import AsyncAnthropic
+            self._http_client = httpx.AsyncClient(limits=self._http_limits())
+            return AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"),
+                                  http_client=self._http_client,
+                                  timeout=self.governor.timeout, max_retries=0)
         
         elif self.provider == "ollama":
             import ollama
-            return ollama
+            client = ollama.AsyncClient(limits=self._http_limits(), timeout=self.governor.timeout)
+            self._http_client = client._client
+            return client
+        
+        elif self.provider == "fake":
+            return self.client
         
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
     
+    @property
+    def async_client(self):
+        """Lazily created async client (must be first used inside the event loop)."""
+        if self._async_client is None:
+            self._async_client = self._init_async_client()
+        return self._async_client
+    
+    async def aclose(self):
+        """Close pooled HTTP connections of the async client."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._async_client = None
+        self._http_client = None
+    
     def analyze(self, text: str) -> Dict[str, Any]:
         """
         Analyze text and return structured insights.
@@ -60,17 +166,161 @@ class AIAnalyzer:
                 "model": str,
                 "timestamp": str
             }
+        
+        The text is compressed first (see compress()). Texts still over the
+        chunk token budget are split on sentence boundaries, the chunks
+        analyzed concurrently and the results merged (see
+        long_document.merge_analyses), plus a final summary-of-summaries call.
         """
+        text = self.compress(text)
+        if estimate_tokens(text) > self.chunk_tokens:
+            return self._analyze_long(text)
+        return self._analyze_single(text)
+    
+    async def aanalyze(self, text: str) -> Dict[str, Any]:
+        """Async version of analyze() that does not block the event loop."""
+        text = self.compress(text)
+        if estimate_tokens(text) > self.chunk_tokens:
+            return await self._aanalyze_long(text)
+        return await self._aanalyze_single(text)
+    
+    def _analyze_single(self, text: str) -> Dict[str, Any]:
+        """Analyze text that fits in one prompt."""
         prompt = self._build_prompt(text)
         
         try:
-            response = self._call_ai(prompt)
-            result = self._parse_response(response)
+            with metrics.stage("ai_call", **self.metric_labels):
+                response = self._call_ai(prompt)
+            with metrics.stage("parse", **self.metric_labels):
+                result = self._parse_response(response)
             result["model"] = self.model
             result["timestamp"] = datetime.utcnow().isoformat()
             return result
+        except Exception as e:
+            with metrics.stage("fallback", **self.metric_labels):
+                return self._fallback_analysis(text, str(e))
+    
+    async def _aanalyze_single(self, text: str) -> Dict[str, Any]:
+        """Async version of _analyze_single()."""
+        prompt = self._build_prompt(text)
+        
+        try:
+            with metrics.stage("ai_call", **self.metric_labels):
+                response = await self._acall_ai(prompt)
+            with metrics.stage("parse", **self.metric_labels):
+                result = self._parse_response(response)
+            result["model"] = self.model
+            result["timestamp"] = datetime.utcnow().isoformat()
+            return result
+        except Exception as e:
+            with metrics.stage("fallback", **self.metric_labels):
+                return self._fallback_analysis(text, str(e))
+    
+    def _analyze_long(self, text: str) -> Dict[str, Any]:
+        """Map-reduce analysis; latency is bounded by the slowest chunk."""
+        chunks = chunk_text(text, self.chunk_tokens)
+        workers = max(1, min(len(chunks), self.max_chunk_concurrency))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            analyses = list(executor.map(self._analyze_single, chunks))
+        
+        merged = self._merge_chunks(text, chunks, analyses)
+        if "summaries" in merged:
+            merged["summary"] = self._reduce_summaries(merged.pop("summaries"))
+        return merged
+    
+    async def _aanalyze_long(self, text: str) -> Dict[str, Any]:
+        """Async version of _analyze_long()."""
+        chunks = chunk_text(text, self.chunk_tokens)
+        semaphore = asyncio.Semaphore(self.max_chunk_concurrency)
+        
+        async def analyze_chunk(chunk: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._aanalyze_single(chunk)
+        
+        analyses = await asyncio.gather(*(analyze_chunk(c) for c in chunks))
+        
+        merged = self._merge_chunks(text, chunks, analyses)
+        if "summaries" in merged:
+            merged["summary"] = await self._areduce_summaries(merged.pop("summaries"))
+        return merged
+    
+    def _merge_chunks(self, text: str, chunks: List[str],
+                      analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge successful chunk analyses; fall back only if every chunk failed.
+        
+        A chunk whose fields have the wrong types (e.g. entities that are
+        not a list) counts as failed rather than breaking the merge.
+        """
+        ok = []
+        error = None
+        for analysis, chunk in zip(analyses, chunks):
+            try:
+                if "error" in analysis:
+                    raise ValueError(analysis["error"])
+                validate_chunk_analysis(analysis)
+            except ValueError as e:
+                error = error or str(e)
+                continue
+            ok.append((analysis, estimate_tokens(chunk)))
+        
+        try:
+            if not ok:
+                raise ValueError(error or "All chunks failed")
+            merged = merge_analyses([a for a, _ in ok], [w for _, w in ok])
         except Exception as e:
             return self._fallback_analysis(text, str(e))
+        merged["model"] = self.model
+        merged["timestamp"] = datetime.utcnow().isoformat()
+        merged["chunks"] = len(chunks)
+        merged["failed_chunks"] = len(chunks) - len(ok)
+        return merged
+    
+    def _reduce_summaries(self, summaries: List[str]) -> str:
+        """Summarize the chunk summaries; join them if the call fails."""
+        if len(summaries) == 1:
+            return summaries[0]
+        try:
+            with metrics.stage("ai_call", **self.metric_labels):
+                return self._call_ai(build_reduce_prompt(summaries)).strip()
+        except Exception:
+            return " ".join(summaries)
+    
+    async def _areduce_summaries(self, summaries: List[str]) -> str:
+        """Async version of _reduce_summaries()."""
+        if len(summaries) == 1:
+            return summaries[0]
+        try:
+            with metrics.stage("ai_call", **self.metric_labels):
+                return (await self._acall_ai(build_reduce_prompt(summaries))).strip()
+        except Exception:
+            return " ".join(summaries)
+    
+    def compress(self, text: str) -> str:
+        """Text as it goes into the prompt (see PromptCompressor); counts tokens saved."""
+        if not self.compressor.enabled:
+            return text
+        with metrics.stage("compress", **self.metric_labels):
+            compressed = self.compressor.compress(text)
+        metrics.inc("ai_prompt_text_tokens_total", estimate_tokens(text), kind="original",
+                    **self.metric_labels)
+        metrics.inc("ai_prompt_text_tokens_total", estimate_tokens(compressed), kind="sent",
+                    **self.metric_labels)
+        return compressed
+    
+    @property
+    def metric_labels(self) -> Dict[str, str]:
+        """Labels attached to this analyzer's stage metrics."""
+        return {"provider": self.provider, "model": self.model}
+    
+    @property
+    def prompt_version(self) -> str:
+        """
+        Short hash of the prompt template and compression settings; changes
+        whenever the prompt a text produces could change.
+        """
+        template = self._build_prompt("") + self.compressor.signature
+        return hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
     
     def _build_prompt(self, text: str) -> str:
         """Build analysis prompt."""
@@ -91,24 +341,39 @@ Rules:
 - Confidence should reflect certainty
 - Return ONLY valid JSON, no markdown
 
-Text to analyze:
-{text[:4000]}"""
+{ANALYSIS_MARKER}{text[:self.chunk_tokens * CHARS_PER_TOKEN]}"""
     
-    def _call_ai(self, prompt: str) -> str:
-        """Call AI provider and return response text."""
+    def _call_ai(self, prompt: str, max_tokens: int = 1000) -> str:
+        """
+        Call AI provider through its governor and return response text.
+        
+        Raises:
+            ProviderError: Rate budget exhausted, circuit open, or the call
+                           failed after retries (the message says which)
+        """
+        return self.governor.call(lambda: self._send(prompt, max_tokens),
+                                  tokens=estimate_tokens(prompt) + max_tokens)
+    
+    async def _acall_ai(self, prompt: str, max_tokens: int = 1000) -> str:
+        """Async version of _call_ai()."""
+        return await self.governor.acall(lambda: self._asend(prompt, max_tokens),
+                                         tokens=estimate_tokens(prompt) + max_tokens)
+    
+    def _send(self, prompt: str, max_tokens: int) -> str:
+        """Make one provider request and return response text."""
         if self.provider == "openai":
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
-                max_tokens=1000
+                max_tokens=max_tokens
             )
             return response.choices[0].message.content
         
         elif self.provider == "anthropic":
             response = self.client.messages.create(
                 model=self.model,
-                max_tokens=1000,
+                max_tokens=max_tokens,
                 temperature=0.3,
                 messages=[{"role": "user", "content": prompt}]
             )
@@ -120,54 +385,80 @@ Text to analyze:
                 messages=[{"role": "user", "content": prompt}]
             )
             return response['message']['content']
+        
+        elif self.provider == "fake":
+            return self.client.complete(prompt)
+    
+    async def _asend(self, prompt: str, max_tokens: int) -> str:
+        """Make one provider request asynchronously and return response text."""
+        client = self.async_client
+        
+        if self.provider == "openai":
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_tokens=max_tokens
+            )
+            return response.choices[0].message.content
+        
+        elif self.provider == "anthropic":
+            response = await client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=0.3,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            return response.content[0].text
+        
+        elif self.provider == "ollama":
+            response = await client.chat(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            return response['message']['content']
+        
+        elif self.provider == "fake":
+            return await client.acomplete(prompt)
     
     def _parse_response(self, response: str) -> Dict[str, Any]:
         """Parse AI response into structured format."""
-        # Remove markdown code blocks if present
+        try:
+            data = json.loads(self._strip_markdown(response))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON response: {e}")
+        
+        self._validate_analysis(data)
+        return data
+    
+    @staticmethod
+    def _strip_markdown(response: str) -> str:
+        """Remove a markdown code block around a response, if present."""
         response = response.strip()
         if response.startswith("```"):
             response = response.split("```")[1]
             if response.startswith("json"):
                 response = response[4:]
-        
-        try:
-            data = json.loads(response)
-            
-            # Validate required fields
-            required = ["sentiment", "sentiment_confidence", "entities", "topics", "summary"]
-            for field in required:
-                if field not in data:
-                    raise ValueError(f"Missing field: {field}")
-            
-            return data
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON response: {e}")
+        return response
+    
+    @staticmethod
+    def _validate_analysis(data: Any):
+        """
+        Raise ValueError unless data is an analysis object with every required
+        field, of the type the database writes expect (e.g. topics as a list
+        of strings, not "tech, finance").
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Analysis is not a JSON object")
+        required = ["sentiment", "sentiment_confidence", "entities", "topics", "summary"]
+        for field in required:
+            if field not in data:
+                raise ValueError(f"Missing field: {field}")
+        validate_chunk_analysis(data)
     
     def _fallback_analysis(self, text: str, error: str) -> Dict[str, Any]:
-        """Provide basic fallback analysis if AI fails."""
-        words = text.lower().split()
-        
-        # Simple sentiment heuristic
-        positive_words = {"good", "great", "excellent", "happy", "love", "best"}
-        negative_words = {"bad", "terrible", "awful", "hate", "worst", "poor"}
-        
-        pos_count = sum(1 for w in words if w in positive_words)
-        neg_count = sum(1 for w in words if w in negative_words)
-        
-        if pos_count > neg_count:
-            sentiment = "positive"
-        elif neg_count > pos_count:
-            sentiment = "negative"
-        else:
-            sentiment = "neutral"
-        
-        return {
-            "sentiment": sentiment,
-            "sentiment_confidence": 0.5,
-            "entities": [],
-            "topics": ["general"],
-            "summary": text[:200] + "..." if len(text) > 200 else text,
-            "model": f"{self.model} (fallback)",
-            "timestamp": datetime.utcnow().isoformat(),
-            "error": error
-        }
+        """Local lexicon/gazetteer analysis (see LocalAnalyzer) if AI fails."""
+        result = LocalAnalyzer().analyze(text)
+        result["model"] = f"{self.model} (fallback)"
+        result["error"] = error
+        return result
@@ -0,0 +1,149 @@
+"""Content-addressed cache for AI analysis results."""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from .database import Database
+
+
+class AnalysisCache:
+    """
+    Caches analyses keyed by normalized text, provider, model and prompt version.
+    
+    A persistent table in the pipeline database is the source of truth; an
+    optional in-process LRU sits in front of it to skip the database on hot keys.
+    """
+    
+    EVICT_EVERY = 500  # Run TTL/size eviction after this many inserts
+    
+    def __init__(self, db: Database, ttl_seconds: int = 7 * 24 * 3600,
+                 max_entries: int = 100000, lru_size: int = 1024):
+        """
+        Initialize analysis cache.
+        
+        Args:
+            db: Database holding the analysis_cache table
+            ttl_seconds: Maximum age of a cached analysis
+            max_entries: Maximum number of rows kept in the cache table
+            lru_size: In-process LRU capacity (0 disables the LRU)
+        """
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize text so trivially different copies share a cache entry."""
+        return " ".join(text.split())
+    
+    def make_key(self, text: str, analyzer) -> Dict[str, str]:
+        """Build the cache key parts for a text analyzed by the given analyzer."""
+        text_hash = hashlib.sha256(self.normalize(text).encode("utf-8")).hexdigest()
+        parts = {
+            "text_hash": text_hash,
+            "provider": analyzer.provider,
+            "model": analyzer.model,
+            "prompt_version": analyzer.prompt_version
+        }
+        parts["cache_key"] = hashlib.sha256(
+            "|".join(parts[k] for k in ("text_hash", "provider", "model", "prompt_version")).encode("utf-8")
+        ).hexdigest()
+        return parts
+    
+    def get(self, key: Dict[str, str], memory_only: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached analysis.
+        
+        Args:
+            key: Key parts from make_key()
+            memory_only: Only consult the in-process LRU (no database access)
+        
+        Returns:
+            Copy of the cached analysis, or None on a miss
+        """
+        cache_key = key["cache_key"]
+        with self._lock:
+            entry = self._lru.get(cache_key)
+            if entry is not None:
+                expires_at, analysis = entry
+                if expires_at > time.time():
+                    self._lru.move_to_end(cache_key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return self._as_hit(analysis)
+                del self._lru[cache_key]
+        
+        if memory_only:
+            return None
+        
+        cached = self.db.get_cached_analysis(cache_key, self.ttl_seconds)
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        
+        analysis = json.loads(cached)
+        self._remember(cache_key, analysis)
+        return self._as_hit(analysis)
+    
+    def put(self, key: Dict[str, str], analysis: Dict[str, Any]):
+        """
+        Store an analysis unless it came from the fallback path or is a
+        partial long-document merge (some chunks failed), so a retry after
+        the provider recovers can produce the complete analysis.
+        """
+        if "error" in analysis or analysis.get("failed_chunks"):
+            return
+        
+        analysis = {k: v for k, v in analysis.items() if k != "cached"}
+        self.db.put_cached_analysis(
+            key["cache_key"], key["text_hash"], key["provider"],
+            key["model"], key["prompt_version"], json.dumps(analysis)
+        )
+        self._remember(key["cache_key"], analysis)
+        
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % self.EVICT_EVERY == 0
+        if evict:
+            self.db.evict_cached_analyses(self.ttl_seconds, self.max_entries)
+    
+    def _remember(self, cache_key: str, analysis: Dict[str, Any]):
+        """Add an entry to the in-process LRU."""
+        if self.lru_size <= 0:
+            return
+        with self._lock:
+            self._lru[cache_key] = (time.time() + self.ttl_seconds, analysis)
+            self._lru.move_to_end(cache_key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+    
+    def _as_hit(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a caller-owned copy of a cached analysis marked as a hit."""
+        result = copy.deepcopy(analysis)
+        result["cached"] = True
+        return result
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "lru_entries": len(self._lru)
+            }
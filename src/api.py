@@ -1,12 +1,16 @@
 """FastAPI application for the AI pipeline."""
 
-from fastapi import FastAPI, HTTPException, Query, File, UploadFile, Form
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, Field
-from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field, ValidationError
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+import json
 import os
 from pathlib import Path
-import tempfile
+import hashlib
+import uuid
 
 # Load .env file
 env_file = Path(__file__).parent.parent / '.env'
@@ -18,7 +22,16 @@ if env_file.exists():
                 key, value = line.split('=', 1)
                 os.environ[key] = value
 
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from .database import MAX_PAGE_SIZE
 from .media_pipeline import MediaPipeline
+from .metrics import metrics, render_prometheus
+from .response_cache import ResponseCache
+from .worker import JobWorkerPool
 
 
 # Request models
@@ -27,25 +40,122 @@ class IngestRequest(BaseModel):
     source: str = Field(default="api", description="Source identifier")
 
 
+try:
+    import orjson  # noqa: F401
+    DEFAULT_RESPONSE_CLASS = ORJSONResponse
+except ImportError:
+    print("⚠️  orjson not installed, using the standard JSON encoder. Install: pip install orjson")
+    DEFAULT_RESPONSE_CLASS = JSONResponse
+
 # Initialize app
 app = FastAPI(
     title="Akhila AI Pipeline",
     description="AI-powered text analysis pipeline for ingestion, processing, and insights",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DEFAULT_RESPONSE_CLASS
 )
 
 # Initialize pipeline
+DB_PATH = os.getenv("DB_PATH", "data/pipeline.db")
 AI_PROVIDER = os.getenv("AI_PROVIDER", "openai")
 AI_MODEL = os.getenv("AI_MODEL", None)
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "data/uploads"))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 2 * 1024 ** 3))
+# Room for the multipart framing and form fields around the file itself
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+# Uploads are parsed by _spool_upload(), so describe the form for /docs by hand
+UPLOAD_FORM_SCHEMA = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object",
+    "required": ["file"],
+    "properties": {"file": {"type": "string", "format": "binary"}, "source": {"type": "string"}},
+}}}}}
+
+PIPELINE_OPTIONS = {
+    "ai_provider": AI_PROVIDER,
+    "ai_model": AI_MODEL,
+    "whisper_model": WHISPER_MODEL,
+    "cache_ttl": int(os.getenv("ANALYSIS_CACHE_TTL", 7 * 24 * 3600)),
+    "cache_max_entries": int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", 100000)),
+    "cache_lru_size": int(os.getenv("ANALYSIS_CACHE_LRU_SIZE", 1024)),
+    "batch_max_items": int(os.getenv("AI_BATCH_MAX_ITEMS", 0)),
+    "batch_max_wait_ms": float(os.getenv("AI_BATCH_MAX_WAIT_MS", 20)),
+    "batch_max_item_tokens": int(os.getenv("AI_BATCH_MAX_ITEM_TOKENS", 200)),
+    "ai_backends": os.getenv("AI_BACKENDS") or None,
+    "hedge_percentile": float(os.getenv("AI_HEDGE_PERCENTILE", 0.95)),
+    "hedge_min_ms": float(os.getenv("AI_HEDGE_MIN_MS", 50)),
+    "local_max_tokens": int(os.getenv("LOCAL_MAX_TOKENS", 0)),
+    "local_min_confidence": float(os.getenv("LOCAL_MIN_CONFIDENCE", 0.7)),
+    "local_sources": [s.strip() for s in os.getenv("LOCAL_SOURCES", "").split(",") if s.strip()]
+}
+
+# Whisper worker pool settings; only job workers transcribe, so the API
+# process itself never loads a model
+TRANSCRIPTION_OPTIONS = {
+    "transcription_workers": int(os.getenv("WHISPER_WORKERS", 0)),
+    "transcription_threads": int(os.getenv("WHISPER_THREADS", 0)),
+    "transcription_max_jobs": int(os.getenv("WHISPER_MAX_JOBS", 0)),
+    "transcription_max_rss_mb": int(os.getenv("WHISPER_MAX_RSS_MB", 0)),
+    "long_audio_seconds": float(os.getenv("WHISPER_LONG_AUDIO_SECONDS", 600)),
+    "long_audio_chunk_seconds": float(os.getenv("WHISPER_CHUNK_SECONDS", 120))
+}
+
+pipeline = MediaPipeline(db_path=DB_PATH, **PIPELINE_OPTIONS)
 
-pipeline = MediaPipeline(
-    db_path="data/pipeline.db",
-    ai_provider=AI_PROVIDER,
-    ai_model=AI_MODEL,
-    whisper_model=WHISPER_MODEL
+# Encoded responses for document reads and first list/search pages
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", 1024)),
+    disk_path=os.getenv("RESPONSE_CACHE_PATH") or None,
+    disk_max_entries=int(os.getenv("RESPONSE_CACHE_DISK_MAX_ENTRIES", 100000)),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    disk_max_bytes=int(os.getenv("RESPONSE_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024))
 )
 
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 1000))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 16))
+
+# Background workers for queued ingestion jobs
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 10))
+job_workers = JobWorkerPool(
+    db_path=DB_PATH,
+    workers={
+        "text": int(os.getenv("JOB_WORKERS_TEXT", 1)),
+        "audio": int(os.getenv("JOB_WORKERS_AUDIO", 1)),
+        "video": int(os.getenv("JOB_WORKERS_VIDEO", 1))
+    },
+    pipeline_options={**PIPELINE_OPTIONS, **TRANSCRIPTION_OPTIONS},
+    retry_delay=int(os.getenv("JOB_RETRY_DELAY", 10)),
+    # One job in flight per Whisper replica of a media worker
+    slots={
+        "audio": max(1, TRANSCRIPTION_OPTIONS["transcription_workers"]),
+        "video": max(1, TRANSCRIPTION_OPTIONS["transcription_workers"])
+    },
+    metrics_interval=METRICS_FLUSH_INTERVAL,
+    # Media workers preload Whisper, so they start with the first media job
+    on_demand=[t.strip() for t in os.getenv("JOB_WORKERS_ON_DEMAND", "audio,video").split(",")
+               if t.strip()]
+)
+
+
+@app.on_event("startup")
+def start_job_workers():
+    """Start worker processes; queued jobs from a previous run resume here."""
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    job_workers.start()
+    for row in pipeline.db.get_job_counts():
+        job_workers.ensure(row["media_type"])
+
+
+@app.on_event("shutdown")
+async def close_connections():
+    """Stop workers and release pooled AI provider and database connections."""
+    job_workers.stop()
+    await pipeline.analyzer.aclose()
+    pipeline.close()
+    pipeline.db.close()
+    response_cache.close()
+
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -118,7 +228,7 @@ async def root():
                 
                 const div = document.getElementById('uploadResult');
                 div.style.display = 'block';
-                div.innerHTML = '<p>⏳ Uploading and processing... This may take 30-90 seconds...</p>';
+                div.innerHTML = '<p>⏳ Uploading...</p>';
                 
                 const formData = new FormData();
                 formData.append('file', file);
@@ -129,12 +239,22 @@ async def root():
                 const endpoint = isVideo ? '/ingest/video' : '/ingest/audio';
                 
                 try {
-                    const response = await fetch(endpoint, {
+                    let response = await fetch(endpoint, {
                         method: 'POST',
                         body: formData
                     });
                     
-                    const result = await response.json();
+                    let result = await response.json();
+                    
+                    // Upload is queued as a job; poll until a worker finishes it
+                    while (response.status === 202 || (result.job && !['succeeded', 'failed'].includes(result.job.status))) {
+                        div.innerHTML = '<p>⏳ Processing in background (job ' + (result.job_id || result.job.id) + ')...</p>';
+                        await new Promise(r => setTimeout(r, 2000));
+                        const statusUrl = result.status_url || '/jobs/' + result.job.id;
+                        response = await fetch(statusUrl);
+                        result = await response.json();
+                    }
+                    
                     div.innerHTML = '<pre>' + JSON.stringify(result, null, 2) + '</pre>';
                 } catch (error) {
                     div.innerHTML = '<p style="color: red;">Error: ' + error.message + '</p>';
@@ -190,101 +310,384 @@ async def root():
 
 
 @app.post("/ingest")
-async def ingest_document(request: IngestRequest):
-    """Ingest and analyze a text document."""
-    result = pipeline.ingest(request.text, request.source)
+async def ingest_document(request: IngestRequest, background: bool = Query(default=False)):
+    """Ingest and analyze a text document (queued as a job when background=true)."""
+    if background:
+        error = pipeline.validate_text(request.text)
+        if error:
+            raise HTTPException(status_code=400, detail=error["message"])
+        return await run_in_threadpool(_submit_job, "text", {"text": request.text}, request.source)
+    
+    result = await pipeline.aingest(request.text, request.source)
     if result["status"] == "error":
         raise HTTPException(status_code=400, detail=result["message"])
     return result
 
 
+@app.post("/ingest/batch")
+async def ingest_batch(
+    request: Request,
+    concurrency: int = Query(default=BATCH_MAX_CONCURRENCY, ge=1, le=BATCH_MAX_CONCURRENCY)
+):
+    """
+    Ingest many documents in one request.
+    
+    Body is a JSON array of IngestRequest objects, or NDJSON (one object per
+    line) with Content-Type application/x-ndjson. Returns per-item results
+    in input order.
+    """
+    body = await request.body()
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            raw_items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            raw_items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {str(e)}")
+    
+    if not isinstance(raw_items, list):
+        raise HTTPException(status_code=400, detail="Batch body must be an array of documents")
+    if len(raw_items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {BATCH_MAX_ITEMS} items)")
+    
+    items, errors = [], {}
+    for index, raw in enumerate(raw_items):
+        try:
+            items.append(IngestRequest.model_validate(raw).model_dump())
+        except ValidationError as e:
+            errors[index] = {"status": "error", "message": f"Invalid item: {e.errors()[0]['msg']}"}
+            items.append({"text": "", "source": "api"})
+    
+    results = await pipeline.aingest_batch(items, concurrency=concurrency)
+    for index, error in errors.items():
+        results[index] = error
+    
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    return {
+        "status": "success",
+        "count": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+
+
+def _etag_response(request: Request, etag: str, body: bytes) -> Response:
+    """JSON response with an ETag, or 304 if the client already has this version."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _cached_response(request: Request, key: Optional[str], produce) -> Response:
+    """
+    Serve `produce()` through the response cache.
+    
+    `key` is None for uncacheable requests (deep pages), which still get an
+    ETag. `produce` returns the response JSON text; errors raise
+    HTTPException before anything is cached.
+    """
+    if key is not None:
+        entry = response_cache.get(key)
+        if entry is not None:
+            return _etag_response(request, *entry)
+    
+    body = produce().encode("utf-8")
+    etag = response_cache.put(key, body) if key is not None else ResponseCache.make_etag(body)
+    return _etag_response(request, etag, body)
+
+
 @app.get("/documents/{document_id}")
-async def get_document(document_id: int):
-    """Retrieve a document with full analysis."""
-    result = pipeline.retrieve(document_id)
-    if result["status"] == "error":
-        raise HTTPException(status_code=404, detail=result["message"])
-    return result
+def get_document(document_id: int, request: Request):
+    """Retrieve a document with full analysis (ETag / If-None-Match aware)."""
+    def produce():
+        found = pipeline.retrieve_json(document_id)
+        if found is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        return found[0]
+    
+    # Only analyzed documents are cached, keyed on their row version
+    version = pipeline.db.get_document_version(document_id)
+    key = None
+    if version is not None:
+        key = f"document:{pipeline.db.database_id}:{document_id}:{version}"
+    return _cached_response(request, key, produce)
 
 
 @app.get("/documents")
-async def list_documents(
-    limit: int = Query(default=50, ge=1, le=100),
-    offset: int = Query(default=0, ge=0)
+def list_documents(
+    request: Request,
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, max_length=512)
 ):
-    """List all documents."""
-    return pipeline.list_all(limit, offset)
+    """
+    List documents newest first.
+    
+    Pass `next_cursor` from the previous response as `cursor` to get the
+    next page; `offset` still works but gets slower the deeper it goes.
+    First pages are cached until the next ingest.
+    """
+    def produce():
+        try:
+            return pipeline.list_all_json(limit, offset, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    key = None
+    if cursor is None and offset == 0:
+        key = f"documents:{pipeline.db.database_id}:{pipeline.db.get_generation()}:{limit}"
+    return _cached_response(request, key, produce)
 
 
 @app.get("/search")
-async def search_documents(
+def search_documents(
+    request: Request,
     sentiment: Optional[str] = Query(default=None, regex="^(positive|negative|neutral)$"),
-    entity_type: Optional[str] = Query(default=None)
+    entity_type: Optional[str] = Query(default=None),
+    q: Optional[str] = Query(default=None, max_length=500),
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None, max_length=512),
+    entity: Optional[str] = Query(default=None, max_length=200),
+    topic: Optional[str] = Query(default=None, max_length=200)
+):
+    """
+    Search documents by filters and full text.
+    
+    `q` matches words in content and summaries (all words must match;
+    "quoted phrases" and prefix* terms are supported). Text results are
+    ranked by relevance and include a highlighted snippet. `entity` finds
+    documents mentioning an entity regardless of spelling ("Apple Inc." =
+    "apple"); with `entity_type` it must be of that type. `topic` keeps
+    documents tagged with that topic. Results are paged like /documents
+    via `cursor` / `next_cursor`; first pages are cached until the next ingest.
+    Paging through `q` results is best-effort: relevance scores change as
+    documents are ingested, so a result may repeat or be skipped across pages.
+    """
+    def produce():
+        try:
+            return pipeline.search_json(sentiment, entity_type, q, limit, cursor, entity, topic)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    key = None
+    if cursor is None:
+        params = json.dumps([sentiment, entity_type, q, limit, entity, topic])
+        key = f"search:{pipeline.db.database_id}:{pipeline.db.get_generation()}:{params}"
+    return _cached_response(request, key, produce)
+
+
+@app.get("/topics")
+def list_topics(
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    prefix: Optional[str] = Query(default=None, max_length=100)
 ):
-    """Search documents by filters."""
-    return pipeline.search(sentiment, entity_type)
+    """Topic facets: topics with their document counts, most used first."""
+    return pipeline.topics(limit, prefix)
 
 
-@app.post("/ingest/audio")
-async def ingest_audio(file: UploadFile = File(...), source: str = Form(default="audio_upload")):
-    """Ingest and analyze an audio file."""
-    if not file.filename.lower().endswith(('.mp3', '.wav', '.m4a', '.ogg', '.flac')):
-        raise HTTPException(status_code=400, detail="Unsupported audio format")
+@app.get("/entities/top")
+def top_entities(
+    type: Optional[str] = Query(default=None, max_length=50),
+    limit: int = Query(default=20, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Entities mentioned in the most documents, optionally of one type."""
+    return pipeline.top_entities(type, limit)
+
+
+async def _spool_upload(request: Request, extensions: Tuple[str, ...],
+                        unsupported: str) -> Tuple[dict, Dict[str, str]]:
+    """
+    Parse a multipart/form-data upload as it arrives and stream its "file"
+    part straight into a spool file.
     
-    # Save to temp file
-    with tempfile.NamedTemporaryFile(suffix=Path(file.filename).suffix, delete=False) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    The body is read from request.stream(), so the file is written to disk
+    once and UPLOAD_MAX_BYTES is enforced mid-stream: a Content-Length over
+    the cap is rejected before reading, anything else as soon as the file
+    part passes it. The SHA-256 is computed while copying, so memory stays
+    flat regardless of the media size.
     
-    try:
-        result = pipeline.ingest_audio(tmp_path, source)
-        if result["status"] == "error":
-            raise HTTPException(status_code=400, detail=result["message"])
-        return result
-    finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
-
-
-@app.post("/ingest/video")
-async def ingest_video(file: UploadFile = File(...), source: str = Form(default="video_upload")):
-    """Ingest and analyze a video file."""
-    if not file.filename.lower().endswith(('.mp4', '.avi', '.mov', '.mkv', '.webm')):
-        raise HTTPException(status_code=400, detail="Unsupported video format")
+    Args:
+        request: Upload request
+        extensions: Accepted file name extensions
+        unsupported: 400 message for any other extension
     
-    # Save to temp file
-    with tempfile.NamedTemporaryFile(suffix=Path(file.filename).suffix, delete=False) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    Returns:
+        (job payload {"path", "spooled", "sha256", "size"}, other form fields)
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+    too_large = HTTPException(status_code=413, detail=f"File too large (max {UPLOAD_MAX_BYTES} bytes)")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD:
+        raise too_large
     
+    # The parser reports parts through callbacks; queue them, then handle them
+    # (with awaits) after each chunk
+    events = []
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": lambda: events.append(("begin", b"")),
+        "on_header_field": lambda data, start, end: events.append(("field", data[start:end])),
+        "on_header_value": lambda data, start, end: events.append(("value", data[start:end])),
+        "on_header_end": lambda: events.append(("header", b"")),
+        "on_headers_finished": lambda: events.append(("headers", b"")),
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+        "on_part_end": lambda: events.append(("end", b"")),
+    })
+    
+    fields: Dict[str, str] = {}
+    spool = spool_path = None
+    digest = hashlib.sha256()
+    size = 0
     try:
-        result = pipeline.ingest_video(tmp_path, source)
-        if result["status"] == "error":
-            raise HTTPException(status_code=400, detail=result["message"])
-        return result
-    finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+        async for body in request.stream():
+            parser.write(body)
+            for event, data in events:
+                if event == "begin":
+                    headers, header, value, name, target = {}, b"", b"", "", None
+                elif event == "field":
+                    header += data
+                elif event == "value":
+                    value += data
+                elif event == "header":
+                    headers[header.lower()] = value
+                    header, value = b"", b""
+                elif event == "headers":
+                    _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+                    name = disposition.get(b"name", b"").decode("utf-8", "replace")
+                    filename = disposition.get(b"filename")
+                    if filename is None:
+                        target = bytearray()
+                    elif name == "file" and spool is None:
+                        filename = filename.decode("utf-8", "replace")
+                        if not filename.lower().endswith(extensions):
+                            raise HTTPException(status_code=400, detail=unsupported)
+                        spool_path = UPLOAD_DIR / f"{uuid.uuid4().hex}{Path(filename).suffix.lower()}"
+                        spool = await run_in_threadpool(open, spool_path, "wb")
+                        target = spool
+                elif event == "data" and target is spool and spool is not None:
+                    size += len(data)
+                    if size > UPLOAD_MAX_BYTES:
+                        raise too_large
+                    digest.update(data)
+                    await run_in_threadpool(spool.write, data)
+                elif event == "data" and isinstance(target, bytearray):
+                    target += data
+                    if len(target) > UPLOAD_FORM_OVERHEAD:
+                        raise HTTPException(status_code=400, detail=f"Form field too large: {name}")
+                elif event == "end" and isinstance(target, bytearray):
+                    fields[name] = target.decode("utf-8", "replace")
+            events.clear()
+        parser.finalize()
+        
+        if spool is None:
+            raise HTTPException(status_code=422, detail="Missing file")
+        await run_in_threadpool(spool.close)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            spool_path.unlink(missing_ok=True)
+        raise
+    
+    payload = {"path": str(spool_path), "spooled": True, "sha256": digest.hexdigest(), "size": size}
+    return payload, fields
+
+
+def _submit_job(media_type: str, payload: dict, source: str) -> JSONResponse:
+    """Queue a job for the background workers and answer 202 Accepted."""
+    job_id = pipeline.db.enqueue_job(media_type, payload, source, max_attempts=JOB_MAX_ATTEMPTS)
+    job_workers.ensure(media_type)
+    return JSONResponse(
+        status_code=202,
+        content={"status": "queued", "job_id": job_id, "status_url": f"/jobs/{job_id}"}
+    )
+
+
+@app.post("/ingest/audio", status_code=202, openapi_extra=UPLOAD_FORM_SCHEMA)
+async def ingest_audio(request: Request):
+    """Queue an audio file (form field `file`, optional `source`) for transcription and analysis."""
+    # Stream to spool file; the worker deletes it when the job is done
+    payload, fields = await _spool_upload(request, ('.mp3', '.wav', '.m4a', '.ogg', '.flac'),
+                                          "Unsupported audio format")
+    return await run_in_threadpool(_submit_job, "audio", payload,
+                                   fields.get("source") or "audio_upload")
+
+
+@app.post("/ingest/video", status_code=202, openapi_extra=UPLOAD_FORM_SCHEMA)
+async def ingest_video(request: Request):
+    """Queue a video file (form field `file`, optional `source`) for transcription and analysis."""
+    if pipeline.video_processor is None:
+        raise HTTPException(status_code=400,
+                            detail="Video processing not available. Install ffmpeg: brew install ffmpeg")
+    
+    # Stream to spool file; the worker deletes it when the job is done
+    payload, fields = await _spool_upload(request, ('.mp4', '.avi', '.mov', '.mkv', '.webm'),
+                                          "Unsupported video format")
+    return await run_in_threadpool(_submit_job, "video", payload,
+                                   fields.get("source") or "video_upload")
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: int):
+    """Get the status (and result, once finished) of a queued ingestion job."""
+    job = pipeline.db.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "job": job}
 
 
 @app.get("/stats")
-async def get_stats():
+def get_stats():
     """Get system statistics."""
-    return pipeline.stats()
+    result = pipeline.stats()
+    result["stats"]["response_cache"] = response_cache.stats()
+    return result
+
+
+@app.get("/stats/timeseries")
+def get_stats_timeseries(
+    bucket: str = Query(default="hour", regex="^(hour|day)$"),
+    start: Optional[datetime] = Query(default=None, alias="from"),
+    end: Optional[datetime] = Query(default=None, alias="to")
+):
+    """Document, sentiment, source, entity type and model counts per hour or day (UTC)."""
+    result = pipeline.timeseries(bucket, start, end)
+    if result["status"] == "error":
+        raise HTTPException(status_code=400, detail=result["message"])
+    return result
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Per-stage latency histograms and queue gauges in Prometheus text format."""
+    snapshots = [metrics.snapshot()]
+    # Worker rows are refreshed every flush interval; older ones belong to dead workers
+    snapshots.extend(pipeline.db.get_metrics_snapshots(max_age_seconds=int(3 * METRICS_FLUSH_INTERVAL) + 1))
+    
+    jobs = {"gauges": [["pipeline_jobs", [["media_type", r["media_type"]], ["status", r["status"]]], r["count"]]
+                       for r in pipeline.db.get_job_counts()]}
+    return PlainTextResponse(render_prometheus(snapshots + [jobs]),
+                             media_type="text/plain; version=0.0.4")
 
 
 @app.get("/health")
-async def health_check():
-    """Health check endpoint."""
+def health_check():
+    """Health check endpoint (a trivial query, safe to poll constantly)."""
     try:
-        stats = pipeline.stats()
+        pipeline.db.ping()
         return {
             "status": "healthy",
             "database": "ok",
-            "ai_provider": AI_PROVIDER,
-            "ai_model": pipeline.analyzer.model
+            "ai_provider": pipeline.analyzer.provider,
+            "ai_model": pipeline.analyzer.model,
+            "ai_circuit": {
+                b.governor.name: b.governor.breaker.state
+                for b in getattr(pipeline.analyzer, "backends", [pipeline.analyzer])
+            }
         }
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Unhealthy: {str(e)}")
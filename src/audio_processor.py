@@ -1,9 +1,48 @@
 """Audio processing module for transcription and analysis."""
 
 import os
-import tempfile
-from pathlib import Path
+import subprocess
 from typing import Dict, Any
+from .metrics import metrics
+
+
+SAMPLE_RATE = 16000  # Whisper models expect 16 kHz mono input
+
+
+def decode_audio(media_path: str, sample_rate: int = SAMPLE_RATE):
+    """
+    Decode any audio/video file to mono float32 PCM in a single ffmpeg pass.
+    
+    ffmpeg writes raw samples to stdout, which are wrapped in a NumPy array
+    without touching disk, so Whisper can consume them directly.
+    
+    Args:
+        media_path: Path to an audio or video file
+        sample_rate: Output sample rate in Hz
+    
+    Returns:
+        1-D float32 NumPy array of samples in [-1, 1]
+    """
+    import numpy as np
+    
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-threads", "0",
+        "-i", media_path,
+        "-vn",  # No video
+        "-f", "f32le",  # Raw 32-bit float PCM
+        "-ac", "1",  # Mono
+        "-ar", str(sample_rate),
+        "-"
+    ]
+    
+    with metrics.stage("extract_audio"):
+        result = subprocess.run(cmd, capture_output=True)
+    
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to decode audio: {result.stderr.decode()}")
+    
+    return np.frombuffer(result.stdout, dtype=np.float32)
 
 
 class AudioProcessor:
@@ -27,12 +66,17 @@ class AudioProcessor:
             self.model = whisper.load_model(self.model_size)
         return self.model
     
+    def preload(self):
+        """Load the Whisper model now instead of on the first transcription."""
+        self._load_model()
+    
     def transcribe_audio(self, audio_path: str) -> Dict[str, Any]:
         """
         Transcribe audio file to text.
         
         Args:
-            audio_path: Path to audio file (mp3, wav, m4a, etc.)
+            audio_path: Path to audio file (mp3, wav, m4a, etc.) or a
+                        video file, whose audio track is decoded
         
         Returns:
             {
@@ -45,46 +89,31 @@ class AudioProcessor:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
-        model = self._load_model()
-        result = model.transcribe(audio_path)
-        
-        return {
-            "text": result["text"].strip(),
-            "language": result.get("language", "unknown"),
-            "duration": self._get_duration(audio_path),
-            "segments": len(result.get("segments", []))
-        }
-    
-    def _get_duration(self, audio_path: str) -> float:
-        """Get audio duration in seconds."""
-        try:
-            from pydub import AudioSegment
-            audio = AudioSegment.from_file(audio_path)
-            return len(audio) / 1000.0  # Convert ms to seconds
-        except:
-            return 0.0
+        return self.transcribe_pcm(decode_audio(audio_path))
     
-    def process_audio_bytes(self, audio_bytes: bytes, filename: str = "audio.mp3") -> Dict[str, Any]:
+    def transcribe_pcm(self, samples) -> Dict[str, Any]:
         """
-        Process audio from bytes.
+        Transcribe already decoded 16 kHz mono float32 samples.
         
         Args:
-            audio_bytes: Audio file bytes
-            filename: Original filename (for format detection)
+            samples: NumPy array from decode_audio()
         
         Returns:
-            Transcription result
+            Same structure as transcribe_audio()
         """
-        # Save to temp file
-        suffix = Path(filename).suffix or ".mp3"
-        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-            tmp.write(audio_bytes)
-            tmp_path = tmp.name
+        model = self._load_model()
+        with metrics.stage("transcribe", model=f"whisper-{self.model_size}"):
+            result = model.transcribe(samples)
+        
+        segments = result.get("segments", [])
         
-        try:
-            result = self.transcribe_audio(tmp_path)
-            return result
-        finally:
-            # Cleanup
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+        return {
+            "text": result["text"].strip(),
+            "language": result.get("language", "unknown"),
+            "duration": len(samples) / SAMPLE_RATE,
+            "segments": len(segments),
+            "segment_list": [
+                {"start": seg["start"], "end": seg["end"], "text": seg["text"].strip()}
+                for seg in segments
+            ]
+        }
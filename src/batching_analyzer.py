@@ -0,0 +1,252 @@
+"""Micro-batching of short documents into one AI call."""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from .ai_analyzer import AIAnalyzer
+from .long_document import estimate_tokens
+from .metrics import metrics
+
+BATCH_MARKER = "Texts to analyze (one JSON object per line):\n"
+OUTPUT_TOKENS_PER_ITEM = 250  # Room for one analysis object in the response
+
+
+def build_batch_prompt(texts: List[Tuple[int, str]]) -> str:
+    """Prompt asking for one analysis per text, keyed by the given IDs."""
+    lines = "\n".join(json.dumps({"id": item_id, "text": text}, ensure_ascii=False)
+                      for item_id, text in texts)
+    return f"""Analyze each of the following texts independently. Return a JSON array
+with exactly one object per text, using this structure for each:
+{{
+  "id": <id of the text>,
+  "sentiment": "positive" | "negative" | "neutral",
+  "sentiment_confidence": 0.0 to 1.0,
+  "entities": [
+    {{"text": "entity name", "type": "PERSON" | "ORGANIZATION" | "LOCATION" | "OTHER"}}
+  ],
+  "topics": ["topic1", "topic2", "topic3"],
+  "summary": "2-sentence summary"
+}}
+
+Rules:
+- Be concise and factual
+- Extract 3-5 topics maximum
+- Confidence should reflect certainty
+- Return ONLY a valid JSON array, no markdown
+
+{BATCH_MARKER}{lines}"""
+
+
+class BatchingAnalyzer:
+    """
+    Drop-in AIAnalyzer wrapper that packs short texts into shared prompts.
+    
+    Short texts wait up to max_wait_ms for company; a batch is sent when it
+    reaches max_items or max_tokens, or when the window closes. The response
+    is an ID-keyed JSON array; each item is validated like _parse_response()
+    and only the items that are missing or invalid are re-analyzed one by
+    one. Long texts and lone texts skip batching. Everything else (model,
+    prompt_version, aclose, ...) is delegated to the wrapped analyzer.
+    
+    Batches only form when calls overlap: concurrent aanalyze() calls on one
+    event loop, or analyze() calls from several threads.
+    """
+    
+    def __init__(self, analyzer: AIAnalyzer, max_items: int = 16, max_wait_ms: float = 20,
+                 max_tokens: int = 2000, max_item_tokens: int = 200):
+        """
+        Initialize batching analyzer.
+        
+        Args:
+            analyzer: Analyzer that makes the actual calls
+            max_items: Maximum texts per batched call
+            max_wait_ms: How long the first text of a batch waits for others
+            max_tokens: Input token budget for the texts of one batch
+            max_item_tokens: Texts longer than this are never batched
+        """
+        self.analyzer = analyzer
+        self.max_items = max(1, max_items)
+        self.max_wait = max_wait_ms / 1000
+        self.max_tokens = max_tokens
+        self.max_item_tokens = max_item_tokens
+        
+        self._lock = threading.Lock()
+        self._batch: Optional[Dict[str, Any]] = None  # Open batch of analyze() callers
+        self._active = 0  # analyze() callers inside the batching path
+        self._abatch: Optional[Dict[str, Any]] = None  # Open batch of aanalyze() callers
+        self._tasks = set()
+    
+    def __getattr__(self, name: str):
+        return getattr(self.analyzer, name)
+    
+    def _fits(self, batch: Optional[Dict[str, Any]], tokens: int) -> bool:
+        """Whether a text of `tokens` can join the open batch."""
+        return (batch is not None and len(batch["items"]) < self.max_items
+                and batch["tokens"] + tokens <= self.max_tokens)
+    
+    def _is_full(self, batch: Dict[str, Any]) -> bool:
+        return len(batch["items"]) >= self.max_items or batch["tokens"] >= self.max_tokens
+    
+    def analyze(self, text: str) -> Dict[str, Any]:
+        """Analyze text, sharing one call with texts submitted by other threads."""
+        tokens = estimate_tokens(text)
+        if tokens > self.max_item_tokens:
+            return self.analyzer.analyze(text)
+        
+        future = Future()
+        with self._lock:
+            self._active += 1
+            if not self._fits(self._batch, tokens):
+                self._batch = {"items": [], "tokens": 0, "full": threading.Event()}
+                leader = True
+            else:
+                leader = False
+            batch = self._batch
+            batch["items"].append((text, future))
+            batch["tokens"] += tokens
+            if self._is_full(batch):
+                batch["full"].set()
+        
+        try:
+            if leader:
+                # The first caller closes the window and makes the call for
+                # everyone; a lone caller has nobody to wait for
+                if self._active > 1:
+                    batch["full"].wait(self.max_wait)
+                with self._lock:
+                    if self._batch is batch:
+                        self._batch = None
+                self._run(batch["items"])
+            return future.result()
+        finally:
+            with self._lock:
+                self._active -= 1
+    
+    def _run(self, items: List[Tuple[str, Future]]):
+        """Analyze a closed batch and resolve its futures."""
+        texts = [text for text, _ in items]
+        if len(items) == 1:
+            results = [None]
+        else:
+            try:
+                prompt = build_batch_prompt(list(enumerate(map(self.analyzer.compress, texts), 1)))
+                with metrics.stage("ai_batch_call", **self.analyzer.metric_labels):
+                    response = self.analyzer._call_ai(
+                        prompt,
+                        max_tokens=OUTPUT_TOKENS_PER_ITEM * len(texts))
+                results = self._parse_batch(response, len(texts))
+            except Exception:
+                results = [None] * len(texts)
+            self._record(results)
+        
+        for (text, future), result in zip(items, results):
+            try:
+                future.set_result(result if result is not None else self.analyzer.analyze(text))
+            except Exception as e:
+                future.set_exception(e)
+    
+    async def aanalyze(self, text: str) -> Dict[str, Any]:
+        """Async analyze(), sharing one call with other texts awaiting on the loop."""
+        tokens = estimate_tokens(text)
+        if tokens > self.max_item_tokens:
+            return await self.analyzer.aanalyze(text)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._abatch
+        if batch is None or batch["loop"] is not loop or not self._fits(batch, tokens):
+            batch = {"items": [], "tokens": 0, "loop": loop}
+            batch["timer"] = loop.call_later(self.max_wait, self._aclose_batch, batch)
+            self._abatch = batch
+        batch["items"].append((text, future))
+        batch["tokens"] += tokens
+        if self._is_full(batch):
+            self._aclose_batch(batch)
+        return await future
+    
+    def _aclose_batch(self, batch: Dict[str, Any]):
+        """Stop accepting texts into a batch and start its call."""
+        batch["timer"].cancel()
+        if self._abatch is batch:
+            self._abatch = None
+        if not batch.get("closed"):
+            batch["closed"] = True
+            task = asyncio.ensure_future(self._arun(batch["items"]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _arun(self, items: List[Tuple[str, asyncio.Future]]):
+        """Async version of _run()."""
+        texts = [text for text, _ in items]
+        if len(items) == 1:
+            results = [None]
+        else:
+            try:
+                prompt = build_batch_prompt(list(enumerate(map(self.analyzer.compress, texts), 1)))
+                with metrics.stage("ai_batch_call", **self.analyzer.metric_labels):
+                    response = await self.analyzer._acall_ai(
+                        prompt,
+                        max_tokens=OUTPUT_TOKENS_PER_ITEM * len(texts))
+                results = self._parse_batch(response, len(texts))
+            except Exception:
+                results = [None] * len(texts)
+            self._record(results)
+        
+        async def resolve(text: str, future: asyncio.Future, result: Optional[Dict[str, Any]]):
+            try:
+                if result is None:
+                    result = await self.analyzer.aanalyze(text)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+        
+        await asyncio.gather(*(resolve(text, future, result)
+                               for (text, future), result in zip(items, results)))
+    
+    def _parse_batch(self, response: str, count: int) -> List[Optional[Dict[str, Any]]]:
+        """
+        Split a batched response into per-text analyses.
+        
+        Returns:
+            One analysis per text in submission order; None where the item
+            was missing, duplicated or failed validation
+        """
+        data = json.loads(self.analyzer._strip_markdown(response))
+        if isinstance(data, dict):
+            # Some models wrap the array, e.g. {"results": [...]}
+            data = next((v for v in data.values() if isinstance(v, list)), [])
+        if not isinstance(data, list):
+            raise ValueError("Batched response is not a JSON array")
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * count
+        seen = set()
+        timestamp = datetime.utcnow().isoformat()
+        for item in data:
+            try:
+                index = int(item.pop("id")) - 1
+                self.analyzer._validate_analysis(item)
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= index < count:
+                continue
+            if index in seen:
+                results[index] = None  # Ambiguous; re-analyze on its own
+                continue
+            seen.add(index)
+            item["model"] = self.analyzer.model
+            item["timestamp"] = timestamp
+            results[index] = item
+        return results
+    
+    def _record(self, results: List[Optional[Dict[str, Any]]]):
+        """Count batched texts and the ones sent again individually."""
+        labels = self.analyzer.metric_labels
+        metrics.inc("ai_batch_items_total", len(results), **labels)
+        redispatched = sum(1 for r in results if r is None)
+        if redispatched:
+            metrics.inc("ai_batch_redispatched_total", redispatched, **labels)
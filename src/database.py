@@ -1,35 +1,213 @@
 """Database setup and operations for the AI pipeline."""
 
+import base64
+import binascii
+import json
+import re
 import sqlite3
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+import unicodedata
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
 from contextlib import contextmanager
+from .metrics import metrics
+
+MAX_PAGE_SIZE = 100
+LIST_COLUMNS = ("id", "source", "ingested_at", "word_count", "sentiment", "sentiment_confidence")
+SEARCH_COLUMNS = ("id", "source", "ingested_at", "sentiment")
+TEXT_SEARCH_COLUMNS = SEARCH_COLUMNS + ("score", "snippet")
+RARE_LINK_DOCUMENTS = 5000  # Below this, entity/topic search starts from the links
+STATS_DIMENSIONS = ("sentiment", "source", "entity_type", "model")
+# SQLite expressions that map a UTC timestamp to its rollup period
+STATS_BUCKETS = {
+    "all": "''",
+    "hour": "strftime('%Y-%m-%d %H:00:00', {ts})",
+    "day": "date({ts})",
+}
+ORG_SUFFIX = re.compile(r"(,?\s+(inc|corp|corporation|co|company|ltd|llc|plc|gmbh|ag|sa))+$")
+FTS_TOKEN = re.compile(r'"([^"]+)"|(\w+)(\*?)')
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turn free-form search text into a safe FTS5 MATCH expression.
+    
+    Words are AND-ed, "quoted phrases" are kept, and a trailing * makes a
+    prefix query (e.g. `transcri*`). Everything else is treated as literal
+    text, so user input can never raise an FTS5 syntax error.
+    
+    Returns:
+        MATCH expression, or None if the text has no searchable words
+    """
+    terms = []
+    for phrase, word, star in FTS_TOKEN.findall(text):
+        if phrase:
+            words = re.findall(r"\w+", phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        else:
+            terms.append(f'"{word}"{star}')
+    return " ".join(terms) or None
+
+
+def normalize_entity(text: str, entity_type: str = "") -> str:
+    """
+    Dictionary key for an entity mention.
+    
+    Case, Unicode form, whitespace, surrounding punctuation, a leading
+    "the" and (for organizations) legal suffixes are ignored, so "Apple
+    Inc." and "apple" share one entry.
+    """
+    key = unicodedata.normalize("NFKC", text).casefold()
+    key = " ".join(key.replace(".", " ").split()).strip(" \"'`,;:!?()[]{}")
+    if key.startswith("the "):
+        key = key[4:]
+    if entity_type == "ORGANIZATION":
+        key = ORG_SUFFIX.sub("", key) or key
+    return key
+
+
+def normalize_topic(topic: str) -> str:
+    """Dictionary key for a topic label (case, spacing and punctuation ignored)."""
+    key = unicodedata.normalize("NFKC", topic).casefold()
+    return " ".join(re.sub(r"[^\w\s&+#-]", " ", key).split())
+
+
+def encode_cursor(kind: str, *key) -> str:
+    """Encode a keyset position as an opaque, URL-safe cursor."""
+    raw = json.dumps([kind, *key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: str) -> list:
+    """
+    Decode a cursor made by encode_cursor() for the given listing kind.
+    
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another listing
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value = json.loads(raw)
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(value, list) or len(value) != 3 or value[0] != kind:
+        raise ValueError("Invalid cursor")
+    return value[1:]
 
 
 class Database:
     """Handles all database operations."""
     
-    def __init__(self, db_path: str = "data/pipeline.db"):
+    def __init__(self, db_path: str = "data/pipeline.db",
+                 mmap_size: int = 256 * 1024 * 1024, cache_size_kb: int = 64 * 1024):
+        """
+        Initialize database.
+        
+        Writes go through one long-lived writer connection guarded by a lock;
+        reads use per-thread read-only connections. With WAL enabled, readers
+        never wait behind an in-progress write.
+        
+        Args:
+            db_path: SQLite database file
+            mmap_size: Bytes of the database file to memory-map per connection
+            cache_size_kb: Page cache size per connection in KiB
+        """
         self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self._writer = None
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
         self.init_db()
+        with self.read_connection() as conn:
+            self.database_id = conn.execute(
+                "SELECT value FROM counters WHERE name = 'database_id'"
+            ).fetchone()[0]
+    
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        """Open a tuned connection (statement cache, WAL, mmap, page cache)."""
+        if readonly:
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   cached_statements=256, isolation_level=None)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                   cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+        
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
     
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Context manager for the shared writer connection (one transaction)."""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    
+    @contextmanager
+    def read_connection(self):
+        """Context manager for this thread's read-only connection (one snapshot)."""
+        conn = getattr(self._local, "reader", None)
+        if conn is None:
+            conn = self._connect(readonly=True)
+            self._local.reader = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        
+        conn.execute("BEGIN")
         try:
             yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
         finally:
-            conn.close()
+            conn.execute("COMMIT")
+    
+    def close(self):
+        """Close the writer and all reader connections."""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+        self._local = threading.local()
     
     def init_db(self):
         """Initialize database schema."""
         with self.get_connection() as conn:
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'documents_fts'"
+            ).fetchone()
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'stats_rollups'"
+            ).fetchone()
+            has_entity_dict = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'entity_dict'"
+            ).fetchone()
+            has_topics = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'topics'"
+            ).fetchone()
             conn.executescript("""
                 CREATE TABLE IF NOT EXISTS documents (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -60,46 +238,435 @@ class Database:
                     FOREIGN KEY (document_id) REFERENCES documents(id)
                 );
                 
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    cache_key CHAR(64) PRIMARY KEY,
+                    text_hash CHAR(64) NOT NULL,
+                    provider VARCHAR(20),
+                    model VARCHAR(50),
+                    prompt_version VARCHAR(16),
+                    result TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    media_type VARCHAR(10) NOT NULL,
+                    source VARCHAR(255),
+                    payload TEXT NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    worker VARCHAR(64),
+                    document_id INTEGER,
+                    result TEXT,
+                    error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    run_after TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    lease_expires_at TIMESTAMP
+                );
+                
                 CREATE INDEX IF NOT EXISTS idx_sentiment ON analyses(sentiment);
                 CREATE INDEX IF NOT EXISTS idx_entity_type ON entities(entity_type);
                 CREATE INDEX IF NOT EXISTS idx_ingested_at ON documents(ingested_at);
+                CREATE INDEX IF NOT EXISTS idx_documents_keyset ON documents(ingested_at, id);
+                CREATE INDEX IF NOT EXISTS idx_cache_created_at ON analysis_cache(created_at);
+                CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(media_type, status, run_after);
+                CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs(status, lease_expires_at);
+                CREATE INDEX IF NOT EXISTS idx_analyses_document ON analyses(document_id);
+                CREATE INDEX IF NOT EXISTS idx_entities_document ON entities(document_id);
+                
+                -- One row per distinct entity; counts maintained at ingest
+                CREATE TABLE IF NOT EXISTS entity_dict (
+                    id INTEGER PRIMARY KEY,
+                    norm_key TEXT NOT NULL,
+                    entity_type TEXT NOT NULL,
+                    canonical TEXT NOT NULL,
+                    mention_count INTEGER NOT NULL DEFAULT 0,
+                    document_count INTEGER NOT NULL DEFAULT 0,
+                    UNIQUE (norm_key, entity_type)
+                );
+                
+                CREATE TABLE IF NOT EXISTS document_entities (
+                    entity_id INTEGER NOT NULL,
+                    document_id INTEGER NOT NULL,
+                    mentions INTEGER NOT NULL,
+                    PRIMARY KEY (entity_id, document_id)
+                ) WITHOUT ROWID;
+                
+                CREATE INDEX IF NOT EXISTS idx_document_entities_document
+                    ON document_entities(document_id, entity_id);
+                CREATE INDEX IF NOT EXISTS idx_entity_dict_top
+                    ON entity_dict(entity_type, document_count DESC);
+                CREATE INDEX IF NOT EXISTS idx_entity_dict_count
+                    ON entity_dict(document_count DESC);
+                
+                -- Topics replace the JSON-encoded analyses.topics column
+                CREATE TABLE IF NOT EXISTS topics (
+                    id INTEGER PRIMARY KEY,
+                    norm_key TEXT NOT NULL UNIQUE,
+                    label TEXT NOT NULL,
+                    document_count INTEGER NOT NULL DEFAULT 0
+                );
+                
+                CREATE TABLE IF NOT EXISTS document_topics (
+                    topic_id INTEGER NOT NULL,
+                    document_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (topic_id, document_id)
+                ) WITHOUT ROWID;
+                
+                CREATE INDEX IF NOT EXISTS idx_document_topics_document
+                    ON document_topics(document_id, position, topic_id);
+                CREATE INDEX IF NOT EXISTS idx_topics_count ON topics(document_count DESC);
+                
+                -- Bumped on every document write; response caches key on it
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                ) WITHOUT ROWID;
+                INSERT OR IGNORE INTO counters (name, value) VALUES ('documents_generation', 0);
+                -- Random per database file, so cache keys of two databases never collide
+                INSERT OR IGNORE INTO counters (name, value) VALUES ('database_id', abs(random()));
+                
+                -- Counters kept at write time; bucket 'all' holds running totals
+                -- (period ''), 'hour'/'day' hold per-period counts
+                CREATE TABLE IF NOT EXISTS stats_rollups (
+                    bucket TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    dimension TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (bucket, period, dimension, value)
+                ) WITHOUT ROWID;
+                
+                -- Latest metrics snapshot from each worker process, read by /metrics
+                CREATE TABLE IF NOT EXISTS metrics_snapshots (
+                    process TEXT PRIMARY KEY,
+                    updated_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                );
+                
+                -- Full-text index over content and summary; rowid = documents.id
+                CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                    content, summary,
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3'
+                );
             """)
+            
+            if not has_fts:
+                # Summary matches count half as much as content matches
+                conn.execute(
+                    "INSERT INTO documents_fts (documents_fts, rank) VALUES ('rank', 'bm25(1.0, 0.5)')"
+                )
+                # Index documents stored before the FTS table existed
+                conn.execute("""
+                    INSERT INTO documents_fts (rowid, content, summary)
+                    SELECT d.id, d.content, COALESCE(a.summary, '')
+                    FROM documents d
+                    LEFT JOIN analyses a ON d.id = a.document_id
+                """)
+            
+            if not has_stats:
+                self._backfill_stats(conn)
+            if not has_entity_dict:
+                self._backfill_entity_dict(conn)
+            if not has_topics:
+                self._backfill_topics(conn)
+    
+    def _backfill_topics(self, conn: sqlite3.Connection):
+        """One-time migration of JSON-encoded analyses.topics into the topic index."""
+        rows = conn.execute(
+            "SELECT document_id, topics FROM analyses WHERE topics IS NOT NULL AND topics != ''"
+        )
+        for row in rows.fetchall():
+            try:
+                topics = json.loads(row["topics"])
+            except ValueError:
+                continue
+            if isinstance(topics, list):
+                self._link_topics(conn, row["document_id"], topics)
+    
+    def _link_topics(self, conn: sqlite3.Connection, document_id: int, topics: List[str]):
+        """Upsert a document's topics into the topic table and link them in order."""
+        links, seen = [], set()
+        for topic in topics:
+            key = normalize_topic(str(topic))
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            topic_id = conn.execute(
+                """INSERT INTO topics (norm_key, label, document_count) VALUES (?, ?, 1)
+                   ON CONFLICT (norm_key) DO UPDATE SET document_count = document_count + 1
+                   RETURNING id""",
+                (key, str(topic).strip())
+            ).fetchone()[0]
+            links.append((topic_id, document_id, len(links)))
+        
+        conn.executemany(
+            "INSERT OR IGNORE INTO document_topics (topic_id, document_id, position) VALUES (?, ?, ?)",
+            links
+        )
+    
+    def _backfill_entity_dict(self, conn: sqlite3.Connection):
+        """Build the entity dictionary and links from raw entity rows."""
+        rows = conn.execute(
+            "SELECT document_id, entity_text, entity_type FROM entities ORDER BY document_id"
+        )
+        current, mentions = None, []
+        for row in rows:
+            if row["document_id"] != current:
+                if mentions:
+                    self._link_entities(conn, current, mentions)
+                current, mentions = row["document_id"], []
+            mentions.append({"text": row["entity_text"], "type": row["entity_type"]})
+        if mentions:
+            self._link_entities(conn, current, mentions)
+    
+    def _link_entities(self, conn: sqlite3.Connection, document_id: int,
+                       entities: List[Dict[str, str]]):
+        """Upsert a document's entities into the dictionary and link them."""
+        grouped: Dict[tuple, List] = {}
+        for entity in entities:
+            key = (normalize_entity(entity["text"], entity["type"]), entity["type"])
+            if key[0]:
+                grouped.setdefault(key, [entity["text"].strip(), 0])[1] += 1
+        
+        links = []
+        for (norm_key, entity_type), (canonical, mentions) in grouped.items():
+            entity_id = conn.execute(
+                """INSERT INTO entity_dict
+                   (norm_key, entity_type, canonical, mention_count, document_count)
+                   VALUES (?, ?, ?, ?, 1)
+                   ON CONFLICT (norm_key, entity_type) DO UPDATE SET
+                       mention_count = mention_count + excluded.mention_count,
+                       document_count = document_count + 1
+                   RETURNING id""",
+                (norm_key, entity_type, canonical, mentions)
+            ).fetchone()[0]
+            links.append((entity_id, document_id, mentions))
+        
+        conn.executemany(
+            """INSERT INTO document_entities (entity_id, document_id, mentions) VALUES (?, ?, ?)
+               ON CONFLICT (entity_id, document_id) DO UPDATE SET
+                   mentions = mentions + excluded.mentions""",
+            links
+        )
+    
+    def _backfill_stats(self, conn: sqlite3.Connection):
+        """Build the stats rollups from documents stored before they existed."""
+        sources = {
+            "documents": ("''", "documents d"),
+            "source": ("COALESCE(d.source, '')", "documents d"),
+            "sentiment": ("COALESCE(a.sentiment, '')",
+                          "analyses a JOIN documents d ON d.id = a.document_id"),
+            "model": ("COALESCE(a.ai_model, '')",
+                      "analyses a JOIN documents d ON d.id = a.document_id"),
+            "entity_type": ("COALESCE(e.entity_type, '')",
+                            "entities e JOIN documents d ON d.id = e.document_id"),
+        }
+        for bucket, period in STATS_BUCKETS.items():
+            period = period.format(ts="d.ingested_at")
+            for dimension, (value, tables) in sources.items():
+                conn.execute(f"""
+                    INSERT INTO stats_rollups (bucket, period, dimension, value, count)
+                    SELECT ?, {period}, ?, {value}, COUNT(*)
+                    FROM {tables}
+                    GROUP BY 2, 4
+                """, (bucket, dimension))
+    
+    def _bump_generation(self, conn: sqlite3.Connection):
+        """Mark that documents changed, so generation-keyed caches miss."""
+        conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'documents_generation'")
+    
+    def get_generation(self) -> int:
+        """Current documents generation (one primary-key lookup)."""
+        with self.read_connection() as conn:
+            return conn.execute(
+                "SELECT value FROM counters WHERE name = 'documents_generation'"
+            ).fetchone()[0]
+    
+    def get_document_version(self, document_id: int) -> Optional[str]:
+        """
+        Version of an analyzed document for cache keys (two index lookups).
+        
+        Changes whenever an analysis or entity row of the document is added,
+        so a cached body keyed on it is never older than the rows. None if
+        the document does not exist or has no analysis yet.
+        """
+        with self.read_connection() as conn:
+            analysis_id, entity_id = conn.execute(
+                """SELECT (SELECT MAX(id) FROM analyses WHERE document_id = ?),
+                          (SELECT MAX(id) FROM entities WHERE document_id = ?)""",
+                (document_id, document_id)
+            ).fetchone()
+        if analysis_id is None:
+            return None
+        return f"{analysis_id}.{entity_id or 0}"
+    
+    def _bump_stats(self, conn: sqlite3.Connection, counts: Counter):
+        """
+        Add (dimension, value) counts to the running totals and current periods.
+        
+        Called inside the writing transaction, so stats never drift from the
+        rows they describe.
+        """
+        if not counts:
+            return
+        now = datetime.now(timezone.utc)
+        periods = {
+            "all": "",
+            "hour": now.strftime("%Y-%m-%d %H:00:00"),
+            "day": now.strftime("%Y-%m-%d"),
+        }
+        conn.executemany(
+            """INSERT INTO stats_rollups (bucket, period, dimension, value, count)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (bucket, period, dimension, value)
+               DO UPDATE SET count = count + excluded.count""",
+            [(bucket, period, dimension, value or "", n)
+             for bucket, period in periods.items()
+             for (dimension, value), n in counts.items()]
+        )
+    
+    def _insert_document(self, conn: sqlite3.Connection, content: str, source: str) -> int:
+        """Insert a document on an open connection and return its ID."""
+        cursor = conn.execute(
+            "INSERT INTO documents (content, source, word_count, char_count) VALUES (?, ?, ?, ?)",
+            (content, source, len(content.split()), len(content))
+        )
+        return cursor.lastrowid
+    
+    def _index_document(self, conn: sqlite3.Connection, document_id: int,
+                        content: str, summary: str):
+        """Add a document to the full-text index on an open connection."""
+        conn.execute(
+            "INSERT INTO documents_fts (rowid, content, summary) VALUES (?, ?, ?)",
+            (document_id, content, summary or "")
+        )
+    
+    def _insert_analysis(self, conn: sqlite3.Connection, document_id: int, sentiment: str,
+                         confidence: float, summary: str, ai_model: str) -> int:
+        """Insert analysis results on an open connection (topics go to _link_topics)."""
+        cursor = conn.execute(
+            """INSERT INTO analyses 
+               (document_id, sentiment, sentiment_confidence, summary, ai_model)
+               VALUES (?, ?, ?, ?, ?)""",
+            (document_id, sentiment, confidence, summary, ai_model)
+        )
+        return cursor.lastrowid
+    
+    def _insert_entities(self, conn: sqlite3.Connection, document_id: int,
+                         entities: List[Dict[str, str]]):
+        """Insert extracted entities on an open connection."""
+        conn.executemany(
+            "INSERT INTO entities (document_id, entity_text, entity_type) VALUES (?, ?, ?)",
+            [(document_id, e['text'], e['type']) for e in entities]
+        )
+    
+    def _write_ingest(self, conn: sqlite3.Connection, content: str, source: str,
+                      analysis: Dict[str, Any], counts: Counter) -> int:
+        """
+        Write a document with its analysis and entities on an open connection.
+        
+        Stats increments are added to `counts`; the caller flushes them with
+        _bump_stats() in the same transaction.
+        """
+        doc_id = self._insert_document(conn, content, source)
+        self._insert_analysis(
+            conn, doc_id,
+            sentiment=analysis["sentiment"],
+            confidence=analysis["sentiment_confidence"],
+            summary=analysis["summary"],
+            ai_model=analysis["model"]
+        )
+        self._link_topics(conn, doc_id, analysis["topics"])
+        if analysis["entities"]:
+            self._insert_entities(conn, doc_id, analysis["entities"])
+            self._link_entities(conn, doc_id, analysis["entities"])
+        self._index_document(conn, doc_id, content, analysis["summary"])
+        
+        counts[("documents", "")] += 1
+        counts[("source", source)] += 1
+        counts[("sentiment", analysis["sentiment"])] += 1
+        counts[("model", analysis["model"])] += 1
+        for entity in analysis["entities"]:
+            counts[("entity_type", entity["type"])] += 1
+        return doc_id
     
     def insert_document(self, content: str, source: str) -> int:
         """Insert a new document and return its ID."""
-        word_count = len(content.split())
-        char_count = len(content)
-        
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                "INSERT INTO documents (content, source, word_count, char_count) VALUES (?, ?, ?, ?)",
-                (content, source, word_count, char_count)
-            )
-            return cursor.lastrowid
+            doc_id = self._insert_document(conn, content, source)
+            self._index_document(conn, doc_id, content, "")
+            self._bump_stats(conn, Counter({("documents", ""): 1, ("source", source): 1}))
+            self._bump_generation(conn)
+            return doc_id
     
     def insert_analysis(self, document_id: int, sentiment: str, confidence: float,
-                       summary: str, topics: str, ai_model: str) -> int:
-        """Insert analysis results."""
+                       summary: str, topics, ai_model: str) -> int:
+        """Insert analysis results (topics as a list or its JSON encoding)."""
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                """INSERT INTO analyses 
-                   (document_id, sentiment, sentiment_confidence, summary, topics, ai_model)
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (document_id, sentiment, confidence, summary, topics, ai_model)
+            conn.execute(
+                "UPDATE documents_fts SET summary = ? WHERE rowid = ?",
+                (summary or "", document_id)
             )
-            return cursor.lastrowid
+            self._bump_stats(conn, Counter({("sentiment", sentiment): 1, ("model", ai_model): 1}))
+            self._bump_generation(conn)
+            self._link_topics(conn, document_id,
+                              json.loads(topics) if isinstance(topics, str) else topics)
+            return self._insert_analysis(conn, document_id, sentiment, confidence,
+                                         summary, ai_model)
     
     def insert_entities(self, document_id: int, entities: List[Dict[str, str]]):
         """Insert extracted entities."""
         with self.get_connection() as conn:
-            conn.executemany(
-                "INSERT INTO entities (document_id, entity_text, entity_type) VALUES (?, ?, ?)",
-                [(document_id, e['text'], e['type']) for e in entities]
-            )
+            self._insert_entities(conn, document_id, entities)
+            self._link_entities(conn, document_id, entities)
+            self._bump_stats(conn, Counter(("entity_type", e["type"]) for e in entities))
+            self._bump_generation(conn)
+    
+    def write_ingest_result(self, content: str, source: str, analysis: Dict[str, Any]) -> int:
+        """
+        Write a document, its analysis and entities in one transaction.
+        
+        Nothing is written if any insert fails, so no orphan documents remain.
+        
+        Returns:
+            New document ID
+        """
+        counts = Counter()
+        with metrics.stage("db_write"), self.get_connection() as conn:
+            doc_id = self._write_ingest(conn, content, source, analysis, counts)
+            self._bump_stats(conn, counts)
+            self._bump_generation(conn)
+            return doc_id
+    
+    def write_ingest_results(self, records: List[Dict[str, Any]]) -> List[int]:
+        """
+        Write many analyzed documents in a single transaction (one commit).
+        
+        All or nothing: one bad record rolls back the whole group, so callers
+        that must keep the good records retry them one at a time.
+        
+        Args:
+            records: [{"content": str, "source": str, "analysis": {...}}]
+        
+        Returns:
+            New document IDs, in record order
+        """
+        counts = Counter()
+        with metrics.stage("db_write"), self.get_connection() as conn:
+            doc_ids = [self._write_ingest(conn, r["content"], r["source"], r["analysis"], counts)
+                       for r in records]
+            self._bump_stats(conn, counts)
+            self._bump_generation(conn)
+            return doc_ids
     
     def get_document(self, document_id: int) -> Optional[Dict[str, Any]]:
         """Retrieve document with analysis and entities."""
-        with self.get_connection() as conn:
+        with self.read_connection() as conn:
             doc = conn.execute(
                 "SELECT * FROM documents WHERE id = ?", (document_id,)
             ).fetchone()
@@ -116,64 +683,601 @@ class Database:
                 (document_id,)
             ).fetchall()
             
+            if analysis:
+                analysis = dict(analysis)
+                analysis["topics"] = [row["label"] for row in conn.execute(
+                    """SELECT t.label FROM document_topics dt
+                       JOIN topics t ON t.id = dt.topic_id
+                       WHERE dt.document_id = ?
+                       ORDER BY dt.position""",
+                    (document_id,)
+                )]
+            
             return {
                 "document": dict(doc),
-                "analysis": dict(analysis) if analysis else None,
+                "analysis": analysis,
                 "entities": [dict(e) for e in entities]
             }
     
-    def list_documents(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
-        """List all documents with basic info."""
-        with self.get_connection() as conn:
-            docs = conn.execute(
-                """SELECT d.id, d.source, d.ingested_at, d.word_count,
-                          a.sentiment, a.sentiment_confidence
-                   FROM documents d
-                   LEFT JOIN analyses a ON d.id = a.document_id
-                   ORDER BY d.ingested_at DESC
-                   LIMIT ? OFFSET ?""",
-                (limit, offset)
-            ).fetchall()
-            return [dict(doc) for doc in docs]
+    def get_document_json(self, document_id: int) -> Optional[Tuple[str, bool]]:
+        """
+        Like get_document(), but SQLite assembles the JSON object.
+        
+        Returns:
+            ({"document", "analysis", "entities"} as JSON text, whether the
+            document has been analyzed), or None if not found
+        """
+        with self.read_connection() as conn:
+            row = conn.execute("""
+                SELECT json_object(
+                    'document', json_object(
+                        'id', d.id, 'content', d.content, 'source', d.source,
+                        'ingested_at', d.ingested_at, 'word_count', d.word_count,
+                        'char_count', d.char_count
+                    ),
+                    -- json() keeps subquery results as JSON instead of strings
+                    'analysis', json((
+                        SELECT json_object(
+                            'id', a.id, 'document_id', a.document_id,
+                            'sentiment', a.sentiment,
+                            'sentiment_confidence', a.sentiment_confidence,
+                            'summary', a.summary,
+                            'topics', json((
+                                SELECT json_group_array(label) FROM (
+                                    SELECT t.label FROM document_topics dt
+                                    JOIN topics t ON t.id = dt.topic_id
+                                    WHERE dt.document_id = d.id
+                                    ORDER BY dt.position
+                                )
+                            )),
+                            'analyzed_at', a.analyzed_at, 'ai_model', a.ai_model
+                        )
+                        FROM analyses a WHERE a.document_id = d.id
+                    )),
+                    'entities', json((
+                        SELECT json_group_array(json_object(
+                            'entity_text', e.entity_text, 'entity_type', e.entity_type
+                        ))
+                        FROM entities e WHERE e.document_id = d.id
+                    ))
+                ),
+                EXISTS (SELECT 1 FROM analyses a WHERE a.document_id = d.id)
+                FROM documents d WHERE d.id = ?
+            """, (document_id,)).fetchone()
+            return (row[0], bool(row[1])) if row else None
     
-    def search_documents(self, sentiment: Optional[str] = None,
-                        entity_type: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Search documents by filters."""
+    def list_documents(self, limit: int = 50, offset: int = 0,
+                       cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List documents newest first, one page at a time.
+        
+        Pages are keyed on (ingested_at, id): pass the returned cursor to get
+        the next page, which costs the same however deep it is. `offset` is
+        kept for old clients and ignored when a cursor is given.
+        
+        Returns:
+            (documents, next_cursor); next_cursor is None on the last page
+        """
+        items, _, next_cursor = self._list_page(limit, offset, cursor, as_json=False)
+        return items, next_cursor
+    
+    def list_documents_json(self, limit: int = 50, offset: int = 0,
+                            cursor: Optional[str] = None) -> Tuple[str, int, Optional[str]]:
+        """
+        Like list_documents(), but SQLite encodes the page.
+        
+        Returns:
+            (JSON array text, item count, next_cursor)
+        """
+        return self._list_page(limit, offset, cursor, as_json=True)
+    
+    def _list_page(self, limit: int, offset: int, cursor: Optional[str], as_json: bool):
+        """Build and run the list_documents() page query."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
         query = """
-            SELECT DISTINCT d.id, d.source, d.ingested_at, a.sentiment
+            SELECT d.id, d.source, d.ingested_at, d.word_count,
+                   a.sentiment, a.sentiment_confidence
             FROM documents d
             LEFT JOIN analyses a ON d.id = a.document_id
-            LEFT JOIN entities e ON d.id = e.document_id
-            WHERE 1=1
         """
-        params = []
+        params: List[Any] = []
+        
+        if cursor:
+            query += " WHERE (d.ingested_at, d.id) < (?, ?)"
+            params.extend(decode_cursor(cursor, "documents"))
+            offset = 0
+        
+        query += " ORDER BY d.ingested_at DESC, d.id DESC LIMIT ? OFFSET ?"
+        params.extend([limit + 1, offset])
+        
+        with self.read_connection() as conn:
+            return self._fetch_page(conn, query, params, limit, "documents",
+                                    LIST_COLUMNS, as_json)
+    
+    def search_documents(self, sentiment: Optional[str] = None,
+                        entity_type: Optional[str] = None, q: Optional[str] = None,
+                        limit: int = 50, cursor: Optional[str] = None,
+                        entity: Optional[str] = None, topic: Optional[str] = None
+                        ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Search documents by filters and, optionally, full text.
+        
+        Without `q`, matches are listed newest first using the same keyset
+        cursor as list_documents(). With `q`, results come from the FTS index
+        ordered by BM25 relevance and carry a highlighted snippet.
+        
+        Text-search paging is best-effort: the cursor is keyed on (rank, id),
+        and BM25 ranks shift when documents are written between pages, so a
+        result can be repeated or skipped across pages. Filter-only paging
+        is exact.
+        
+        Args:
+            sentiment: Only documents with this sentiment
+            entity_type: Only documents mentioning an entity of this type; with
+                         `entity`, restricts which type the entity must have
+            q: Full-text query (see fts_query)
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            cursor: next_cursor from the previous page
+            entity: Only documents mentioning this entity (any spelling that
+                    normalizes to the same dictionary key)
+            topic: Only documents tagged with this topic (normalized match)
+        
+        Returns:
+            (results, next_cursor); next_cursor is None on the last page
+        """
+        items, _, next_cursor = self._search_page(sentiment, entity_type, q, limit, cursor,
+                                                  entity, topic, as_json=False)
+        return items, next_cursor
+    
+    def search_documents_json(self, sentiment: Optional[str] = None,
+                              entity_type: Optional[str] = None, q: Optional[str] = None,
+                              limit: int = 50, cursor: Optional[str] = None,
+                              entity: Optional[str] = None, topic: Optional[str] = None
+                              ) -> Tuple[str, int, Optional[str]]:
+        """
+        Like search_documents(), but SQLite encodes the page.
+        
+        Returns:
+            (JSON array text, item count, next_cursor)
+        """
+        return self._search_page(sentiment, entity_type, q, limit, cursor,
+                                 entity, topic, as_json=True)
+    
+    def _search_page(self, sentiment, entity_type, q, limit, cursor, entity, topic,
+                     as_json: bool):
+        """Build and run the search_documents() page query."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        with self.read_connection() as conn:
+            filters, params = self._search_filters(conn, sentiment, entity_type, entity, topic)
+            if filters is None:
+                return ("[]" if as_json else []), 0, None
+            if q is not None:
+                return self._search_text(conn, q, filters, params, limit, cursor, as_json)
+            
+            query = """
+                SELECT d.id, d.source, d.ingested_at, a.sentiment
+                FROM documents d
+                LEFT JOIN analyses a ON d.id = a.document_id
+                WHERE 1=1
+            """
+            if cursor:
+                query += " AND (d.ingested_at, d.id) < (?, ?)"
+                params = [*decode_cursor(cursor, "search"), *params]
+            
+            # Walk the keyset index newest first and stop after one page
+            query += filters + " ORDER BY d.ingested_at DESC, d.id DESC LIMIT ?"
+            return self._fetch_page(conn, query, [*params, limit + 1], limit, "search",
+                                    SEARCH_COLUMNS, as_json)
+    
+    def _fetch_page(self, conn: sqlite3.Connection, query: str, params: List[Any],
+                    limit: int, kind: str, columns: Tuple[str, ...], as_json: bool,
+                    key_columns: Tuple[str, str] = ("ingested_at", "id")):
+        """
+        Run a page query that fetches limit + 1 rows.
+        
+        With as_json, SQLite assembles the page with json_object() and
+        json_group_array() and only the finished text crosses into Python;
+        otherwise rows become dicts of `columns`.
+        
+        Returns:
+            (items, count, next_cursor)
+        """
+        if not as_json:
+            rows = conn.execute(query, params).fetchall()
+            items = [{c: row[c] for c in columns} for row in rows[:limit]]
+            next_cursor = None
+            if len(rows) > limit:
+                next_cursor = encode_cursor(kind, *(rows[limit - 1][c] for c in key_columns))
+            return items, len(items), next_cursor
+        
+        # One pass over the page: number the rows, encode the first `limit`,
+        # and pick the key of the last one; key columns stay SQL values so
+        # float ranks keep full precision in the cursor
+        fields = ", ".join(f"'{c}', {c}" for c in columns)
+        keys = ", ".join(f"max(CASE WHEN _n = ? THEN {c} END)" for c in key_columns)
+        row = conn.execute(f"""
+            SELECT json_group_array(json_object({fields})) FILTER (WHERE _n <= ?),
+                   COUNT(*),
+                   {keys}
+            FROM (SELECT *, row_number() OVER () AS _n FROM ({query}))
+        """, [limit, *[limit] * len(key_columns), *params]).fetchone()
+        
+        items, fetched, *last_key = row
+        next_cursor = encode_cursor(kind, *last_key) if fetched > limit else None
+        return items, min(fetched, limit), next_cursor
+    
+    def _search_filters(self, conn: sqlite3.Connection, sentiment: Optional[str],
+                        entity_type: Optional[str], entity: Optional[str],
+                        topic: Optional[str] = None):
+        """
+        Build the WHERE fragment shared by both search paths.
+        
+        Filters are EXISTS probes against covering indexes, so the planner
+        keeps walking the keyset (or FTS) order and stops after one page. A
+        rare entity or topic instead drives the query from its document links.
+        
+        Returns:
+            (sql, params), or (None, None) if an entity/topic filter matches nothing
+        """
+        sql, params = "", []
         
         if sentiment:
-            query += " AND a.sentiment = ?"
+            sql += """ AND EXISTS (SELECT 1 FROM analyses s
+                                   WHERE s.document_id = d.id AND s.sentiment = ?)"""
             params.append(sentiment)
         
+        if entity:
+            keys = {normalize_entity(entity), normalize_entity(entity, "ORGANIZATION")}
+            lookup = f"SELECT id, document_count FROM entity_dict WHERE norm_key IN ({','.join('?' * len(keys))})"
+            lookup_params = list(keys)
+            if entity_type:
+                lookup += " AND entity_type = ?"
+                lookup_params.append(entity_type)
+            matches = conn.execute(lookup, lookup_params).fetchall()
+            if not matches:
+                return None, None
+            
+            sql += self._link_filter("document_entities", "entity_id", matches, params)
+        elif entity_type:
+            sql += """ AND EXISTS (SELECT 1 FROM entities e
+                                   WHERE e.document_id = d.id AND e.entity_type = ?)"""
+            params.append(entity_type)
+        
+        if topic:
+            matches = conn.execute(
+                "SELECT id, document_count FROM topics WHERE norm_key = ?",
+                (normalize_topic(topic),)
+            ).fetchall()
+            if not matches:
+                return None, None
+            sql += self._link_filter("document_topics", "topic_id", matches, params)
+        
+        return sql, params
+    
+    def _link_filter(self, table: str, column: str, matches: List[sqlite3.Row],
+                     params: List[Any]) -> str:
+        """Filter on a link table, picking the access path from the matches' document counts."""
+        ids = [m["id"] for m in matches]
+        params.extend(ids)
+        marks = ",".join("?" * len(ids))
+        if sum(m["document_count"] for m in matches) <= RARE_LINK_DOCUMENTS:
+            return f""" AND d.id IN (SELECT document_id FROM {table}
+                                     WHERE {column} IN ({marks}))"""
+        return f""" AND EXISTS (SELECT 1 FROM {table} l
+                                WHERE l.document_id = d.id AND l.{column} IN ({marks}))"""
+    
+    def _search_text(self, conn: sqlite3.Connection, q: str, filters: str, params: List[Any],
+                     limit: int, cursor: Optional[str], as_json: bool):
+        """
+        Ranked full-text search combined with the search filters.
+        
+        Pages are keyed on (rank, id). Ranks are recomputed per query, so the
+        cursor is only exact while no documents are written (best-effort).
+        """
+        match = fts_query(q)
+        if match is None:
+            return ("[]" if as_json else []), 0, None
+        
+        query = """
+            SELECT d.id, d.source, d.ingested_at, a.sentiment,
+                   round(-documents_fts.rank, 4) AS score,
+                   snippet(documents_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet,
+                   documents_fts.rank AS rank
+            FROM documents_fts
+            JOIN documents d ON d.id = documents_fts.rowid
+            LEFT JOIN analyses a ON d.id = a.document_id
+            WHERE documents_fts MATCH ?
+        """
+        params = [match, *params]
+        
+        if cursor:
+            query += " AND (documents_fts.rank, d.id) > (?, ?)"
+            params = [match, *decode_cursor(cursor, "text"), *params[1:]]
+        
+        query += filters + " ORDER BY documents_fts.rank, d.id LIMIT ?"
+        return self._fetch_page(conn, query, [*params, limit + 1], limit, "text",
+                                TEXT_SEARCH_COLUMNS, as_json, key_columns=("rank", "id"))
+    
+    def topic_facets(self, limit: int = 50, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Topics with their document counts, most used first; `prefix` narrows by label start."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        with self.read_connection() as conn:
+            if prefix:
+                # Range scan on the unique norm_key index, then rank the (few) matches
+                key = normalize_topic(prefix)
+                rows = conn.execute(
+                    """SELECT label AS topic, document_count FROM topics
+                       WHERE norm_key >= ? AND norm_key < ?
+                       ORDER BY document_count DESC LIMIT ?""",
+                    (key, key + "\U0010ffff", limit)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    """SELECT label AS topic, document_count FROM topics
+                       ORDER BY document_count DESC LIMIT ?""",
+                    (limit,)
+                ).fetchall()
+            return [dict(r) for r in rows]
+    
+    def top_entities(self, entity_type: Optional[str] = None,
+                     limit: int = 20) -> List[Dict[str, Any]]:
+        """Most widely mentioned entities (by document count), optionally of one type."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = """SELECT canonical AS entity, entity_type, document_count, mention_count
+                   FROM entity_dict"""
+        params: List[Any] = []
         if entity_type:
-            query += " AND e.entity_type = ?"
+            query += " WHERE entity_type = ?"
             params.append(entity_type)
+        query += " ORDER BY document_count DESC LIMIT ?"
+        params.append(limit)
         
-        query += " ORDER BY d.ingested_at DESC"
+        with self.read_connection() as conn:
+            return [dict(r) for r in conn.execute(query, params).fetchall()]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get dashboard statistics from the write-time counters (no table scans)."""
+        with self.read_connection() as conn:
+            rows = conn.execute(
+                "SELECT dimension, value, count FROM stats_rollups WHERE bucket = 'all' AND period = ''"
+            ).fetchall()
+        
+        breakdowns = {dimension: {} for dimension in STATS_DIMENSIONS}
+        total = 0
+        for row in rows:
+            if row["dimension"] == "documents":
+                total = row["count"]
+            else:
+                breakdowns[row["dimension"]][row["value"]] = row["count"]
+        
+        return {
+            "total_documents": total,
+            "sentiment_breakdown": breakdowns["sentiment"],
+            "source_breakdown": breakdowns["source"],
+            "entity_type_breakdown": breakdowns["entity_type"],
+            "model_breakdown": breakdowns["model"]
+        }
+    
+    def get_timeseries(self, bucket: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """
+        Per-period counts from the hourly or daily rollups.
         
+        Args:
+            bucket: "hour" or "day"
+            start: First period to include (UTC, floored to the bucket)
+            end: Last period to include (UTC)
+        
+        Returns:
+            [{"period", "documents", "sentiment": {...}, "source": {...},
+              "entity_type": {...}, "model": {...}}] in period order; periods
+            without documents are omitted
+        """
+        fmt = "%Y-%m-%d %H:00:00" if bucket == "hour" else "%Y-%m-%d"
+        with self.read_connection() as conn:
+            rows = conn.execute(
+                """SELECT period, dimension, value, count FROM stats_rollups
+                   WHERE bucket = ? AND period BETWEEN ? AND ?
+                   ORDER BY period""",
+                (bucket, start.strftime(fmt), end.strftime(fmt))
+            ).fetchall()
+        
+        series: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            point = series.get(row["period"])
+            if point is None:
+                point = {"period": row["period"], "documents": 0,
+                         **{dimension: {} for dimension in STATS_DIMENSIONS}}
+                series[row["period"]] = point
+            if row["dimension"] == "documents":
+                point["documents"] = row["count"]
+            else:
+                point[row["dimension"]][row["value"]] = row["count"]
+        return list(series.values())
+    
+    def ping(self) -> bool:
+        """Cheap liveness check: run a trivial query on a read connection."""
+        with self.read_connection() as conn:
+            return conn.execute("SELECT 1").fetchone()[0] == 1
+    
+    def put_metrics_snapshot(self, process: str, data: str, expire_seconds: int = 60):
+        """
+        Store the latest metrics snapshot (JSON) of a worker process.
+        
+        Rows of other processes not refreshed for expire_seconds are deleted
+        here, so reads never need the writer connection.
+        """
+        now = time.time()
         with self.get_connection() as conn:
-            results = conn.execute(query, params).fetchall()
-            return [dict(r) for r in results]
+            conn.execute(
+                """INSERT INTO metrics_snapshots (process, updated_at, data) VALUES (?, ?, ?)
+                   ON CONFLICT (process) DO UPDATE SET updated_at = excluded.updated_at,
+                                                       data = excluded.data""",
+                (process, now, data)
+            )
+            conn.execute("DELETE FROM metrics_snapshots WHERE updated_at < ?",
+                         (now - expire_seconds,))
     
-    def get_stats(self) -> Dict[str, Any]:
-        """Get dashboard statistics."""
+    def get_metrics_snapshots(self, max_age_seconds: int) -> List[Dict[str, Any]]:
+        """
+        Return worker metrics snapshots refreshed within max_age_seconds.
+        
+        A worker that exits or crashes stops refreshing its row, so its
+        counters disappear from /metrics once the row is that old.
+        """
+        with self.read_connection() as conn:
+            rows = conn.execute("SELECT data FROM metrics_snapshots WHERE updated_at >= ?",
+                                (time.time() - max_age_seconds,)).fetchall()
+        return [json.loads(r['data']) for r in rows]
+    
+    def get_job_counts(self) -> List[Dict[str, Any]]:
+        """Queued and running jobs grouped by media type and status."""
+        with self.read_connection() as conn:
+            rows = conn.execute(
+                """SELECT media_type, status, COUNT(*) AS count FROM jobs
+                   WHERE status IN ('queued', 'running')
+                   GROUP BY media_type, status"""
+            ).fetchall()
+            return [dict(r) for r in rows]
+    
+    def get_cached_analysis(self, cache_key: str, max_age_seconds: int) -> Optional[str]:
+        """Return the cached analysis JSON for a key if younger than max_age_seconds."""
+        with self.read_connection() as conn:
+            row = conn.execute(
+                """SELECT result FROM analysis_cache
+                   WHERE cache_key = ? AND created_at >= datetime('now', ?)""",
+                (cache_key, f"-{int(max_age_seconds)} seconds")
+            ).fetchone()
+            return row['result'] if row else None
+    
+    def put_cached_analysis(self, cache_key: str, text_hash: str, provider: str,
+                            model: str, prompt_version: str, result: str):
+        """Store (or refresh) a cached analysis result."""
         with self.get_connection() as conn:
-            total = conn.execute("SELECT COUNT(*) as count FROM documents").fetchone()['count']
-            
-            sentiment_breakdown = conn.execute("""
-                SELECT sentiment, COUNT(*) as count
-                FROM analyses
-                GROUP BY sentiment
-            """).fetchall()
-            
-            return {
-                "total_documents": total,
-                "sentiment_breakdown": {row['sentiment']: row['count'] for row in sentiment_breakdown}
-            }
+            conn.execute(
+                """INSERT OR REPLACE INTO analysis_cache
+                   (cache_key, text_hash, provider, model, prompt_version, result)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (cache_key, text_hash, provider, model, prompt_version, result)
+            )
+    
+    def evict_cached_analyses(self, max_age_seconds: int, max_entries: int) -> int:
+        """Drop expired cache entries and trim the cache to max_entries, oldest first."""
+        with self.get_connection() as conn:
+            removed = conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < datetime('now', ?)",
+                (f"-{int(max_age_seconds)} seconds",)
+            ).rowcount
+            removed += conn.execute(
+                """DELETE FROM analysis_cache WHERE cache_key IN (
+                       SELECT cache_key FROM analysis_cache
+                       ORDER BY created_at DESC
+                       LIMIT -1 OFFSET ?
+                   )""",
+                (max_entries,)
+            ).rowcount
+            return removed
+    
+    def enqueue_job(self, media_type: str, payload: Dict[str, Any], source: str,
+                    max_attempts: int = 3) -> int:
+        """Queue an ingestion job and return its ID."""
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (media_type, source, payload, max_attempts) VALUES (?, ?, ?, ?)",
+                (media_type, source, json.dumps(payload), max_attempts)
+            )
+            return cursor.lastrowid
+    
+    def claim_job(self, media_type: str, worker: str, lease_seconds: int) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest runnable job of a media type, or None."""
+        with self.get_connection() as conn:
+            row = conn.execute(
+                """UPDATE jobs
+                   SET status = 'running', attempts = attempts + 1, worker = ?,
+                       lease_expires_at = datetime('now', ?), updated_at = CURRENT_TIMESTAMP
+                   WHERE id = (
+                       SELECT id FROM jobs
+                       WHERE media_type = ? AND status = 'queued' AND run_after <= CURRENT_TIMESTAMP
+                       ORDER BY id LIMIT 1
+                   )
+                   RETURNING id, media_type, source, payload, attempts, max_attempts""",
+                (worker, f"+{int(lease_seconds)} seconds", media_type)
+            ).fetchone()
+            if not row:
+                return None
+            job = dict(row)
+            job["payload"] = json.loads(job["payload"])
+            return job
+    
+    def heartbeat_job(self, job_id: int, lease_seconds: int):
+        """Extend the lease of a running job."""
+        with self.get_connection() as conn:
+            conn.execute(
+                """UPDATE jobs SET lease_expires_at = datetime('now', ?)
+                   WHERE id = ? AND status = 'running'""",
+                (f"+{int(lease_seconds)} seconds", job_id)
+            )
+    
+    def complete_job(self, job_id: int, result: Dict[str, Any], succeeded: bool = True):
+        """Record a finished job (succeeded, or failed without retry)."""
+        with self.get_connection() as conn:
+            conn.execute(
+                """UPDATE jobs
+                   SET status = ?, result = ?, document_id = ?, error = ?,
+                       lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ?""",
+                ("succeeded" if succeeded else "failed", json.dumps(result),
+                 result.get("document_id"), None if succeeded else result.get("message"), job_id)
+            )
+    
+    def fail_job(self, job_id: int, error: str, retry_delay_seconds: int) -> str:
+        """
+        Record a failed attempt; requeue it with a delay while attempts remain.
+        
+        Returns:
+            New job status ("queued" or "failed")
+        """
+        with self.get_connection() as conn:
+            row = conn.execute(
+                """UPDATE jobs
+                   SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                       error = ?, run_after = datetime('now', ?),
+                       lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ?
+                   RETURNING status""",
+                (error, f"+{int(retry_delay_seconds)} seconds", job_id)
+            ).fetchone()
+            return row['status'] if row else "failed"
+    
+    def requeue_stale_jobs(self) -> List[Dict[str, Any]]:
+        """
+        Requeue running jobs whose worker stopped renewing the lease.
+        
+        Returns:
+            [{"id", "status", "payload"}] for every job touched
+        """
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                """UPDATE jobs
+                   SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                       error = 'Worker lost while running job',
+                       lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                   WHERE status = 'running' AND lease_expires_at < CURRENT_TIMESTAMP
+                   RETURNING id, status, payload"""
+            ).fetchall()
+            return [{"id": r['id'], "status": r['status'], "payload": json.loads(r['payload'])}
+                    for r in rows]
+    
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Retrieve job status and result."""
+        with self.read_connection() as conn:
+            row = conn.execute(
+                """SELECT id, media_type, source, status, attempts, max_attempts,
+                          document_id, result, error, created_at, updated_at
+                   FROM jobs WHERE id = ?""",
+                (job_id,)
+            ).fetchone()
+            if not row:
+                return None
+            job = dict(row)
+            job["result"] = json.loads(job["result"]) if job["result"] else None
+            return job
@@ -0,0 +1,111 @@
+"""Deterministic offline AI provider for benchmarks and development."""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Dict, Any
+from .ai_analyzer import ANALYSIS_MARKER
+from .batching_analyzer import BATCH_MARKER
+from .local_analyzer import LocalAnalyzer
+from .long_document import SUMMARIES_MARKER, estimate_tokens
+
+_local = LocalAnalyzer()
+
+
+class FakeProviderError(RuntimeError):
+    """Simulated provider overload (HTTP 503)."""
+    
+    status_code = 503
+
+
+class FakeProvider:
+    """
+    Stand-in for a real provider client that needs no network or API key.
+    
+    Responses are derived from the prompt text only, so the same corpus always
+    produces the same analyses. Latency is latency_ms plus up to +/- jitter_ms,
+    also seeded from the prompt, so benchmark runs are reproducible, plus
+    ms_per_1k_tokens for every thousand prompt tokens (prefill time). A
+    fraction of calls (error_rate) can fail with a 503 after their latency
+    to simulate a brownout.
+    """
+    
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0,
+                 error_rate: float = 0.0, ms_per_1k_tokens: float = 0.0):
+        """
+        Initialize fake provider.
+        
+        Args:
+            latency_ms: Mean simulated call latency in milliseconds
+            jitter_ms: Maximum deviation from latency_ms in milliseconds
+            seed: Changes the latency sequence without changing responses
+            error_rate: Fraction of calls that fail with FakeProviderError
+            ms_per_1k_tokens: Extra latency per thousand prompt tokens
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.seed = seed
+        self.error_rate = error_rate
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.calls = 0
+        self._errors = random.Random(seed)
+    
+    def _maybe_fail(self):
+        if self.error_rate > 0 and self._errors.random() < self.error_rate:
+            raise FakeProviderError("Simulated provider overload")
+    
+    def _delay(self, prompt: str) -> float:
+        """Simulated latency in seconds for a prompt."""
+        prefill = self.ms_per_1k_tokens * estimate_tokens(prompt) / 1000
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return prefill / 1000
+        digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).hexdigest()
+        rng = random.Random(f"{self.seed}:{digest}")
+        return (max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) + prefill) / 1000
+    
+    def complete(self, prompt: str) -> str:
+        """Blocking call, like the real provider clients."""
+        self.calls += 1
+        delay = self._delay(prompt)
+        if delay:
+            time.sleep(delay)
+        self._maybe_fail()
+        return respond(prompt)
+    
+    async def acomplete(self, prompt: str) -> str:
+        """Non-blocking call for the async pipeline."""
+        self.calls += 1
+        delay = self._delay(prompt)
+        if delay:
+            await asyncio.sleep(delay)
+        self._maybe_fail()
+        return respond(prompt)
+
+
+def respond(prompt: str) -> str:
+    """Answer an analysis prompt with JSON, or a reduce prompt with a summary."""
+    if BATCH_MARKER in prompt:
+        items = [json.loads(line) for line in prompt.split(BATCH_MARKER, 1)[1].splitlines() if line]
+        return json.dumps([{"id": item["id"], **analyze_text(item["text"])} for item in items])
+    if ANALYSIS_MARKER in prompt:
+        return json.dumps(analyze_text(prompt.split(ANALYSIS_MARKER, 1)[1]))
+    if SUMMARIES_MARKER in prompt:
+        parts = [re.sub(r"^\d+\.\s*", "", line) for line in
+                 prompt.split(SUMMARIES_MARKER, 1)[1].splitlines() if line.strip()]
+        return " ".join(parts[:2])
+    return ""
+
+
+def analyze_text(text: str) -> Dict[str, Any]:
+    """LocalAnalyzer heuristics with the same shape as a real provider response."""
+    result = _local.analyze(text)
+    return {
+        "sentiment": result["sentiment"],
+        "sentiment_confidence": result["sentiment_confidence"],
+        "entities": result["entities"],
+        "topics": result["topics"] or ["general"],
+        "summary": result["summary"]
+    }
@@ -0,0 +1,383 @@
+"""Local (tier-0) analysis: lexicon sentiment, gazetteer entities, keyword topics."""
+
+import math
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+MODEL = "local-lexicon-1"
+
+# Sentiment lexicon: word -> valence (-3..3)
+LEXICON = {
+    # Positive
+    "good": 2, "great": 3, "excellent": 3, "outstanding": 3, "amazing": 3, "wonderful": 3,
+    "fantastic": 3, "best": 3, "better": 2, "love": 3, "loved": 3, "like": 1, "liked": 1,
+    "happy": 2, "pleased": 2, "glad": 2, "delighted": 3, "satisfied": 2, "enjoy": 2,
+    "enjoyed": 2, "success": 2, "successful": 2, "win": 2, "won": 2, "winning": 2,
+    "record": 1, "record-breaking": 2, "growth": 1, "gain": 1, "gains": 1, "profit": 1,
+    "profitable": 2, "strong": 1, "stronger": 1, "improve": 1, "improved": 2,
+    "improvement": 2, "innovative": 2, "innovation": 2, "breakthrough": 3,
+    "groundbreaking": 3, "revolutionize": 2, "exceeded": 2, "exceeds": 2, "praise": 2,
+    "praised": 2, "praising": 2, "positive": 2, "positively": 2, "benefit": 1, "benefits": 1,
+    "recommend": 2, "recommended": 2, "thank": 1, "thanks": 1, "grateful": 2,
+    "perfect": 3, "impressive": 3, "reliable": 2, "secure": 1, "safe": 1, "easy": 1,
+    "fast": 1, "efficient": 2, "celebrate": 2, "celebrated": 2, "optimistic": 2,
+    "promising": 2, "boost": 2, "boosted": 2, "surge": 1, "soared": 2, "high": 1,
+    "dedication": 1, "sustainable": 1, "accelerate": 1, "welcome": 1, "welcomed": 2,
+    "resolved": 1, "recovered": 1, "recovery": 1, "approved": 1, "awarded": 2,
+    # Negative
+    "bad": -2, "poor": -2, "terrible": -3, "awful": -3, "horrible": -3, "worst": -3,
+    "worse": -2, "hate": -3, "hated": -3, "dislike": -2, "sad": -2, "angry": -3,
+    "upset": -2, "frustrated": -2, "frustrating": -2, "disappointed": -2,
+    "disappointing": -2, "concern": -1, "concerns": -1, "concerned": -1, "worried": -2,
+    "worry": -2, "fear": -2, "fears": -2, "risk": -1, "risks": -1, "threat": -2,
+    "breach": -2, "breached": -2, "hack": -2, "hacked": -2, "attack": -2, "attacks": -2,
+    "vulnerable": -2, "vulnerability": -2, "compromised": -2, "theft": -2, "fraud": -3,
+    "scam": -3, "stolen": -2, "leak": -2, "leaked": -2, "incident": -1, "incidents": -1,
+    "crisis": -3, "failure": -2, "failed": -2, "fail": -2, "fails": -2, "loss": -2,
+    "losses": -2, "lost": -1, "decline": -1, "declined": -1, "drop": -1, "dropped": -1,
+    "fell": -1, "plunge": -2, "plunged": -2, "crash": -3, "crashed": -3, "broken": -2,
+    "bug": -1, "bugs": -1, "buggy": -2, "error": -1, "errors": -1, "problem": -2, "problems": -2,
+    "issue": -1, "issues": -1, "delay": -1, "delayed": -1, "slow": -1, "expensive": -1,
+    "complaint": -2, "complaints": -2, "lawsuit": -2, "penalty": -2, "fine": -1,
+    "investigation": -1, "apology": -1, "damage": -2, "damaged": -2, "injured": -2,
+    "killed": -3, "death": -3, "dead": -3, "severe": -2, "dangerous": -2, "warning": -1,
+    "warnings": -1, "unfortunately": -2, "negative": -2, "negatively": -2, "refund": -1,
+    "cancelled": -1, "canceled": -1, "layoffs": -2, "recession": -2, "shortage": -2,
+}
+
+NEGATORS = {"not", "no", "never", "none", "nobody", "nothing", "neither", "nor",
+            "without", "hardly", "barely", "cannot", "cant", "dont", "doesnt", "didnt",
+            "isnt", "wasnt", "arent", "werent", "wont", "wouldnt", "shouldnt", "couldnt"}
+NEGATION_WINDOW = 3  # A negator flips the next few sentiment words
+BOOSTERS = {"very": 1.5, "extremely": 1.8, "really": 1.4, "highly": 1.5, "incredibly": 1.8,
+            "so": 1.3, "most": 1.3, "totally": 1.5, "absolutely": 1.8,
+            "slightly": 0.5, "somewhat": 0.6, "barely": 0.5, "partly": 0.6}
+CONTRAST = {"but", "however", "although", "though", "yet"}
+
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "but", "if", "of", "to", "in", "on", "at", "for", "from",
+    "by", "with", "as", "is", "are", "was", "were", "be", "been", "being", "has", "have",
+    "had", "this", "that", "these", "those", "it", "its", "their", "they", "them", "he",
+    "she", "his", "her", "we", "our", "you", "your", "i", "me", "my", "will", "would",
+    "could", "should", "can", "may", "might", "into", "over", "about", "after", "before",
+    "than", "then", "also", "just", "more", "most", "some", "such", "which", "who", "whom",
+    "what", "when", "where", "while", "other", "others", "including", "today", "yesterday",
+    "said", "says", "new", "one", "two", "three", "there", "here", "not", "no", "all",
+    "any", "each", "per", "out", "up", "down", "very", "so", "only", "same", "next",
+    "last", "recent", "reference", "month", "week", "year", "day", "days", "time",
+}
+
+# Topic -> keywords; a text gets the topics whose keywords it mentions most
+TOPIC_KEYWORDS = {
+    "finance": {"earnings", "revenue", "profit", "stock", "stocks", "shares", "investors",
+                "market", "markets", "quarterly", "quarter", "dividend", "bank", "banking",
+                "economy", "economic", "inflation", "prices", "funding", "ipo"},
+    "technology": {"technology", "tech", "software", "hardware", "iphone", "smartphone",
+                   "app", "apps", "ai", "cloud", "data", "chip", "chips", "computer",
+                   "internet", "digital", "electronics", "platform", "devices"},
+    "cybersecurity": {"breach", "hack", "hacked", "cybersecurity", "security", "malware",
+                      "ransomware", "phishing", "password", "vulnerability", "compromised",
+                      "identity", "theft", "encryption"},
+    "weather": {"weather", "forecast", "rain", "snow", "storm", "temperature",
+                "temperatures", "hurricane", "cloudy", "sunny", "wind", "meteorologists",
+                "degrees", "umbrella", "flood", "heatwave"},
+    "energy": {"energy", "renewable", "solar", "battery", "batteries", "grid", "power",
+               "electricity", "oil", "gas", "emissions", "sustainable", "storage"},
+    "automotive": {"car", "cars", "vehicle", "vehicles", "automotive", "electric", "ev",
+                   "driving", "automaker", "automakers"},
+    "science": {"research", "researchers", "study", "scientists", "findings", "university",
+                "laboratory", "experiment", "published", "journal", "discovery"},
+    "health": {"health", "hospital", "patients", "doctor", "medical", "disease", "vaccine",
+               "treatment", "drug", "covid", "virus", "healthcare"},
+    "politics": {"government", "election", "policy", "senator", "congress", "parliament",
+                 "minister", "president", "vote", "law", "regulatory", "regulation",
+                 "regulations", "council"},
+    "urban planning": {"zoning", "development", "housing", "traffic", "neighborhood",
+                       "residents", "infrastructure", "planners", "construction"},
+    "business": {"company", "companies", "ceo", "customers", "merger", "acquisition",
+                 "launch", "launched", "products", "services", "startup", "industry"},
+    "sports": {"game", "match", "team", "season", "league", "championship", "coach",
+               "players", "tournament", "score"},
+}
+
+ORG_SUFFIXES = {"Inc", "Inc.", "Corp", "Corp.", "Corporation", "Ltd", "Ltd.", "LLC", "Group",
+                "Bank", "University", "Institute", "Industries", "Company", "Co.", "Agency",
+                "Ministry", "Council", "Association", "Foundation", "Service", "Department",
+                "Committee", "Commission", "Labs", "Systems", "Technologies", "Motors",
+                "Airlines", "Holdings", "Partners", "Conference", "College", "School"}
+ORGANIZATIONS = {"Apple", "Google", "Alphabet", "Microsoft", "Amazon", "Meta", "Facebook",
+                 "Netflix", "Tesla", "Toyota", "Ford", "Honda", "Nissan", "Kia", "Hyundai",
+                 "BYD", "Volkswagen", "Rivian", "Samsung", "Intel", "Nvidia", "IBM", "Oracle",
+                 "OpenAI", "Anthropic", "NASA", "MIT", "FBI", "CIA", "WHO", "UN", "EU",
+                 "NATO", "FDA", "SEC", "MegaCorp", "DataVault", "CloudNine", "Contoso"}
+LOCATIONS = {"Washington", "Washington D.C.", "New York", "New York City", "London", "Paris",
+             "Berlin", "Tokyo", "Beijing", "Shanghai", "Mumbai", "Delhi", "Sydney",
+             "Toronto", "Chicago", "Boston", "Seattle", "Austin", "Texas", "California",
+             "Florida", "Cupertino", "Seoul", "Ottawa", "Canberra", "Brussels", "Moscow",
+             "Dubai", "Singapore", "Hong Kong", "Los Angeles", "San Francisco",
+             "Silicon Valley", "Germany", "France", "Japan", "China", "India", "Korea",
+             "Canada", "Australia", "Brazil", "Mexico", "Russia", "Italy", "Spain", "Europe",
+             "Asia", "Africa", "America", "United States", "United Kingdom", "UK", "USA", "U.S.", "U.K.",
+             "Pakistan", "Bangladesh", "Hyderabad", "Bangalore", "Chennai", "Kolkata"}
+LOCATION_SUFFIXES = {"City", "County", "State", "Park", "River", "Lake", "Mountain",
+                     "Mountains", "Island", "Islands", "Valley", "Bay", "Street", "Avenue",
+                     "Square", "Province", "Region", "Garden", "Airport", "Bridge"}
+PERSON_TITLES = {"Mr", "Mr.", "Mrs", "Mrs.", "Ms", "Ms.", "Dr", "Dr.", "Prof", "Prof.",
+                 "Professor", "President", "Senator", "Governor", "Mayor", "CEO", "Minister",
+                 "Judge", "Sir"}
+NON_NAMES = {"The", "A", "An", "This", "That", "These", "Those", "It", "Its", "Our", "Their",
+             "His", "Her", "We", "They", "He", "She", "I", "In", "On", "At", "For", "From",
+             "By", "With", "After", "Before", "While", "When", "Some", "Local", "Major",
+             "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday",
+             "January", "February", "March", "April", "May", "June", "July", "August",
+             "September", "October", "November", "December", "Reference", "Residents"}
+
+ABBREVIATIONS = {"Inc.", "Corp.", "Co.", "Ltd.", "Mr.", "Mrs.", "Ms.", "Dr.", "Prof.", "St.",
+                 "Jr.", "Sr.", "Mt.", "Ave."}
+
+_WORD_RE = re.compile(r"[a-z][a-z'\-]*")
+_INITIALS_RE = re.compile(r"^(?:[A-Z]\.){2,}$")  # "D.C.", "U.S."
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z\"'])")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def sentences(text: str) -> List[str]:
+    """Split normalized text into sentences."""
+    return [s for s in _SENTENCE_RE.split(_normalize(text)) if s]
+
+
+def score_sentiment(words: List[str]) -> Tuple[float, int, int]:
+    """
+    Lexicon sentiment with negation, boosters and contrast.
+    
+    Returns:
+        (valence sum, positive hits, negative hits)
+    """
+    score = 0.0
+    positive = negative = 0
+    negate_left = 0
+    boost = 1.0
+    for index, word in enumerate(words):
+        if word in CONTRAST:
+            # "X but Y": what follows the contrast outweighs what preceded it
+            score *= 0.5
+            negate_left = 0
+            continue
+        bare = word.replace("'", "")
+        if bare in NEGATORS or word.endswith("n't"):
+            negate_left = NEGATION_WINDOW
+            continue
+        if word in BOOSTERS:
+            boost = BOOSTERS[word]
+            continue
+        valence = LEXICON.get(word)
+        if valence is None and word.endswith("s"):
+            valence = LEXICON.get(word[:-1])
+        if valence is not None:
+            valence *= boost
+            if negate_left:
+                valence *= -0.75  # "not good" is milder than "bad"
+            score += valence
+            if valence > 0:
+                positive += 1
+            else:
+                negative += 1
+        boost = 1.0
+        if negate_left:
+            negate_left -= 1
+    return score, positive, negative
+
+
+def _capitalized_runs(text: str) -> Iterator[Tuple[List[str], bool]]:
+    """
+    Yield runs of capitalized tokens and whether each starts a sentence.
+    
+    A run ends at a lowercase word, after a comma, or after a sentence-ending
+    period (abbreviations such as "Inc." and "D.C." do not end it).
+    """
+    run: List[str] = []
+    run_at_start = True
+    at_start = True
+    for token in text.split():
+        word = token.strip("\"'()[]")
+        if word[:1].isupper():
+            if not run:
+                run_at_start = at_start
+            # "Cupertino-based" -> "Cupertino"
+            run.append(re.sub(r"-[a-z]+$", "", word.rstrip(",;:!?")))
+        elif run:
+            yield run, run_at_start
+            run = []
+        ends_sentence = (token.endswith(("!", "?")) or
+                         (token.endswith(".") and word not in ABBREVIATIONS and not _INITIALS_RE.match(word)))
+        if run and (ends_sentence or token.endswith((",", ";", ":"))):
+            yield run, run_at_start
+            run = []
+        at_start = ends_sentence
+    if run:
+        yield run, run_at_start
+
+
+def extract_entities(text: str, limit: int = 15) -> List[Dict[str, str]]:
+    """Gazetteer and pattern based entity extraction."""
+    found: Dict[str, str] = {}
+    
+    def add(words: List[str], kind: str):
+        name = " ".join(words)
+        if name.endswith(".") and name.split()[-1] not in ABBREVIATIONS and not _INITIALS_RE.match(words[-1]):
+            name = name[:-1]
+        if len(name) > 1 and name.lower() not in {k.lower() for k in found}:
+            found[name] = kind
+    
+    for words, at_start in _capitalized_runs(text):
+        # Leading titles mark a person; other leading function words are dropped
+        person = False
+        while words and (words[0] in PERSON_TITLES or words[0] in NON_NAMES):
+            person = person or words[0] in PERSON_TITLES
+            words = words[1:]
+            at_start = False
+        if not words:
+            continue
+        name = " ".join(words)
+        if name not in LOCATIONS:
+            name = name.rstrip(".")
+        if person:
+            add(words[:3], "PERSON")
+        elif name in ORGANIZATIONS or words[0] in ORGANIZATIONS or words[-1] in ORG_SUFFIXES:
+            add(words, "ORGANIZATION")
+        elif name in LOCATIONS or words[-1] in LOCATION_SUFFIXES:
+            add(words, "LOCATION")
+        elif len(words) in (2, 3) and all(w[1:].islower() for w in words):
+            add(words, "PERSON")
+        elif len(words) > 1 or (not at_start and not words[0].isupper()):
+            # Capitalized mid-sentence but unknown to the gazetteers
+            add(words, "OTHER")
+    return [{"text": name, "type": kind} for name, kind in list(found.items())[:limit]]
+
+
+def extract_topics(words: List[str], limit: int = 5, exclude: Set[str] = frozenset()) -> List[str]:
+    """
+    Topics whose keywords the text mentions most, topped up with its most
+    frequent content words (other than `exclude`, e.g. entity names).
+    """
+    counts = Counter(words)
+    scored = []
+    for topic, keywords in TOPIC_KEYWORDS.items():
+        hits = sum(counts[k] for k in keywords)
+        if hits:
+            scored.append((hits, topic))
+    topics = [topic for hits, topic in sorted(scored, key=lambda s: -s[0]) if hits >= 1][:limit]
+    if len(topics) < 3:
+        frequent = Counter(w for w in words if len(w) >= 6 and w not in STOPWORDS and w not in exclude
+                           and not any(w in k for k in TOPIC_KEYWORDS.values()))
+        topics += [w for w, _ in frequent.most_common(3 - len(topics))]
+    return topics or ["general"]
+
+
+class LocalAnalyzer:
+    """
+    Analysis without a model call, in the same shape as an AI analysis.
+    
+    Sentiment comes from a weighted lexicon with negation ("not good"),
+    boosters ("very good") and contrast ("good but slow"); entities from
+    organization/location gazetteers plus capitalization patterns; topics
+    from keyword lists. Good enough to serve short boilerplate on its own,
+    and the fallback when the AI provider fails.
+    """
+    
+    model = MODEL
+    
+    def analyze(self, text: str) -> Dict[str, Any]:
+        """Analyze one text (microseconds, no I/O)."""
+        words = _WORD_RE.findall(text.lower())
+        score, positive, negative = score_sentiment(words)
+        
+        if score >= 1:
+            sentiment = "positive"
+        elif score <= -1:
+            sentiment = "negative"
+        else:
+            sentiment = "neutral"
+        
+        hits = positive + negative
+        if hits == 0:
+            # No sentiment words: confidently neutral only when the text is short
+            confidence = 0.75 if len(words) <= 40 else 0.55
+        else:
+            agreement = abs(positive - negative) / hits
+            if sentiment == "neutral":
+                agreement = 1 - agreement
+            confidence = 0.5 + 0.45 * agreement * math.tanh(abs(score) / 3 + hits / 4)
+        
+        entities = extract_entities(text)
+        names = {w for e in entities for w in _WORD_RE.findall(e["text"].lower())}
+        return {
+            "sentiment": sentiment,
+            "sentiment_confidence": round(min(0.95, confidence), 2),
+            "entities": entities,
+            "topics": extract_topics([w for w in words if w not in STOPWORDS], exclude=names),
+            "summary": " ".join(sentences(text)[:2])[:300],
+            "model": self.model,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    def analyze_batch(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze many texts; identical texts (after whitespace normalization)
+        are analyzed once, which is most of the work for boilerplate traffic.
+        
+        This is a plain loop over analyze(), not a vectorized pass: the only
+        saving over calling analyze() per text is the deduplication.
+        """
+        seen: Dict[str, Dict[str, Any]] = {}
+        results = []
+        for text in texts:
+            key = _normalize(text)
+            if key not in seen:
+                seen[key] = self.analyze(text)
+                results.append(seen[key])
+            else:
+                results.append({**seen[key], "entities": list(seen[key]["entities"]),
+                                "topics": list(seen[key]["topics"])})
+        return results
+
+
+class LocalPolicy:
+    """
+    Decides whether a document is served by the LocalAnalyzer or the AI.
+    
+    A document is served locally when its source is in `sources`, or when
+    it is at most `max_tokens` long and the local sentiment confidence is
+    at least `min_confidence`. Everything else is escalated to the AI.
+    """
+    
+    def __init__(self, max_tokens: int = 0, min_confidence: float = 0.7,
+                 sources: Optional[Set[str]] = None):
+        """
+        Initialize routing policy.
+        
+        Args:
+            max_tokens: Longest text (estimated tokens) served locally (0 = none by length)
+            min_confidence: Minimum local sentiment confidence to skip the AI
+            sources: Sources always served locally (e.g. {"rss", "newsletter"})
+        """
+        self.max_tokens = max_tokens
+        self.min_confidence = min_confidence
+        self.sources = set(sources or ())
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_tokens > 0 or bool(self.sources)
+    
+    def wants_local(self, tokens: int, source: Optional[str]) -> bool:
+        """Whether the local tier should be tried before escalating."""
+        return source in self.sources or tokens <= self.max_tokens
+    
+    def accept(self, analysis: Dict[str, Any], source: Optional[str]) -> bool:
+        """Whether a local analysis is served as the final result."""
+        return source in self.sources or analysis["sentiment_confidence"] >= self.min_confidence
@@ -0,0 +1,134 @@
+"""Chunked transcription of long recordings with timestamp stitching."""
+
+import re
+from collections import Counter
+from typing import Callable, Dict, Any, List, Tuple
+from .audio_processor import SAMPLE_RATE
+
+Window = Tuple[int, int, int, int]  # (start, end, keep_from, keep_to) in samples
+
+
+def plan_chunks(samples, chunk_seconds: float = 120.0, overlap_seconds: float = 2.0,
+                search_seconds: float = 5.0, sample_rate: int = SAMPLE_RATE) -> List[Window]:
+    """
+    Split decoded audio into overlapping windows cut at low-energy points.
+    
+    Each cut is placed at the quietest 100 ms frame within search_seconds of
+    the nominal chunk boundary, so cuts tend to land in pauses between words.
+    
+    Args:
+        samples: 1-D float32 PCM array
+        chunk_seconds: Nominal chunk length
+        overlap_seconds: Audio shared by neighbouring windows on each side of a cut
+        search_seconds: How far from the nominal boundary to look for a quiet frame
+        sample_rate: Sample rate of `samples`
+    
+    Returns:
+        Windows as (start, end, keep_from, keep_to): the model sees
+        samples[start:end]; only segments starting in [keep_from, keep_to)
+        are kept when stitching.
+    """
+    import numpy as np
+    
+    total = len(samples)
+    chunk = int(chunk_seconds * sample_rate)
+    if total <= chunk:
+        return [(0, total, 0, total)]
+    
+    frame = sample_rate // 10
+    usable = total - total % frame
+    energy = np.square(samples[:usable].reshape(-1, frame)).mean(axis=1)
+    search = int(search_seconds * sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    
+    cuts = [0]
+    target = chunk
+    # Stop once the remainder is short enough to fold into the last chunk
+    while total - target > chunk // 4:
+        lo = max(cuts[-1] + frame, target - search) // frame
+        hi = max(lo + 1, min(target + search, usable) // frame)
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        cuts.append(quietest * frame + frame // 2)
+        target = cuts[-1] + chunk
+    cuts.append(total)
+    
+    return [(max(0, a - overlap), min(total, b + overlap), a, b)
+            for a, b in zip(cuts, cuts[1:])]
+
+
+def _norm_word(word: str) -> str:
+    """Lowercase a word and strip punctuation for overlap comparison."""
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _drop_repeated_prefix(previous: List[str], words: List[str], max_check: int = 12) -> List[str]:
+    """Remove leading words that repeat the end of the previous chunk's text."""
+    prev_tail = [_norm_word(w) for w in previous[-max_check:]]
+    head = [_norm_word(w) for w in words[:max_check]]
+    for k in range(min(len(prev_tail), len(head)), 0, -1):
+        if prev_tail[-k:] == head[:k]:
+            return words[k:]
+    return words
+
+
+def stitch(windows: List[Window], results: List[Dict[str, Any]],
+           sample_rate: int = SAMPLE_RATE) -> Dict[str, Any]:
+    """
+    Merge per-window transcriptions into one with absolute timestamps.
+    
+    Segments are kept by the window that owns their start time; words
+    repeated across a seam (from a segment straddling the cut) are dropped.
+    """
+    segments: List[Dict[str, Any]] = []
+    words: List[str] = []
+    
+    for index, ((start, _, keep_from, keep_to), result) in enumerate(zip(windows, results)):
+        offset = start / sample_rate
+        at_seam = index > 0
+        for seg in result.get("segment_list", []):
+            seg_start = seg["start"] + offset
+            if not keep_from / sample_rate <= seg_start < keep_to / sample_rate:
+                continue
+            
+            seg_words = seg["text"].split()
+            if at_seam:
+                seg_words = _drop_repeated_prefix(words, seg_words)
+                at_seam = False
+            if not seg_words:
+                continue
+            
+            words.extend(seg_words)
+            segments.append({"start": round(seg_start, 3),
+                             "end": round(seg["end"] + offset, 3),
+                             "text": " ".join(seg_words)})
+    
+    languages = Counter(r.get("language", "unknown") for r in results)
+    
+    return {
+        "text": " ".join(words),
+        "language": languages.most_common(1)[0][0] if languages else "unknown",
+        "duration": windows[-1][1] / sample_rate if windows else 0.0,
+        "segments": len(segments),
+        "segment_list": segments,
+        "chunks": len(windows)
+    }
+
+
+def transcribe_long(submit: Callable, samples, chunk_seconds: float = 120.0,
+                    overlap_seconds: float = 2.0) -> Dict[str, Any]:
+    """
+    Transcribe long audio by fanning windows out in parallel and stitching.
+    
+    Args:
+        submit: Function taking a PCM array and returning a Future
+                (e.g. TranscriptionPool.submit)
+        samples: Decoded 16 kHz mono float32 audio
+        chunk_seconds: Nominal window length
+        overlap_seconds: Overlap on each side of a cut
+    
+    Returns:
+        Same structure as AudioProcessor.transcribe_pcm(), plus "chunks"
+    """
+    windows = plan_chunks(samples, chunk_seconds, overlap_seconds)
+    futures = [submit(samples[start:end]) for start, end, _, _ in windows]
+    return stitch(windows, [f.result() for f in futures])
@@ -0,0 +1,132 @@
+"""Chunking and deterministic merging for long-document analysis."""
+
+import math
+import re
+from collections import OrderedDict
+from typing import Dict, Any, List
+
+CHARS_PER_TOKEN = 4  # Rough average for English text across provider tokenizers
+SENTIMENTS = ("positive", "negative", "neutral")
+SUMMARIES_MARKER = "Part summaries:\n"  # Precedes the list in build_reduce_prompt()
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without a provider-specific tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences on terminal punctuation and blank lines."""
+    parts = re.split(r"(?<=[.!?])\s+|\n\s*\n", text)
+    return [p.strip() for p in parts if p and p.strip()]
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Pack whole sentences into chunks of at most max_tokens.
+    
+    A single sentence longer than the budget is split on word boundaries.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks, current = [], ""
+    
+    for sentence in split_sentences(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def validate_chunk_analysis(analysis: Dict[str, Any]):
+    """Raise ValueError unless an analysis has the field types merge_analyses() and the DB read."""
+    if not isinstance(analysis.get("sentiment"), str):
+        raise ValueError("Analysis sentiment is not a string")
+    try:
+        float(analysis.get("sentiment_confidence"))
+    except (TypeError, ValueError):
+        raise ValueError("Analysis sentiment_confidence is not a number")
+    entities = analysis.get("entities")
+    if not isinstance(entities, list) or not all(
+            isinstance(e, dict) and isinstance(e.get("text"), str) and isinstance(e.get("type"), str)
+            for e in entities):
+        raise ValueError("Analysis entities are not a list of {text, type}")
+    topics = analysis.get("topics")
+    if not isinstance(topics, list) or not all(isinstance(t, str) for t in topics):
+        raise ValueError("Analysis topics are not a list of strings")
+    if not isinstance(analysis.get("summary"), str):
+        raise ValueError("Analysis summary is not a string")
+
+
+def merge_analyses(analyses: List[Dict[str, Any]], weights: List[int],
+                   max_topics: int = 5) -> Dict[str, Any]:
+    """
+    Merge per-chunk analyses into one result, independent of completion order.
+    
+    Args:
+        analyses: Parsed chunk analyses, in document order
+        weights: Chunk sizes (tokens), used to weight sentiment and topics
+        max_topics: Number of topics to keep
+    
+    Returns:
+        {"sentiment", "sentiment_confidence", "entities", "topics", "summaries"}
+    """
+    total = sum(weights) or 1
+    
+    # Sentiment: confidence-weighted vote, ties broken by SENTIMENTS order
+    scores = {label: 0.0 for label in SENTIMENTS}
+    for analysis, weight in zip(analyses, weights):
+        label = analysis["sentiment"] if analysis["sentiment"] in scores else "neutral"
+        scores[label] += float(analysis["sentiment_confidence"]) * weight
+    sentiment = max(SENTIMENTS, key=lambda label: scores[label])
+    
+    # Entities: de-duplicated case-insensitively, most mentioned first
+    entities: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+    for analysis in analyses:
+        for entity in analysis["entities"]:
+            key = (entity["text"].strip().casefold(), entity["type"])
+            if key in entities:
+                entities[key]["count"] += 1
+            else:
+                entities[key] = {"text": entity["text"].strip(), "type": entity["type"], "count": 1}
+    ranked_entities = sorted(entities.values(), key=lambda e: -e["count"])
+    
+    # Topics: ranked by summed chunk weight, earlier rank within a chunk counts more
+    topics: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    for analysis, weight in zip(analyses, weights):
+        for rank, topic in enumerate(analysis["topics"]):
+            key = topic.strip().casefold()
+            entry = topics.setdefault(key, {"topic": topic.strip(), "score": 0.0})
+            entry["score"] += weight / (rank + 1)
+    ranked_topics = sorted(topics.values(), key=lambda t: -t["score"])
+    
+    return {
+        "sentiment": sentiment,
+        "sentiment_confidence": round(scores[sentiment] / total, 3),
+        "entities": [{"text": e["text"], "type": e["type"]} for e in ranked_entities],
+        "topics": [t["topic"] for t in ranked_topics[:max_topics]],
+        "summaries": [a["summary"] for a in analyses]
+    }
+
+
+def build_reduce_prompt(summaries: List[str]) -> str:
+    """Prompt asking the model to combine chunk summaries into one summary."""
+    numbered = "\n".join(f"{i}. {s}" for i, s in enumerate(summaries, 1))
+    return f"""The following are summaries of consecutive parts of one document.
+Write a single 2-sentence summary of the whole document.
+Return ONLY the summary text, no preamble.
+
+{SUMMARIES_MARKER}{numbered}"""
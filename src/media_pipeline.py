@@ -5,6 +5,8 @@ from typing import Dict, Any, Optional
 from .pipeline import Pipeline
 from .audio_processor import AudioProcessor
 from .video_processor import VideoProcessor
+from .transcription_pool import TranscriptionPool
+from .metrics import metrics
 
 
 class MediaPipeline(Pipeline):
@@ -12,19 +14,43 @@ class MediaPipeline(Pipeline):
     
     def __init__(self, db_path: str = "data/pipeline.db",
                  ai_provider: str = "openai", ai_model: str = None,
-                 whisper_model: str = "base"):
+                 whisper_model: str = "base", transcription_workers: int = 0,
+                 transcription_threads: int = 0, transcription_max_jobs: int = 0,
+                 transcription_max_rss_mb: int = 0, long_audio_seconds: float = 0,
+                 long_audio_chunk_seconds: float = 120.0, **pipeline_options):
         """
         Initialize media pipeline.
         
         Args:
             db_path: Database path
-            ai_provider: AI provider (openai, anthropic, ollama)
+            ai_provider: AI provider (openai, anthropic, ollama, fake)
             ai_model: AI model name
             whisper_model: Whisper model size (tiny, base, small, medium, large)
+            transcription_workers: Whisper worker processes (0 = transcribe in-process)
+            transcription_threads: torch threads per worker (0 = split cores evenly)
+            transcription_max_jobs: Recycle a worker after this many jobs (0 = never)
+            transcription_max_rss_mb: Recycle a worker above this RSS (0 = no cap)
+            long_audio_seconds: Split longer audio into chunks transcribed in
+                                parallel on the pool (0 = never split)
+            long_audio_chunk_seconds: Nominal chunk length for long audio
+            **pipeline_options: Extra Pipeline options (e.g. cache settings)
         """
-        super().__init__(db_path, ai_provider, ai_model)
+        super().__init__(db_path, ai_provider, ai_model, **pipeline_options)
         self.audio_processor = AudioProcessor(model_size=whisper_model)
         
+        # Transcription runs on a pool of preloaded model replicas when configured
+        self.transcriber = self.audio_processor
+        if transcription_workers > 0:
+            self.transcriber = TranscriptionPool(
+                model_size=whisper_model,
+                workers=transcription_workers,
+                threads_per_worker=transcription_threads,
+                max_jobs_per_worker=transcription_max_jobs,
+                max_rss_mb=transcription_max_rss_mb,
+                long_audio_seconds=long_audio_seconds,
+                chunk_seconds=long_audio_chunk_seconds
+            )
+        
         # Video processor is optional (requires ffmpeg)
         try:
             self.video_processor = VideoProcessor()
@@ -32,6 +58,11 @@ class MediaPipeline(Pipeline):
             print(f"⚠️  Video processing disabled: {e}")
             self.video_processor = None
     
+    def close(self):
+        """Shut down the transcription pool, if any."""
+        if isinstance(self.transcriber, TranscriptionPool):
+            self.transcriber.close()
+    
     def ingest_text(self, text: str, source: str = "api") -> Dict[str, Any]:
         """Ingest text document (original method)."""
         return self.ingest(text, source)
@@ -49,7 +80,7 @@ class MediaPipeline(Pipeline):
         """
         try:
             # Transcribe audio
-            transcription = self.audio_processor.transcribe_audio(audio_path)
+            transcription = self.transcriber.transcribe_audio(audio_path)
             text = transcription["text"]
             
             if not text or not text.strip():
@@ -74,7 +105,8 @@ class MediaPipeline(Pipeline):
         except Exception as e:
             return {
                 "status": "error",
-                "message": f"Audio processing failed: {str(e)}"
+                "message": f"Audio processing failed: {str(e)}",
+                "retryable": True
             }
     
     def ingest_video(self, video_path: str, source: str = "video") -> Dict[str, Any]:
@@ -94,16 +126,14 @@ class MediaPipeline(Pipeline):
                 "message": "Video processing not available. Install ffmpeg: brew install ffmpeg"
             }
         
-        audio_path = None
         try:
             # Get video info
-            video_info = self.video_processor.get_video_info(video_path)
-            
-            # Extract audio
-            audio_path = self.video_processor.extract_audio(video_path)
+            with metrics.stage("video_info"):
+                video_info = self.video_processor.get_video_info(video_path)
             
-            # Transcribe audio
-            transcription = self.audio_processor.transcribe_audio(audio_path)
+            # Transcribe the audio track; it is decoded once, straight to PCM,
+            # by whichever process runs the model
+            transcription = self.transcriber.transcribe_audio(video_path)
             text = transcription["text"]
             
             if not text or not text.strip():
@@ -129,13 +159,9 @@ class MediaPipeline(Pipeline):
         except Exception as e:
             return {
                 "status": "error",
-                "message": f"Video processing failed: {str(e)}"
+                "message": f"Video processing failed: {str(e)}",
+                "retryable": True
             }
-        
-        finally:
-            # Cleanup extracted audio
-            if audio_path and os.path.exists(audio_path):
-                os.unlink(audio_path)
     
     def ingest_file(self, file_path: str, media_type: str = None, 
                    source: str = None) -> Dict[str, Any]:
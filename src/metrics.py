@@ -0,0 +1,219 @@
+"""In-process latency histograms, counters and gauges with Prometheus text output."""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Callable, Iterable, Tuple
+
+# Upper bounds in seconds; wide enough for both DB writes and hour-long transcriptions
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+STAGE_SECONDS = "pipeline_stage_duration_seconds"
+STAGE_ERRORS = "pipeline_stage_errors_total"
+STAGE_IN_FLIGHT = "pipeline_stage_in_flight"
+
+HELP = {
+    STAGE_SECONDS: ("histogram", "Time spent in each pipeline stage"),
+    STAGE_ERRORS: ("counter", "Pipeline stage executions that raised"),
+    STAGE_IN_FLIGHT: ("gauge", "Pipeline stage executions currently running"),
+    "ai_batch_items_total": ("counter", "Texts sent to the AI provider in a batched call"),
+    "ai_batch_redispatched_total": ("counter", "Batched texts re-analyzed individually"),
+    "ai_concurrency_limit": ("gauge", "Adaptive (AIMD) limit on concurrent provider calls"),
+    "ai_in_flight": ("gauge", "Provider calls currently running"),
+    "ai_circuit_state": ("gauge", "Provider circuit breaker: 0 closed, 1 half-open, 2 open"),
+    "ai_provider_errors_total": ("counter", "Failed provider call attempts by reason"),
+    "ai_provider_retries_total": ("counter", "Provider call attempts retried after backoff"),
+    "ai_provider_rejections_total": ("counter", "Calls refused before reaching the provider"),
+    "ai_router_requests_total": ("counter", "Routed AI calls by the backend chosen first"),
+    "ai_router_hedges_total": ("counter", "Backup requests sent after the first backend was slow"),
+    "ai_router_hedge_wins_total": ("counter", "Routed calls answered by a backup request"),
+    "ai_router_p95_seconds": ("gauge", "Recent 95th percentile latency per backend"),
+    "ai_router_error_rate": ("gauge", "Recent error rate per backend (EWMA)"),
+    "ai_prompt_text_tokens_total": ("counter", "Estimated tokens of text before and after prompt compression"),
+    "local_analysis_total": ("counter", "Texts analyzed locally, by whether they were served or escalated to the AI"),
+    "pipeline_jobs": ("gauge", "Queued and running ingestion jobs"),
+    "transcription_pool_pending": ("gauge", "Transcriptions waiting for a free Whisper worker"),
+    "transcription_pool_busy": ("gauge", "Whisper workers currently transcribing"),
+    "transcription_pool_workers": ("gauge", "Whisper worker processes"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+class Metrics:
+    """
+    Thread-safe metric registry.
+    
+    Recording is a dictionary update under one lock (about a microsecond),
+    so it is cheap enough for every request. Snapshots are plain JSON-able
+    dicts; other processes (job workers, transcription workers) send theirs
+    to be merged for /metrics.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._gauges: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], List] = {}  # [bucket counts, sum, count]
+        self._collectors: List[Callable[["Metrics"], None]] = []
+    
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increase a counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def set_gauge(self, name: str, value: float, **labels):
+        """Set a gauge to an absolute value."""
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+    
+    def add_gauge(self, name: str, delta: float, **labels):
+        """Move a gauge up or down."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+    
+    def observe(self, name: str, value: float, **labels):
+        """Record one observation in a latency histogram."""
+        key = (name, _label_key(labels))
+        index = bisect.bisect_left(LATENCY_BUCKETS, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+                self._histograms[key] = histogram
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+    
+    @contextmanager
+    def stage(self, stage: str, **labels):
+        """
+        Time a pipeline stage.
+        
+        Records the duration histogram, an error counter if the block raises,
+        and an in-flight gauge while it runs. Works around awaits too.
+        """
+        self.add_gauge(STAGE_IN_FLIGHT, 1, stage=stage)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(STAGE_ERRORS, stage=stage, **labels)
+            raise
+        finally:
+            self.observe(STAGE_SECONDS, time.perf_counter() - start, stage=stage, **labels)
+            self.add_gauge(STAGE_IN_FLIGHT, -1, stage=stage)
+    
+    def register_collector(self, collector: Callable[["Metrics"], None]):
+        """Add a callback that refreshes gauges right before a snapshot."""
+        self._collectors.append(collector)
+    
+    def snapshot(self, reset: bool = False) -> Dict[str, list]:
+        """
+        Export all metrics as JSON-able lists.
+        
+        Args:
+            reset: Clear counters and histograms afterwards (for sending
+                   deltas to a parent process); gauges are kept
+        """
+        for collector in self._collectors:
+            try:
+                collector(self)
+            except Exception:
+                pass
+        
+        with self._lock:
+            data = {
+                "counters": [[n, list(map(list, k)), v] for (n, k), v in self._counters.items()],
+                "gauges": [[n, list(map(list, k)), v] for (n, k), v in self._gauges.items()],
+                "histograms": [[n, list(map(list, k)), list(h[0]), h[1], h[2]]
+                               for (n, k), h in self._histograms.items()],
+            }
+            if reset:
+                self._counters.clear()
+                self._histograms.clear()
+        return data
+    
+    def merge(self, snapshot: Dict[str, list]):
+        """Add another registry's snapshot into this one (gauges are summed)."""
+        with self._lock:
+            for name, labels, value in snapshot.get("counters", []):
+                key = (name, tuple(map(tuple, labels)))
+                self._counters[key] = self._counters.get(key, 0) + value
+            for name, labels, value in snapshot.get("gauges", []):
+                key = (name, tuple(map(tuple, labels)))
+                self._gauges[key] = self._gauges.get(key, 0) + value
+            for name, labels, buckets, total, count in snapshot.get("histograms", []):
+                key = (name, tuple(map(tuple, labels)))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+                    self._histograms[key] = histogram
+                for i, n in enumerate(buckets):
+                    histogram[0][i] += n
+                histogram[1] += total
+                histogram[2] += count
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]], extra: str = "") -> str:
+    parts = ['{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+             for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus(snapshots: Iterable[Dict[str, list]]) -> str:
+    """
+    Merge snapshots and render them in the Prometheus text exposition format.
+    
+    Args:
+        snapshots: Metrics.snapshot() outputs from every process to report
+    
+    Returns:
+        Text for a /metrics response (version 0.0.4)
+    """
+    combined = Metrics()
+    for snapshot in snapshots:
+        combined.merge(snapshot)
+    
+    series: Dict[str, Tuple[str, List[str]]] = {}
+    for (name, labels), value in sorted(combined._counters.items()):
+        series.setdefault(name, ("counter", []))[1].append(
+            f"{name}{_format_labels(labels)} {_number(value)}")
+    for (name, labels), value in sorted(combined._gauges.items()):
+        series.setdefault(name, ("gauge", []))[1].append(
+            f"{name}{_format_labels(labels)} {_number(value)}")
+    for (name, labels), (buckets, total, count) in sorted(combined._histograms.items()):
+        lines = series.setdefault(name, ("histogram", []))[1]
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+            cumulative += n
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+            lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    
+    output = []
+    for name in sorted(series):
+        kind, lines = series[name]
+        output.append(f"# HELP {name} {HELP.get(name, (kind, name))[1]}")
+        output.append(f"# TYPE {name} {kind}")
+        output.extend(lines)
+    return "\n".join(output) + "\n"
+
+
+# Process-wide registry
+metrics = Metrics()
@@ -1,18 +1,79 @@
 """Main pipeline orchestrator."""
 
+import asyncio
 import json
-from typing import Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
 from .database import Database
 from .ai_analyzer import AIAnalyzer
+from .batching_analyzer import BatchingAnalyzer
+from .router_analyzer import RouterAnalyzer
+from .analysis_cache import AnalysisCache
+from .local_analyzer import LocalAnalyzer, LocalPolicy
+from .long_document import estimate_tokens
+from .metrics import metrics
+
+TIMESERIES_DEFAULT_SPAN = {"hour": timedelta(hours=24), "day": timedelta(days=30)}
+TIMESERIES_MAX_SPAN = {"hour": timedelta(days=31), "day": timedelta(days=3660)}
 
 
 class Pipeline:
     """Orchestrates the complete text processing pipeline."""
     
     def __init__(self, db_path: str = "data/pipeline.db", 
-                 ai_provider: str = "openai", ai_model: str = None):
+                 ai_provider: str = "openai", ai_model: str = None,
+                 cache_ttl: int = 7 * 24 * 3600, cache_max_entries: int = 100000,
+                 cache_lru_size: int = 1024, batch_max_items: int = 0,
+                 batch_max_wait_ms: float = 20, batch_max_item_tokens: int = 200,
+                 ai_backends: str = None, hedge_percentile: float = 0.95,
+                 hedge_min_ms: float = 50, local_max_tokens: int = 0,
+                 local_min_confidence: float = 0.7, local_sources: List[str] = None):
+        """
+        Initialize pipeline.
+        
+        Args:
+            db_path: Database path
+            ai_provider: AI provider (openai, anthropic, ollama, fake)
+            ai_model: AI model name
+            cache_ttl: Seconds a cached analysis stays valid
+            cache_max_entries: Maximum cached analyses kept (0 disables the cache)
+            cache_lru_size: In-process LRU entries in front of the cache table
+            batch_max_items: Pack up to this many short texts into one AI call
+                             (0 or 1 disables micro-batching)
+            batch_max_wait_ms: How long a short text waits for others to batch with
+            batch_max_item_tokens: Texts longer than this are analyzed on their own
+            ai_backends: Route between several backends, e.g.
+                         "openai:gpt-4o-mini,anthropic,ollama:llama3"
+                         (overrides ai_provider/ai_model)
+            hedge_percentile: With ai_backends, send a backup request once the
+                              first backend exceeds this latency percentile
+                              (0 disables hedging)
+            hedge_min_ms: With ai_backends, never hedge sooner than this
+            local_max_tokens: Texts up to this many tokens are analyzed locally
+                              (LocalAnalyzer) and only sent to the AI when the
+                              local result is not confident enough (0 disables)
+            local_min_confidence: Local sentiment confidence needed to skip the AI
+            local_sources: Sources always analyzed locally, whatever their length
+        """
         self.db = Database(db_path)
-        self.analyzer = AIAnalyzer(provider=ai_provider, model=ai_model)
+        if ai_backends:
+            self.analyzer = RouterAnalyzer.from_spec(ai_backends, hedge_percentile=hedge_percentile,
+                                                     hedge_min_ms=hedge_min_ms)
+        else:
+            self.analyzer = AIAnalyzer(provider=ai_provider, model=ai_model)
+        if batch_max_items > 1:
+            self.analyzer = BatchingAnalyzer(self.analyzer, max_items=batch_max_items,
+                                             max_wait_ms=batch_max_wait_ms,
+                                             max_item_tokens=batch_max_item_tokens)
+        self.local = LocalAnalyzer()
+        self.local_policy = LocalPolicy(max_tokens=local_max_tokens,
+                                        min_confidence=local_min_confidence,
+                                        sources=set(local_sources or ()))
+        self.cache = None
+        if cache_max_entries > 0:
+            self.cache = AnalysisCache(self.db, ttl_seconds=cache_ttl,
+                                       max_entries=cache_max_entries,
+                                       lru_size=cache_lru_size)
     
     def ingest(self, text: str, source: str = "api") -> Dict[str, Any]:
         """
@@ -30,70 +91,318 @@ class Pipeline:
                 "message": str
             }
         """
-        # Validation
-        if not text or not text.strip():
-            return {"status": "error", "message": "Empty text provided"}
-        
-        if len(text) > 100000:  # 100k char limit
-            return {"status": "error", "message": "Text too large (max 100k characters)"}
+        error = self.validate_text(text)
+        if error:
+            return error
         
         try:
-            # Store document
-            doc_id = self.db.insert_document(text, source)
+            # Local analysis when the policy allows it, else AI analysis
+            # (served from cache for repeated text)
+            analysis = self._analyze(text, source)
             
-            # AI analysis
-            analysis = self.analyzer.analyze(text)
-            
-            # Store analysis results
-            self.db.insert_analysis(
-                document_id=doc_id,
-                sentiment=analysis["sentiment"],
-                confidence=analysis["sentiment_confidence"],
-                summary=analysis["summary"],
-                topics=json.dumps(analysis["topics"]),
-                ai_model=analysis["model"]
-            )
-            
-            # Store entities
-            if analysis["entities"]:
-                self.db.insert_entities(doc_id, analysis["entities"])
+            # Store document, analysis and entities in one transaction
+            doc_id = self.db.write_ingest_result(text, source, analysis)
             
+            return self._success(doc_id, analysis)
+        
+        except Exception as e:
+            # Unexpected failures (database, provider) may pass on a retry
             return {
-                "document_id": doc_id,
-                "status": "success",
-                "analysis": analysis,
-                "message": "Document processed successfully"
+                "status": "error",
+                "message": f"Processing failed: {str(e)}",
+                "retryable": True
             }
+    
+    async def aingest(self, text: str, source: str = "api") -> Dict[str, Any]:
+        """
+        Async version of ingest() for use inside an event loop.
+        
+        The AI call runs on the analyzer's async client and the blocking
+        SQLite writes run in worker threads, so the loop stays free.
+        """
+        error = self.validate_text(text)
+        if error:
+            return error
+        
+        try:
+            analysis = await self._aanalyze(text, source)
+            doc_id = await asyncio.to_thread(self.db.write_ingest_result, text, source, analysis)
+            return self._success(doc_id, analysis)
         
         except Exception as e:
+            # Unexpected failures (database, provider) may pass on a retry
             return {
                 "status": "error",
-                "message": f"Processing failed: {str(e)}"
+                "message": f"Processing failed: {str(e)}",
+                "retryable": True
             }
     
+    async def aingest_batch(self, items: List[Dict[str, str]], concurrency: int = 8,
+                            write_batch_size: int = 100) -> List[Dict[str, Any]]:
+        """
+        Ingest many documents with bounded concurrent analysis.
+        
+        Args:
+            items: [{"text": str, "source": str}]
+            concurrency: Maximum analyses in flight at once
+            write_batch_size: Documents written per database transaction; if a
+                              group fails, its documents are retried one by one
+        
+        Returns:
+            One ingest() style result per item, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def analyze(index: int, text: str):
+            async with semaphore:
+                try:
+                    return index, await self._aanalyze(text, local=False)
+                except Exception as e:
+                    results[index] = {"status": "error", "message": f"Processing failed: {str(e)}"}
+                    return None
+        
+        valid = []
+        for index, item in enumerate(items):
+            error = self.validate_text(item.get("text"))
+            if error:
+                results[index] = error
+            else:
+                valid.append(index)
+        
+        # Local tier for the whole batch first; only escalated texts wait on the AI
+        pending = []
+        escalated = valid
+        if self.local_policy.enabled:
+            candidates = [i for i in valid if self.local_policy.wants_local(
+                estimate_tokens(items[i]["text"]), items[i].get("source"))]
+            local = self.local.analyze_batch(items[i]["text"] for i in candidates)
+            served = {i for i, analysis in zip(candidates, local)
+                      if self._accept_local(analysis, items[i].get("source"))}
+            pending = [(i, a) for i, a in zip(candidates, local) if i in served]
+            escalated = [i for i in valid if i not in served]
+        tasks = [asyncio.create_task(analyze(i, items[i]["text"])) for i in escalated]
+        
+        async def flush(pending: List[tuple]):
+            records = [{"content": items[i]["text"],
+                        "source": items[i].get("source") or "api",
+                        "analysis": analysis} for i, analysis in pending]
+            try:
+                doc_ids = await asyncio.to_thread(self.db.write_ingest_results, records)
+            except Exception as e:
+                if len(pending) > 1:
+                    # The whole group rolled back; retry one at a time so only bad records fail
+                    for entry in pending:
+                        await flush([entry])
+                    return
+                results[pending[0][0]] = {"status": "error", "message": f"Processing failed: {str(e)}"}
+                return
+            for (i, analysis), doc_id in zip(pending, doc_ids):
+                results[i] = self._success(doc_id, analysis)
+        
+        while len(pending) >= write_batch_size:
+            await flush(pending[:write_batch_size])
+            pending = pending[write_batch_size:]
+        for task in asyncio.as_completed(tasks):
+            analyzed = await task
+            if analyzed is None:
+                continue
+            pending.append(analyzed)
+            if len(pending) >= write_batch_size:
+                await flush(pending)
+                pending = []
+        if pending:
+            await flush(pending)
+        
+        return results
+    
+    def validate_text(self, text: str) -> Optional[Dict[str, Any]]:
+        """Return an error result if text cannot be ingested, else None."""
+        if not text or not text.strip():
+            return {"status": "error", "message": "Empty text provided"}
+        
+        if len(text) > 100000:  # 100k char limit
+            return {"status": "error", "message": "Text too large (max 100k characters)"}
+        
+        return None
+    
+    def _analyze_local(self, text: str, source: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Local analysis if the routing policy serves this text locally, else None."""
+        if not self.local_policy.enabled or not self.local_policy.wants_local(estimate_tokens(text), source):
+            return None
+        with metrics.stage("local_analysis"):
+            analysis = self.local.analyze(text)
+        return analysis if self._accept_local(analysis, source) else None
+    
+    def _accept_local(self, analysis: Dict[str, Any], source: Optional[str]) -> bool:
+        """Apply the policy to a local analysis and count the outcome."""
+        accepted = self.local_policy.accept(analysis, source)
+        metrics.inc("local_analysis_total", outcome="served" if accepted else "escalated")
+        return accepted
+    
+    def _analyze(self, text: str, source: Optional[str] = None) -> Dict[str, Any]:
+        """Analyze text locally if the policy allows, else via the cache and AI."""
+        analysis = self._analyze_local(text, source)
+        if analysis is not None:
+            return analysis
+        if self.cache is None:
+            return self.analyzer.analyze(text)
+        
+        key = self.cache.make_key(text, self.analyzer)
+        analysis = self.cache.get(key)
+        if analysis is None:
+            analysis = self.analyzer.analyze(text)
+            self.cache.put(key, analysis)
+        return analysis
+    
+    async def _aanalyze(self, text: str, source: Optional[str] = None,
+                        local: bool = True) -> Dict[str, Any]:
+        """Async version of _analyze(); cache database access runs in a thread."""
+        if local:
+            analysis = self._analyze_local(text, source)
+            if analysis is not None:
+                return analysis
+        if self.cache is None:
+            return await self.analyzer.aanalyze(text)
+        
+        key = self.cache.make_key(text, self.analyzer)
+        analysis = self.cache.get(key, memory_only=True)
+        if analysis is None:
+            analysis = await asyncio.to_thread(self.cache.get, key)
+        if analysis is None:
+            analysis = await self.analyzer.aanalyze(text)
+            await asyncio.to_thread(self.cache.put, key, analysis)
+        return analysis
+    
+    def _success(self, doc_id: int, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the success result returned by ingest()."""
+        return {
+            "document_id": doc_id,
+            "status": "success",
+            "analysis": analysis,
+            "message": "Document processed successfully"
+        }
+    
     def retrieve(self, document_id: int) -> Dict[str, Any]:
         """Retrieve document with full analysis."""
         result = self.db.get_document(document_id)
         if not result:
             return {"status": "error", "message": "Document not found"}
+        return {"status": "success", "data": result}
+    
+    def retrieve_json(self, document_id: int) -> Optional[Tuple[str, bool]]:
+        """
+        retrieve() as JSON text assembled by SQLite, skipping Python dicts.
+        
+        Returns:
+            (response JSON, whether the document is analyzed and therefore
+            immutable), or None if the document does not exist
+        """
+        found = self.db.get_document_json(document_id)
+        if found is None:
+            return None
+        data, analyzed = found
+        return '{"status":"success","data":' + data + '}', analyzed
+    
+    def list_all(self, limit: int = 50, offset: int = 0,
+                 cursor: str = None) -> Dict[str, Any]:
+        """List documents newest first; pass next_cursor back for the next page."""
+        try:
+            docs, next_cursor = self.db.list_documents(limit, offset, cursor)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        return {"status": "success", "documents": docs, "count": len(docs),
+                "next_cursor": next_cursor}
+    
+    def list_all_json(self, limit: int = 50, offset: int = 0, cursor: str = None) -> str:
+        """
+        list_all() as JSON text assembled by SQLite.
         
-        # Parse topics JSON
-        if result["analysis"] and result["analysis"]["topics"]:
-            result["analysis"]["topics"] = json.loads(result["analysis"]["topics"])
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        items, count, next_cursor = self.db.list_documents_json(limit, offset, cursor)
+        return self._page_json("documents", items, count, next_cursor)
+    
+    def search(self, sentiment: str = None, entity_type: str = None,
+               q: str = None, limit: int = 50, cursor: str = None,
+               entity: str = None, topic: str = None) -> Dict[str, Any]:
+        """Search documents by filters and optional full-text query (ranked)."""
+        try:
+            results, next_cursor = self.db.search_documents(sentiment, entity_type, q,
+                                                            limit, cursor, entity, topic)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        return {"status": "success", "results": results, "count": len(results),
+                "next_cursor": next_cursor}
+    
+    def search_json(self, sentiment: str = None, entity_type: str = None,
+                    q: str = None, limit: int = 50, cursor: str = None,
+                    entity: str = None, topic: str = None) -> str:
+        """
+        search() as JSON text assembled by SQLite.
         
-        return {"status": "success", "data": result}
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        items, count, next_cursor = self.db.search_documents_json(
+            sentiment, entity_type, q, limit, cursor, entity, topic)
+        return self._page_json("results", items, count, next_cursor)
     
-    def list_all(self, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
-        """List all documents."""
-        docs = self.db.list_documents(limit, offset)
-        return {"status": "success", "documents": docs, "count": len(docs)}
+    def _page_json(self, name: str, items: str, count: int, next_cursor: Optional[str]) -> str:
+        """Wrap a JSON array of page items in the list/search response envelope."""
+        return (f'{{"status":"success","{name}":{items},"count":{count},'
+                f'"next_cursor":{json.dumps(next_cursor)}}}')
     
-    def search(self, sentiment: str = None, entity_type: str = None) -> Dict[str, Any]:
-        """Search documents by filters."""
-        results = self.db.search_documents(sentiment, entity_type)
-        return {"status": "success", "results": results, "count": len(results)}
+    def topics(self, limit: int = 50, prefix: str = None) -> Dict[str, Any]:
+        """Topic facets with document counts."""
+        topics = self.db.topic_facets(limit, prefix)
+        return {"status": "success", "topics": topics, "count": len(topics)}
+    
+    def top_entities(self, entity_type: str = None, limit: int = 20) -> Dict[str, Any]:
+        """Most mentioned entities across documents."""
+        entities = self.db.top_entities(entity_type, limit)
+        return {"status": "success", "entities": entities, "count": len(entities)}
     
     def stats(self) -> Dict[str, Any]:
         """Get system statistics."""
         stats = self.db.get_stats()
+        if self.cache is not None:
+            stats["analysis_cache"] = self.cache.stats()
         return {"status": "success", "stats": stats}
+    
+    def timeseries(self, bucket: str = "hour", start: Optional[datetime] = None,
+                   end: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Get per-hour or per-day counts from the stats rollups.
+        
+        Args:
+            bucket: "hour" or "day"
+            start: Range start (default: 24 hours / 30 days before end)
+            end: Range end (default: now); naive datetimes are taken as UTC
+        """
+        if bucket not in TIMESERIES_DEFAULT_SPAN:
+            return {"status": "error", "message": f"Unsupported bucket: {bucket}"}
+        
+        def to_utc(value: datetime) -> datetime:
+            if value.tzinfo is None:
+                return value.replace(tzinfo=timezone.utc)
+            return value.astimezone(timezone.utc)
+        
+        end = to_utc(end) if end else datetime.now(timezone.utc)
+        start = to_utc(start) if start else end - TIMESERIES_DEFAULT_SPAN[bucket]
+        if start > end:
+            return {"status": "error", "message": "'from' must not be after 'to'"}
+        if end - start > TIMESERIES_MAX_SPAN[bucket]:
+            return {"status": "error",
+                    "message": f"Range too large for bucket={bucket} "
+                               f"(max {TIMESERIES_MAX_SPAN[bucket].days} days)"}
+        
+        points = self.db.get_timeseries(bucket, start, end)
+        return {
+            "status": "success",
+            "bucket": bucket,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "points": points
+        }
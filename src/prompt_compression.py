@@ -0,0 +1,212 @@
+"""Extractive prompt compression: fewer input tokens per analysis."""
+
+import math
+import os
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from .local_analyzer import STOPWORDS, extract_entities, sentences as split_sentences
+from .long_document import CHARS_PER_TOKEN, estimate_tokens
+
+# Transcript filler and markup that carries no meaning for the analysis
+# (explicit case classes; re.IGNORECASE makes these scans several times slower)
+_FILLER_RE = re.compile(
+    r"\[(?:inaudible|music|laughter|applause|silence|crosstalk|noise|\d{1,2}:\d{2}(?::\d{2})?)\]"
+    r"|\b(?:[Mm]m-?hmm|[Uu]h-huh|[Uu]+[MmHh]+|[Ee]+[Rr]+[Mm]+|[Hh]+[Mm]+)\b[,.]?")
+_REPEATED_PUNCT_RE = re.compile(r"([!?.,])\1+")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([,.!?;:])")
+
+# Newsletter/email/web footer phrases (matched against the lowercased line);
+# only short standalone lines are dropped, the same words inside prose stay
+BOILERPLATE_MAX_WORDS = 12
+_BOILERPLATE_RE = re.compile(
+    r"unsubscribe|view (?:this|it) in (?:your|a) browser|all rights reserved|sent from my"
+    r"|click here|privacy policy|terms of (?:service|use)|do not reply|this (?:e-?mail|message)"
+    r" (?:and any attachments )?(?:is|may be|are) confidential|manage (?:your )?preferences"
+    r"|follow us on|copyright ©|©\s*\d{4}")
+_WORD_RE = re.compile(r"[a-z][a-z'\-]+")
+
+
+def normalize(text: str) -> str:
+    """Drop transcript filler, collapse whitespace runs and repeated punctuation."""
+    text = _FILLER_RE.sub(" ", text)
+    text = _REPEATED_PUNCT_RE.sub(r"\1", text)
+    text = " ".join(text.split())
+    return _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+
+
+def strip_boilerplate(text: str) -> str:
+    """
+    Drop footer lines ("Unsubscribe | Manage preferences", "© 2024 Acme").
+    
+    A line goes only if it is short, matches a footer phrase and stands on
+    its own: the line before it ends a sentence (or is blank, or was a
+    footer line too) and the line after it does not continue it in lower
+    case. A wrapped paragraph that mentions a privacy policy keeps every
+    line.
+    """
+    lines = text.split("\n")
+    kept = []
+    dropped = False
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if (stripped and len(stripped.split()) <= BOILERPLATE_MAX_WORDS
+                and _BOILERPLATE_RE.search(stripped.lower())):
+            before = lines[i - 1].rstrip() if i else ""
+            after = lines[i + 1].lstrip() if i + 1 < len(lines) else ""
+            if ((dropped or not before or before[-1] in ".!?:")
+                    and not (after and after[0].islower())):
+                dropped = True
+                continue
+        dropped = False
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def dedupe(sentences: List[str]) -> List[str]:
+    """Drop repeats of an earlier sentence (case/punctuation-insensitive)."""
+    seen = set()
+    kept = []
+    for sentence in sentences:
+        key = " ".join(_WORD_RE.findall(sentence.lower()))
+        if key and key in seen:
+            continue
+        seen.add(key)
+        kept.append(sentence)
+    return kept
+
+
+def textrank(sentences: List[str], damping: float = 0.85, iterations: int = 30) -> List[float]:
+    """
+    TextRank sentence scores (word-overlap similarity, PageRank iteration).
+    
+    Overlaps are counted through an inverted index of content words, so only
+    sentence pairs that share a word are ever compared.
+    """
+    n = len(sentences)
+    words = [{w for w in _WORD_RE.findall(s.lower()) if w not in STOPWORDS} for s in sentences]
+    postings: Dict[str, List[int]] = defaultdict(list)
+    for i, ws in enumerate(words):
+        for w in ws:
+            postings[w].append(i)
+    
+    overlap: List[Dict[int, int]] = [defaultdict(int) for _ in range(n)]
+    for ids in postings.values():
+        for a in ids:
+            for b in ids:
+                if a != b:
+                    overlap[a][b] += 1
+    
+    # Normalized similarity (Mihalcea & Tarau) and each sentence's out-weight
+    edges: List[Dict[int, float]] = []
+    for i in range(n):
+        edges.append({j: c / (math.log(len(words[i]) + 1) + math.log(len(words[j]) + 1))
+                      for j, c in overlap[i].items()})
+    out_weight = [sum(e.values()) for e in edges]
+    
+    scores = [1.0] * n
+    for _ in range(iterations):
+        updated = [(1 - damping) + damping * sum(scores[j] * w / out_weight[j]
+                                                 for j, w in edges[i].items())
+                   for i in range(n)]
+        converged = max((abs(a - b) for a, b in zip(updated, scores)), default=0) < 1e-4
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def select(sentences: List[str], budget_tokens: int) -> List[str]:
+    """
+    Pick sentences that fit the token budget, in document order.
+    
+    Sentences are ranked by TextRank with a bias towards the opening ones.
+    A first pass takes the best sentence for every entity not yet covered,
+    so names, places and organizations survive compression. A second pass
+    fills what is left of the budget by rank.
+    """
+    ranks = textrank(sentences)
+    scores = [r * (1 + 0.5 / (1 + i)) for i, r in enumerate(ranks)]
+    order = sorted(range(len(sentences)), key=lambda i: -scores[i])
+    cost = [estimate_tokens(s) + 1 for s in sentences]
+    entities = [{e["text"].lower() for e in extract_entities(s)} for s in sentences]
+    
+    chosen: Set[int] = set()
+    covered: Set[str] = set()
+    used = 0
+    for require_new_entity in (True, False):
+        for i in order:
+            if i in chosen or used + cost[i] > budget_tokens:
+                continue
+            if require_new_entity and not entities[i] - covered:
+                continue
+            chosen.add(i)
+            covered |= entities[i]
+            used += cost[i]
+    
+    if not chosen:
+        # Even the best sentence is over budget: keep its head
+        best = sentences[order[0]]
+        cut = best.rfind(" ", 0, budget_tokens * CHARS_PER_TOKEN)
+        return [best[:cut if cut > 0 else budget_tokens * CHARS_PER_TOKEN]]
+    return [sentences[i] for i in sorted(chosen)]
+
+
+class PromptCompressor:
+    """
+    Shrinks text before it is put into an analysis prompt.
+    
+    Always (when enabled): footer-line removal, filler and whitespace
+    normalization and sentence de-duplication. With a token budget, texts still
+    over it are cut down to their most central sentences (see select()).
+    Only the prompt is compressed; callers store the original text.
+    """
+    
+    def __init__(self, enabled: bool = True, budget_tokens: int = 0):
+        """
+        Initialize compressor.
+        
+        Args:
+            enabled: Apply normalization and de-duplication at all
+            budget_tokens: Extractive selection above this many tokens (0 = never)
+        """
+        self.enabled = enabled
+        self.budget_tokens = budget_tokens
+    
+    @classmethod
+    def from_env(cls, provider: str, model: Optional[str] = None) -> "PromptCompressor":
+        """
+        Build a compressor from AI_PROMPT_* environment variables.
+        
+        A model-specific variable (AI_PROMPT_BUDGET_TOKENS_GPT_4O_MINI)
+        overrides a provider-specific one (AI_PROMPT_BUDGET_TOKENS_OPENAI),
+        which overrides the generic one.
+        """
+        suffixes = [f"_{provider.upper()}", ""]
+        if model:
+            suffixes.insert(0, "_" + re.sub(r"[^A-Z0-9]", "_", model.upper()))
+        
+        def setting(name: str, default: str) -> str:
+            return next((os.getenv(name + s) for s in suffixes if os.getenv(name + s)), default)
+        
+        return cls(
+            enabled=setting("AI_PROMPT_COMPRESSION", "1").lower() not in ("0", "false", "no", "off"),
+            budget_tokens=int(setting("AI_PROMPT_BUDGET_TOKENS", "0"))
+        )
+    
+    @property
+    def signature(self) -> str:
+        """Settings that change compressed output (part of the cache key)."""
+        return f"compress:{int(self.enabled)}:{self.budget_tokens}" if self.enabled else ""
+    
+    def compress(self, text: str) -> str:
+        """Compressed text; falls back to the normalized text if nothing would remain."""
+        if not self.enabled:
+            return text
+        normalized = normalize(strip_boilerplate(text))
+        sentences = dedupe(split_sentences(normalized))
+        if not sentences:
+            return normalized
+        if self.budget_tokens and estimate_tokens(" ".join(sentences)) > self.budget_tokens:
+            sentences = select(sentences, self.budget_tokens)
+        return " ".join(sentences)
@@ -0,0 +1,459 @@
+"""Rate limiting, adaptive concurrency, retries and circuit breaking for AI providers."""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+from .metrics import metrics
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class ProviderError(RuntimeError):
+    """A provider call that the governor gave up on (the message says why)."""
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without calling the provider while its circuit is open."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Throttling, timeouts, connection failures and 5xx responses are worth retrying."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS or status >= 500
+    name = type(error).__name__
+    return any(word in name for word in ("Timeout", "Connect", "RateLimit", "Overloaded",
+                                         "RemoteProtocol"))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header on the error's HTTP response, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Per-minute budget refilled continuously.
+    
+    reserve() lets the balance go negative and returns how long the caller
+    must wait for its share, so concurrent callers queue up fairly instead
+    of polling.
+    """
+    
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, amount: float, max_wait: float) -> Optional[float]:
+        """Take `amount`; return the wait in seconds, or None if it would exceed max_wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            amount = min(amount, self.capacity)
+            wait = max(0.0, (amount - self.tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self.tokens -= amount
+            return wait
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit adjusted by AIMD.
+    
+    Every success raises the limit by 1/limit (about +1 per round of calls);
+    an overload signal halves it, at most once per `decrease_interval` so a
+    burst of failures from one brownout counts once. Threads and coroutines
+    share the same slots; freed slots are handed to waiters in FIFO order.
+    """
+    
+    def __init__(self, initial: int, minimum: int, maximum: int, decrease_interval: float = 1.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self._waiters = deque()  # threading.Event or (loop, future)
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self, timeout: float) -> bool:
+        """Take a slot, waiting up to timeout seconds."""
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            event = threading.Event()
+            self._waiters.append(event)
+        if event.wait(timeout):
+            return True
+        with self._lock:
+            if event in self._waiters:
+                self._waiters.remove(event)
+                return False
+        return True  # Handed a slot just as the wait timed out
+    
+    async def aacquire(self, timeout: float) -> bool:
+        """Async acquire() that does not block the event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            future = loop.create_future()
+            entry = (loop, future)
+            self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    handed = False
+                else:
+                    handed = True
+            if handed:
+                if isinstance(e, asyncio.CancelledError):
+                    self.release()
+                    raise
+                return True
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return False
+    
+    def release(self):
+        """Return a slot, handing it to the next waiter if the limit allows."""
+        with self._lock:
+            self.in_flight -= 1
+            self._wake()
+    
+    def _wake(self):
+        """Hand free slots to waiters (caller holds the lock)."""
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            self.in_flight += 1
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+            else:
+                loop, future = waiter
+                loop.call_soon_threadsafe(_resolve, future)
+    
+    def on_success(self):
+        with self._lock:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._wake()
+    
+    def on_overload(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.decrease_interval:
+                self.limit = max(self.minimum, self.limit / 2)
+                self._last_decrease = now
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive retryable failures.
+    
+    While open, calls fail immediately. After `cooldown` seconds one probe
+    call is let through (half-open); its success closes the circuit, its
+    failure opens it again. A probe that never reports back (rejected before
+    reaching the provider) is replaced after another cooldown.
+    """
+    
+    def __init__(self, failures: int, cooldown: float):
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def allow(self) -> Optional[float]:
+        """None if a call may proceed, else seconds until the next probe."""
+        if self.threshold <= 0:
+            return None
+        with self._lock:
+            if self.state == "closed":
+                return None
+            now = time.monotonic()
+            remaining = self.opened_at + self.cooldown - now
+            if remaining > 0:
+                return remaining
+            if self._probe_started is not None and now - self._probe_started < self.cooldown:
+                return self._probe_started + self.cooldown - now
+            self.state = "half_open"
+            self._probe_started = now
+            return None
+    
+    def record(self, ok: bool):
+        """Record the outcome of an allowed call."""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            self._probe_started = None
+            if ok:
+                self.state, self.failures = "closed", 0
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+    
+    def release_probe(self):
+        """Give up a half-open probe slot without a verdict (non-retryable error)."""
+        with self._lock:
+            self._probe_started = None
+
+
+class ProviderGovernor:
+    """
+    Admission control for one AI provider model, shared by every analyzer in the process.
+    
+    A call first passes the circuit breaker, then the requests- and
+    tokens-per-minute buckets, then an AIMD concurrency slot. Retryable
+    failures (timeouts, 429, 5xx, connection errors) are retried with full
+    jitter exponential backoff (honouring Retry-After), shrink the
+    concurrency limit and count towards opening the circuit. Budgets are per
+    process; split the provider quota across API and worker processes.
+    """
+    
+    def __init__(self, provider: str, model: Optional[str] = None, rpm: float = 0, tpm: float = 0,
+                 max_concurrency: int = 32, min_concurrency: int = 1,
+                 timeout: float = 60.0, max_queue_wait: float = 60.0,
+                 max_retries: int = 2, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, breaker_failures: int = 5,
+                 breaker_cooldown: float = 30.0):
+        """
+        Initialize provider governor.
+        
+        Args:
+            provider: Provider name (metric label)
+            model: Model name (metric label); vendors budget each model separately
+            rpm: Requests per minute (0 = unlimited)
+            tpm: Tokens per minute, prompt estimate plus max output (0 = unlimited)
+            max_concurrency: Upper bound (and starting point) for calls in flight
+            min_concurrency: Floor the AIMD limit never drops below
+            timeout: Seconds per attempt
+            max_queue_wait: Longest a call waits for a rate budget or a
+                            concurrency slot before failing
+            max_retries: Retries after the first attempt for retryable errors
+            backoff_base: First backoff ceiling in seconds (doubles per retry)
+            backoff_max: Largest backoff ceiling in seconds
+            breaker_failures: Consecutive failures that open the circuit (0 = never)
+            breaker_cooldown: Seconds the circuit stays open before a probe
+        """
+        self.provider = provider
+        self.labels = {"provider": provider, "model": model}
+        self.name = f"{provider}/{model}" if model else provider
+        self.timeout = timeout
+        self.max_queue_wait = max_queue_wait
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.limiter = AdaptiveLimiter(max_concurrency, min_concurrency, max_concurrency)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_cooldown)
+        metrics.register_collector(self._report)
+    
+    @classmethod
+    def from_env(cls, provider: str, model: Optional[str] = None) -> "ProviderGovernor":
+        """
+        Build a governor from AI_* environment variables.
+        
+        A provider-specific variable (e.g. AI_RPM_OPENAI) overrides the
+        generic one (AI_RPM).
+        """
+        def setting(name: str, default: float) -> float:
+            value = os.getenv(f"{name}_{provider.upper()}") or os.getenv(name)
+            return float(value) if value else default
+        
+        return cls(
+            provider,
+            model,
+            rpm=setting("AI_RPM", 0),
+            tpm=setting("AI_TPM", 0),
+            max_concurrency=int(setting("AI_MAX_CONCURRENCY", 32)),
+            min_concurrency=int(setting("AI_MIN_CONCURRENCY", 1)),
+            timeout=setting("AI_TIMEOUT", 60),
+            max_queue_wait=setting("AI_MAX_QUEUE_WAIT", 60),
+            max_retries=int(setting("AI_MAX_RETRIES", 2)),
+            breaker_failures=int(setting("AI_BREAKER_FAILURES", 5)),
+            breaker_cooldown=setting("AI_BREAKER_COOLDOWN", 30)
+        )
+    
+    def _report(self, registry):
+        """Refresh governor gauges before a metrics snapshot."""
+        registry.set_gauge("ai_concurrency_limit", int(self.limiter.limit), **self.labels)
+        registry.set_gauge("ai_in_flight", self.limiter.in_flight, **self.labels)
+        registry.set_gauge("ai_circuit_state", CIRCUIT_STATES[self.breaker.state],
+                           **self.labels)
+    
+    def _admit(self, tokens: int) -> float:
+        """Check the breaker and reserve rate budgets; return the wait in seconds."""
+        blocked = self.breaker.allow()
+        if blocked is not None:
+            raise self._circuit_open(blocked)
+        
+        wait = 0.0
+        for name, bucket, amount in (("rpm", self.requests, 1), ("tpm", self.tokens, tokens)):
+            if bucket is None:
+                continue
+            needed = bucket.reserve(amount, self.max_queue_wait)
+            if needed is None:
+                metrics.inc("ai_provider_rejections_total", **self.labels, reason=name)
+                raise ProviderError(f"{self.name} {name} budget exhausted for the next "
+                                    f"{self.max_queue_wait:g}s")
+            wait = max(wait, needed)
+        return wait
+    
+    def _circuit_open(self, next_probe: Optional[float] = None) -> CircuitOpenError:
+        metrics.inc("ai_provider_rejections_total", **self.labels, reason="circuit_open")
+        if next_probe is None:
+            next_probe = self.breaker.opened_at + self.breaker.cooldown - time.monotonic()
+        return CircuitOpenError(
+            f"{self.name} circuit open after {self.breaker.failures} consecutive "
+            f"failures; next probe in {max(0.0, next_probe):.0f}s")
+    
+    def _queue_timeout(self) -> ProviderError:
+        metrics.inc("ai_provider_rejections_total", **self.labels, reason="queue")
+        return ProviderError(f"{self.name} had no free concurrency slot "
+                             f"for {self.max_queue_wait:g}s")
+    
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After if longer."""
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        delay = random.uniform(0, ceiling)
+        hinted = retry_after(error)
+        return max(delay, min(hinted, self.backoff_max)) if hinted else delay
+    
+    def _outcome(self, error: Optional[BaseException], attempt: int) -> Optional[float]:
+        """
+        Record an attempt's result.
+        
+        Returns:
+            Backoff before the next attempt, or None if there is no retry
+        """
+        if error is None:
+            self.limiter.on_success()
+            self.breaker.record(True)
+            return None
+        
+        if not is_retryable(error):
+            self.breaker.release_probe()
+            metrics.inc("ai_provider_errors_total", **self.labels, reason="fatal")
+            return None
+        
+        self.limiter.on_overload()
+        self.breaker.record(False)
+        reason = "timeout" if "timeout" in type(error).__name__.lower() else "retryable"
+        metrics.inc("ai_provider_errors_total", **self.labels, reason=reason)
+        if attempt >= self.max_retries or self.breaker.state == "open":
+            return None
+        metrics.inc("ai_provider_retries_total", **self.labels)
+        return self._backoff(attempt, error)
+    
+    def _give_up(self, error: BaseException, attempts: int) -> ProviderError:
+        if isinstance(error, ProviderError):
+            return error
+        kind = "timed out" if isinstance(error, (TimeoutError, asyncio.TimeoutError)) else "failed"
+        return ProviderError(f"{self.name} call {kind} after {attempts} attempt(s): "
+                             f"{type(error).__name__}: {error}")
+    
+    def call(self, send: Callable[[], Any], tokens: int = 0) -> Any:
+        """Run a blocking provider call under the governor."""
+        attempt = 0
+        while True:
+            wait = self._admit(tokens)
+            if wait:
+                time.sleep(wait)
+            if not self.limiter.acquire(self.max_queue_wait):
+                raise self._queue_timeout()
+            if self.breaker.state == "open":
+                # Opened while this call was queued
+                self.limiter.release()
+                raise self._circuit_open()
+            error = None
+            try:
+                result = send()
+            except Exception as e:
+                error = e
+            finally:
+                self.limiter.release()
+            
+            backoff = self._outcome(error, attempt)
+            if error is None:
+                return result
+            if backoff is None:
+                raise self._give_up(error, attempt + 1) from error
+            time.sleep(backoff)
+            attempt += 1
+    
+    async def acall(self, send: Callable[[], Awaitable[Any]], tokens: int = 0) -> Any:
+        """Async call(); each attempt is also bounded by asyncio.wait_for(timeout)."""
+        attempt = 0
+        while True:
+            wait = self._admit(tokens)
+            if wait:
+                await asyncio.sleep(wait)
+            if not await self.limiter.aacquire(self.max_queue_wait):
+                raise self._queue_timeout()
+            if self.breaker.state == "open":
+                self.limiter.release()
+                raise self._circuit_open()
+            error = None
+            try:
+                result = await asyncio.wait_for(send(), self.timeout)
+            except Exception as e:
+                error = e
+            finally:
+                self.limiter.release()
+            
+            backoff = self._outcome(error, attempt)
+            if error is None:
+                return result
+            if backoff is None:
+                raise self._give_up(error, attempt + 1) from error
+            await asyncio.sleep(backoff)
+            attempt += 1
+
+
+_governors: Dict[str, ProviderGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(provider: str, model: Optional[str] = None) -> ProviderGovernor:
+    """Process-wide governor for a provider model, created from the environment on first use."""
+    key = f"{provider}/{model}"
+    with _governors_lock:
+        governor = _governors.get(key)
+        if governor is None:
+            governor = ProviderGovernor.from_env(provider, model)
+            _governors[key] = governor
+        return governor
@@ -0,0 +1,167 @@
+"""Read-through cache for serialized API responses, with ETags."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class ResponseCache:
+    """
+    Caches encoded response bodies with their ETag.
+    
+    An in-process LRU holds hot entries. An optional SQLite file acts as a
+    second tier shared by every process on the host (API workers), so a
+    document serialized once is served from disk by the others. Callers put
+    the documents generation into keys for anything that changes on ingest.
+    Both tiers are bounded by entry count and by total body bytes.
+    """
+    
+    EVICT_EVERY = 500  # Trim the disk tier after this many inserts
+    
+    def __init__(self, max_entries: int = 1024, disk_path: Optional[str] = None,
+                 disk_max_entries: int = 100000, max_bytes: int = 64 * 1024 * 1024,
+                 disk_max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Initialize response cache.
+        
+        Args:
+            max_entries: In-process LRU capacity (0 disables caching)
+            disk_path: SQLite file for the shared tier (None = memory only)
+            disk_max_entries: Maximum rows kept in the disk tier
+            max_bytes: Maximum body bytes held by the in-process LRU; larger
+                       bodies are never cached
+            disk_max_bytes: Maximum body bytes kept in the disk tier
+        """
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._lru: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._lru_bytes = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk = None
+        self._puts = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+        if disk_path and max_entries > 0:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False, isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=OFF")
+            self._disk.execute("PRAGMA busy_timeout=1000")
+            self._disk.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    etag TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+            """)
+            self._disk.execute("CREATE INDEX IF NOT EXISTS idx_responses_stored_at ON responses(stored_at)")
+    
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        """Strong ETag derived from the response bytes."""
+        return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """Return (etag, body) for a key, or None on a miss."""
+        if self.max_entries <= 0:
+            return None
+        
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry
+        
+        if self._disk is not None:
+            try:
+                with self._disk_lock:
+                    row = self._disk.execute(
+                        "SELECT etag, body FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row is not None:
+                entry = (row[0], bytes(row[1]))
+                self._remember(key, entry)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return entry
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def put(self, key: str, body: bytes) -> str:
+        """Store an encoded body and return its ETag."""
+        etag = self.make_etag(body)
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return etag
+        
+        self._remember(key, (etag, body))
+        if self._disk is not None:
+            try:
+                with self._disk_lock:
+                    self._disk.execute(
+                        "INSERT OR REPLACE INTO responses (key, etag, body, stored_at) VALUES (?, ?, ?, ?)",
+                        (key, etag, body, time.time())
+                    )
+                    self._puts += 1
+                    if self._puts % self.EVICT_EVERY == 0:
+                        # Keep the newest rows within both the row and the byte limit
+                        self._disk.execute(
+                            """DELETE FROM responses WHERE key IN (
+                                   SELECT key FROM (
+                                       SELECT key,
+                                              ROW_NUMBER() OVER newest AS n,
+                                              SUM(length(body)) OVER newest AS total
+                                       FROM responses
+                                       WINDOW newest AS (ORDER BY stored_at DESC)
+                                   ) WHERE n > ? OR total > ?)""",
+                            (self.disk_max_entries, self.disk_max_bytes)
+                        )
+            except sqlite3.Error:
+                # The disk tier is best-effort; a busy file must not fail the request
+                pass
+        return etag
+    
+    def _remember(self, key: str, entry: Tuple[str, bytes]):
+        """Add an entry to the in-process LRU."""
+        with self._lock:
+            old = self._lru.pop(key, None)
+            if old is not None:
+                self._lru_bytes -= len(old[1])
+            self._lru[key] = entry
+            self._lru_bytes += len(entry[1])
+            while len(self._lru) > self.max_entries or self._lru_bytes > self.max_bytes:
+                _, (_, body) = self._lru.popitem(last=False)
+                self._lru_bytes -= len(body)
+    
+    def close(self):
+        """Close the disk tier."""
+        with self._disk_lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+    
+    def stats(self) -> dict:
+        """Hit/miss counters for this process."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "lru_entries": len(self._lru),
+                "lru_bytes": self._lru_bytes
+            }
@@ -0,0 +1,294 @@
+"""Latency-aware routing across several AI backends, with hedged requests."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from .ai_analyzer import AIAnalyzer
+from .metrics import metrics
+
+
+def parse_backends(spec: str) -> List[Tuple[str, Optional[str]]]:
+    """Parse "openai:gpt-4o-mini,anthropic,ollama:llama3" into (provider, model) pairs."""
+    backends = []
+    for item in spec.split(","):
+        item = item.strip()
+        if item:
+            provider, _, model = item.partition(":")
+            backends.append((provider.strip(), model.strip() or None))
+    return backends
+
+
+class BackendStats:
+    """Recent latency samples and an error rate for one backend."""
+    
+    def __init__(self, window: int = 200, error_decay: float = 0.1):
+        self.latencies = deque(maxlen=window)
+        self.error_rate = 0.0
+        self.error_decay = error_decay
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.error_rate += self.error_decay * ((0.0 if ok else 1.0) - self.error_rate)
+    
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    
+    @property
+    def samples(self) -> int:
+        return len(self.latencies)
+
+
+class RouterAnalyzer(AIAnalyzer):
+    """
+    AIAnalyzer that spreads calls over several backends.
+    
+    Each call goes to the backend with the best score (median latency,
+    inflated by its recent error rate); backends with an open circuit are
+    skipped and new backends are tried until they have min_samples. If the
+    chosen backend has not answered after its hedge_percentile latency, the
+    same prompt is sent to the runner-up and the first answer wins; the
+    other async call is cancelled (a sync call cannot be interrupted, so its
+    answer is discarded). A backend that fails is failed over to the next
+    one immediately. Prompt building, parsing, chunking and the fallback are
+    inherited from AIAnalyzer.
+    """
+    
+    def __init__(self, backends: List[AIAnalyzer], hedge_percentile: float = 0.95,
+                 hedge_min_ms: float = 50, hedge_initial_ms: float = 2000,
+                 min_samples: int = 20, chunk_tokens: int = 1000,
+                 max_chunk_concurrency: int = 8):
+        """
+        Initialize router.
+        
+        Args:
+            backends: Analyzers to route between, in order of preference
+            hedge_percentile: Hedge after this latency percentile of the
+                              primary backend (0 disables hedging)
+            hedge_min_ms: Never hedge sooner than this
+            hedge_initial_ms: Hedge delay until a backend has min_samples
+            min_samples: Calls a backend gets before its latency is trusted
+            chunk_tokens: Token budget per prompt (see AIAnalyzer)
+            max_chunk_concurrency: Chunks analyzed at once for one long text
+        """
+        if not backends:
+            raise ValueError("RouterAnalyzer needs at least one backend")
+        self.backends = backends
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min = hedge_min_ms / 1000
+        self.hedge_initial = hedge_initial_ms / 1000
+        self.min_samples = min_samples
+        self.stats = {id(b): BackendStats() for b in backends}
+        super().__init__(provider="router", model="+".join(b.model for b in backends),
+                         chunk_tokens=chunk_tokens, max_chunk_concurrency=max_chunk_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max(8, 4 * len(backends)),
+                                            thread_name_prefix="ai-router")
+        metrics.register_collector(self._report)
+    
+    def _init_provider(self):
+        """Each backend has its own governor and client; only the compressor is shared."""
+        self.governor = None
+        self.client = None
+        # One prompt serves every backend, so it must fit the tightest budget
+        self.compressor = min((b.compressor for b in self.backends),
+                              key=lambda c: (not c.enabled, c.budget_tokens or float("inf")))
+    
+    @classmethod
+    def from_spec(cls, spec: str, **kwargs) -> "RouterAnalyzer":
+        """
+        Build a router from "provider[:model],..." (e.g. AI_BACKENDS).
+        
+        Backends that cannot be initialized (missing API key, unknown
+        provider) are skipped with a warning.
+        """
+        backends = []
+        for provider, model in parse_backends(spec):
+            try:
+                backends.append(AIAnalyzer(provider=provider, model=model))
+            except Exception as e:
+                print(f"⚠️  AI backend {provider}:{model or 'default'} disabled: {e}")
+        return cls(backends, **kwargs)
+    
+    @staticmethod
+    def _label(backend: AIAnalyzer) -> str:
+        return f"{backend.provider}:{backend.model}"
+    
+    def _report(self, registry):
+        """Refresh per-backend latency gauges before a metrics snapshot."""
+        for backend in self.backends:
+            stats = self.stats[id(backend)]
+            p95 = stats.percentile(0.95)
+            if p95 is not None:
+                registry.set_gauge("ai_router_p95_seconds", round(p95, 6), backend=self._label(backend))
+            registry.set_gauge("ai_router_error_rate", round(stats.error_rate, 4),
+                               backend=self._label(backend))
+    
+    def _ranked(self) -> List[AIAnalyzer]:
+        """Backends best first; open circuits last (they fail fast if reached)."""
+        def score(backend: AIAnalyzer) -> Tuple[int, float]:
+            stats = self.stats[id(backend)]
+            if backend.governor.breaker.state == "open":
+                return (2, 0.0)
+            if stats.samples < self.min_samples:
+                return (0, stats.samples)  # Explore: least-tried first
+            return (1, stats.percentile(0.5) * (1 + 4 * stats.error_rate))
+        return sorted(self.backends, key=score)
+    
+    def _hedge_delay(self, backend: AIAnalyzer) -> Optional[float]:
+        """Seconds to wait on a backend before hedging, or None to never hedge."""
+        if self.hedge_percentile <= 0 or len(self.backends) < 2:
+            return None
+        stats = self.stats[id(backend)]
+        if stats.samples < self.min_samples:
+            return self.hedge_initial
+        return max(self.hedge_min, stats.percentile(self.hedge_percentile))
+    
+    def _timed(self, backend: AIAnalyzer, prompt: str, max_tokens: int) -> str:
+        """Call one backend and record its latency and outcome."""
+        start = time.perf_counter()
+        try:
+            response = backend._call_ai(prompt, max_tokens)
+        except Exception:
+            self.stats[id(backend)].record(time.perf_counter() - start, ok=False)
+            raise
+        self.stats[id(backend)].record(time.perf_counter() - start, ok=True)
+        return response
+    
+    async def _atimed(self, backend: AIAnalyzer, prompt: str, max_tokens: int) -> str:
+        """
+        Async _timed().
+        
+        A call cancelled because the other side of a hedge won records
+        nothing: its elapsed time is only a lower bound on its latency and
+        would pull the backend's percentiles down.
+        """
+        start = time.perf_counter()
+        try:
+            response = await backend._acall_ai(prompt, max_tokens)
+        except Exception:
+            self.stats[id(backend)].record(time.perf_counter() - start, ok=False)
+            raise
+        self.stats[id(backend)].record(time.perf_counter() - start, ok=True)
+        return response
+    
+    def _route(self, prompt: str, max_tokens: int = 1000) -> Tuple[str, AIAnalyzer]:
+        """Send a prompt to the best backend, hedging or failing over as needed."""
+        ranked = self._ranked()
+        metrics.inc("ai_router_requests_total", backend=self._label(ranked[0]))
+        pending = {self._executor.submit(self._timed, ranked[0], prompt, max_tokens): ranked[0]}
+        remaining = ranked[1:]
+        error: Optional[BaseException] = None
+        
+        while pending:
+            delay = self._hedge_delay(pending[next(iter(pending))]) if len(pending) == 1 else None
+            done, _ = wait(list(pending), timeout=delay if remaining else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                # Primary is slower than its usual tail: hedge
+                backend = remaining.pop(0)
+                metrics.inc("ai_router_hedges_total", backend=self._label(backend))
+                pending[self._executor.submit(self._timed, backend, prompt, max_tokens)] = backend
+                continue
+            
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if backend is not ranked[0]:
+                    metrics.inc("ai_router_hedge_wins_total", backend=self._label(backend))
+                return response, backend
+            
+            if not pending and remaining:
+                # Every call in flight failed: fail over to the next backend
+                backend = remaining.pop(0)
+                pending[self._executor.submit(self._timed, backend, prompt, max_tokens)] = backend
+        raise error
+    
+    async def _aroute(self, prompt: str, max_tokens: int = 1000) -> Tuple[str, AIAnalyzer]:
+        """Async _route(); the losing request of a hedge is cancelled."""
+        ranked = self._ranked()
+        metrics.inc("ai_router_requests_total", backend=self._label(ranked[0]))
+        pending = {asyncio.ensure_future(self._atimed(ranked[0], prompt, max_tokens)): ranked[0]}
+        remaining = ranked[1:]
+        error: Optional[BaseException] = None
+        
+        try:
+            while pending:
+                delay = self._hedge_delay(pending[next(iter(pending))]) if len(pending) == 1 else None
+                done, _ = await asyncio.wait(list(pending), timeout=delay if remaining else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    backend = remaining.pop(0)
+                    metrics.inc("ai_router_hedges_total", backend=self._label(backend))
+                    pending[asyncio.ensure_future(self._atimed(backend, prompt, max_tokens))] = backend
+                    continue
+                
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if backend is not ranked[0]:
+                        metrics.inc("ai_router_hedge_wins_total", backend=self._label(backend))
+                    return task.result(), backend
+                
+                if not pending and remaining:
+                    backend = remaining.pop(0)
+                    pending[asyncio.ensure_future(self._atimed(backend, prompt, max_tokens))] = backend
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def _call_ai(self, prompt: str, max_tokens: int = 1000) -> str:
+        """Routed call (used for summary reduction and batched prompts)."""
+        return self._route(prompt, max_tokens)[0]
+    
+    async def _acall_ai(self, prompt: str, max_tokens: int = 1000) -> str:
+        """Async routed call."""
+        return (await self._aroute(prompt, max_tokens))[0]
+    
+    def _analyze_single(self, text: str) -> Dict[str, Any]:
+        """Analyze text that fits in one prompt, crediting the backend that answered."""
+        try:
+            with metrics.stage("ai_call", **self.metric_labels):
+                response, backend = self._route(self._build_prompt(text))
+            with metrics.stage("parse", **self.metric_labels):
+                result = self._parse_response(response)
+            result["model"] = backend.model
+            result["timestamp"] = datetime.utcnow().isoformat()
+            return result
+        except Exception as e:
+            with metrics.stage("fallback", **self.metric_labels):
+                return self._fallback_analysis(text, str(e))
+    
+    async def _aanalyze_single(self, text: str) -> Dict[str, Any]:
+        """Async version of _analyze_single()."""
+        try:
+            with metrics.stage("ai_call", **self.metric_labels):
+                response, backend = await self._aroute(self._build_prompt(text))
+            with metrics.stage("parse", **self.metric_labels):
+                result = self._parse_response(response)
+            result["model"] = backend.model
+            result["timestamp"] = datetime.utcnow().isoformat()
+            return result
+        except Exception as e:
+            with metrics.stage("fallback", **self.metric_labels):
+                return self._fallback_analysis(text, str(e))
+    
+    async def aclose(self):
+        """Close every backend's pooled connections."""
+        for backend in self.backends:
+            await backend.aclose()
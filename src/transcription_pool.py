@@ -0,0 +1,275 @@
+"""Multi-process transcription pool with preloaded Whisper replicas."""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, Any, Optional
+from .audio_processor import SAMPLE_RATE, decode_audio
+from .long_audio import transcribe_long
+from .metrics import metrics
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MiB."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _pool_worker(model_size: str, threads: int, max_jobs: int, max_rss_mb: int,
+                 tasks, results):
+    """
+    Worker process: load one Whisper replica, then transcribe until recycled.
+    
+    Messages sent to the parent:
+        ("ready", pid, None)                           model loaded
+        ("done", pid, (job_id, result, exiting, metrics))     job finished
+        ("error", pid, (job_id, message, exiting, metrics))   job failed
+    
+    `exiting` is True when the worker leaves after this job because it hit
+    max_jobs or the RSS cap. `metrics` is the stage timings recorded since the
+    previous message, merged into the parent's registry.
+    """
+    import torch
+    from .audio_processor import AudioProcessor
+    
+    torch.set_num_threads(threads)
+    processor = AudioProcessor(model_size=model_size)
+    processor.preload()
+    
+    pid = os.getpid()
+    results.put(("ready", pid, None))
+    
+    jobs = 0
+    while True:
+        item = tasks.get()
+        if item is None:
+            break
+        
+        job_id, audio = item
+        try:
+            if isinstance(audio, str):
+                result = processor.transcribe_audio(audio)
+            else:
+                result = processor.transcribe_pcm(audio)
+            kind, value = "done", result
+        except Exception as e:
+            kind, value = "error", str(e)
+        
+        jobs += 1
+        exiting = bool((max_jobs and jobs >= max_jobs) or (max_rss_mb and _rss_mb() > max_rss_mb))
+        results.put((kind, pid, (job_id, value, exiting, metrics.snapshot(reset=True))))
+        if exiting:
+            break
+
+
+class TranscriptionPool:
+    """
+    Runs transcriptions on N worker processes, each with its own model.
+    
+    The parent assigns each job to one idle worker, so it always knows what a
+    worker was doing if it crashes. Exposes transcribe_audio()/transcribe_pcm()
+    like AudioProcessor, so MediaPipeline can use either interchangeably.
+    """
+    
+    def __init__(self, model_size: str = "base", workers: int = 2,
+                 threads_per_worker: int = 0, max_jobs_per_worker: int = 0,
+                 max_rss_mb: int = 0, long_audio_seconds: float = 0,
+                 chunk_seconds: float = 120.0):
+        """
+        Initialize and start the pool (models load immediately, not on first use).
+        
+        Args:
+            model_size: Whisper model size (tiny, base, small, medium, large)
+            workers: Number of worker processes / model replicas
+            threads_per_worker: torch threads per worker (0 = cpu_count // workers)
+            max_jobs_per_worker: Recycle a worker after this many jobs (0 = never)
+            max_rss_mb: Recycle a worker whose RSS exceeds this (0 = no cap)
+            long_audio_seconds: Audio longer than this is split into chunks and
+                                transcribed in parallel (0 = never split)
+            chunk_seconds: Nominal chunk length for long audio
+        """
+        self.model_size = model_size
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_mb = max_rss_mb
+        self.long_audio_seconds = long_audio_seconds
+        self.chunk_seconds = chunk_seconds
+        
+        self._ctx = multiprocessing.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._workers: Dict[int, Dict[str, Any]] = {}  # pid -> process, tasks, job
+        self._idle = deque()
+        self._pending = deque()
+        self._futures: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = False
+        
+        for _ in range(self.workers):
+            self._spawn()
+        
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        metrics.register_collector(self._report)
+    
+    def _report(self, registry):
+        """Refresh pool gauges before a metrics snapshot."""
+        with self._lock:
+            pending, workers = len(self._pending), len(self._workers)
+            busy = sum(1 for w in self._workers.values() if w["job"] is not None)
+        registry.set_gauge("transcription_pool_pending", pending)
+        registry.set_gauge("transcription_pool_busy", busy)
+        registry.set_gauge("transcription_pool_workers", workers)
+    
+    def _spawn(self):
+        """Start one worker process with its own task queue."""
+        tasks = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_pool_worker,
+            args=(self.model_size, self.threads_per_worker, self.max_jobs_per_worker,
+                  self.max_rss_mb, tasks, self._results),
+            name="transcription-worker",
+            daemon=True
+        )
+        process.start()
+        self._workers[process.pid] = {"process": process, "tasks": tasks, "job": None}
+    
+    def _dispatch(self):
+        """Hand pending jobs to idle workers (caller holds the lock)."""
+        while self._idle and self._pending:
+            pid = self._idle.popleft()
+            worker = self._workers.get(pid)
+            if worker is None:
+                continue
+            job_id, audio = self._pending.popleft()
+            worker["job"] = job_id
+            worker["tasks"].put((job_id, audio))
+    
+    def _collect(self):
+        """Resolve futures from worker messages and replace exited workers."""
+        while not self._closed:
+            try:
+                kind, pid, value = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._reap()
+                continue
+            
+            with self._lock:
+                worker = self._workers.get(pid)
+                if worker is None:
+                    continue
+                
+                if kind == "ready":
+                    self._idle.append(pid)
+                else:
+                    job_id, payload, exiting, snapshot = value
+                    metrics.merge(snapshot)
+                    worker["job"] = None
+                    future = self._futures.pop(job_id, None)
+                    if future is not None:
+                        if kind == "done":
+                            future.set_result(payload)
+                        else:
+                            future.set_exception(RuntimeError(payload))
+                    
+                    if exiting:
+                        del self._workers[pid]
+                        worker["process"].join()
+                        if not self._closed:
+                            self._spawn()
+                    else:
+                        self._idle.append(pid)
+                
+                self._dispatch()
+            
+            self._reap()
+    
+    def _reap(self):
+        """Fail the in-flight job of any crashed worker and start a replacement."""
+        with self._lock:
+            for pid, worker in list(self._workers.items()):
+                process = worker["process"]
+                # Exit code 0 is a recycle whose final message is still queued
+                if process.is_alive() or process.exitcode == 0:
+                    continue
+                
+                del self._workers[pid]
+                future = self._futures.pop(worker["job"], None)
+                if future is not None:
+                    future.set_exception(RuntimeError(
+                        f"Transcription worker exited with code {process.exitcode}"))
+                if not self._closed:
+                    self._spawn()
+    
+    def submit(self, audio) -> Future:
+        """
+        Queue a transcription.
+        
+        Args:
+            audio: Path to an audio/video file (decoded in the worker) or a
+                   16 kHz mono float32 NumPy array
+        
+        Returns:
+            Future resolving to the transcription dict
+        """
+        if self._closed:
+            raise RuntimeError("Transcription pool is closed")
+        
+        future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            self._futures[job_id] = future
+            self._pending.append((job_id, audio))
+            self._dispatch()
+        return future
+    
+    def transcribe_audio(self, audio_path: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Transcribe a file on the pool and wait for the result.
+        
+        With long-audio mode on, the file is decoded here so its length is
+        known; otherwise the worker decodes it.
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        
+        if self.long_audio_seconds > 0:
+            return self.transcribe_pcm(decode_audio(audio_path), timeout)
+        return self.submit(audio_path).result(timeout)
+    
+    def transcribe_pcm(self, samples, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Transcribe decoded samples on the pool, chunking long audio across workers."""
+        if 0 < self.long_audio_seconds < len(samples) / SAMPLE_RATE:
+            return transcribe_long(self.submit, samples, self.chunk_seconds)
+        return self.submit(samples).result(timeout)
+    
+    def preload(self):
+        """Models are loaded when the pool starts; nothing to do."""
+    
+    def close(self):
+        """Stop all workers; pending futures fail."""
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+            self._pending.clear()
+        for worker in workers:
+            worker["tasks"].put(None)
+        for worker in workers:
+            worker["process"].join(10)
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+        with self._lock:
+            for future in self._futures.values():
+                future.set_exception(RuntimeError("Transcription pool closed"))
+            self._futures.clear()
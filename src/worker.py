@@ -0,0 +1,254 @@
+"""Background worker processes for queued ingestion jobs."""
+
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+
+from .database import Database
+from .metrics import metrics
+
+MEDIA_TYPES = ("text", "audio", "video")
+
+
+def _discard_payload(payload: Dict[str, Any]):
+    """Delete a spooled upload once its job will not run again."""
+    path = payload.get("path")
+    if payload.get("spooled") and path and os.path.exists(path):
+        os.unlink(path)
+
+
+def run_job(pipeline, job: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one job through the matching MediaPipeline method."""
+    payload = job["payload"]
+    media_type = job["media_type"]
+    
+    if media_type == "text":
+        return pipeline.ingest(payload["text"], job["source"])
+    elif media_type == "audio":
+        return pipeline.ingest_audio(payload["path"], job["source"])
+    elif media_type == "video":
+        return pipeline.ingest_video(payload["path"], job["source"])
+    else:
+        raise ValueError(f"Unsupported media type: {media_type}")
+
+
+def worker_main(media_type: str, db_path: str, pipeline_options: Dict[str, Any],
+                stop_event, poll_interval: float = 1.0, lease_seconds: int = 60,
+                retry_delay: int = 10, slots: int = 1, metrics_interval: float = 10.0):
+    """
+    Worker process: run `slots` claim loops sharing one MediaPipeline.
+    
+    Exceptions and error results marked "retryable" (unexpected failures
+    such as a provider timeout or a decoder crash) are retried with
+    exponential backoff until the job's max_attempts is reached. Other
+    error results (e.g. "No speech detected") are final. A heartbeat thread renews the lease
+    while a job runs, so jobs from crashed workers are requeued once their
+    lease expires. More than one slot only makes sense for media workers
+    backed by a transcription pool. Stage metrics are written to the
+    database every metrics_interval seconds for the API's /metrics.
+    """
+    from .media_pipeline import MediaPipeline
+    
+    pipeline = MediaPipeline(db_path=db_path, **pipeline_options)
+    if media_type in ("audio", "video"):
+        try:
+            pipeline.transcriber.preload()
+        except Exception as e:
+            # Jobs will report the error; keep the worker alive to record it
+            print(f"⚠️  Whisper model preload failed: {e}")
+    
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    parent_pid = os.getppid()
+    
+    def should_stop() -> bool:
+        # Exit with the supervisor even if it died without calling stop()
+        return stop_event.is_set() or os.getppid() != parent_pid
+    
+    loops = [
+        threading.Thread(
+            target=_claim_loop,
+            args=(pipeline, media_type, f"{worker_id}:{slot}", should_stop,
+                  poll_interval, lease_seconds, retry_delay),
+            daemon=True
+        )
+        for slot in range(max(1, slots))
+    ]
+    for loop in loops:
+        loop.start()
+    
+    def flush_metrics():
+        try:
+            pipeline.db.put_metrics_snapshot(worker_id, json.dumps(metrics.snapshot()),
+                                             expire_seconds=int(3 * metrics_interval) + 1)
+        except Exception as e:
+            print(f"⚠️  Failed to publish worker metrics: {e}")
+    
+    stopped = threading.Event()
+    
+    def publish_metrics():
+        while not stopped.wait(metrics_interval):
+            flush_metrics()
+    
+    publisher = threading.Thread(target=publish_metrics, daemon=True)
+    publisher.start()
+    
+    for loop in loops:
+        loop.join()
+    stopped.set()
+    publisher.join()
+    flush_metrics()
+    
+    pipeline.close()
+    pipeline.db.close()
+
+
+def _claim_loop(pipeline, media_type: str, worker_id: str, should_stop,
+                poll_interval: float, lease_seconds: int, retry_delay: int):
+    """Claim and run jobs of one media type until told to stop."""
+    db = pipeline.db
+    next_stale_check = 0.0
+    
+    while not should_stop():
+        if time.monotonic() >= next_stale_check:
+            for stale in db.requeue_stale_jobs():
+                if stale["status"] == "failed":
+                    _discard_payload(stale["payload"])
+            next_stale_check = time.monotonic() + lease_seconds / 2
+        
+        job = db.claim_job(media_type, worker_id, lease_seconds)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        
+        _process_job(pipeline, db, job, lease_seconds, retry_delay)
+
+
+def _process_job(pipeline, db: Database, job: Dict[str, Any],
+                 lease_seconds: int, retry_delay: int):
+    """Run a claimed job while keeping its lease alive."""
+    done = threading.Event()
+    
+    def heartbeat():
+        while not done.wait(lease_seconds / 3):
+            db.heartbeat_job(job["id"], lease_seconds)
+    
+    heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+    heartbeat_thread.start()
+    
+    try:
+        result = run_job(pipeline, job)
+    except Exception as e:
+        _retry_or_fail(db, job, str(e), retry_delay)
+    else:
+        if result["status"] != "success" and result.get("retryable"):
+            _retry_or_fail(db, job, result["message"], retry_delay)
+        else:
+            db.complete_job(job["id"], result, succeeded=result["status"] == "success")
+            _discard_payload(job["payload"])
+    finally:
+        done.set()
+        heartbeat_thread.join()
+
+
+def _retry_or_fail(db: Database, job: Dict[str, Any], error: str, retry_delay: int):
+    """Requeue a failed attempt with exponential backoff, or fail the job for good."""
+    delay = retry_delay * 2 ** (job["attempts"] - 1)
+    if db.fail_job(job["id"], error, delay) == "failed":
+        _discard_payload(job["payload"])
+
+
+class JobWorkerPool:
+    """Supervises worker processes per media type and restarts any that die."""
+    
+    def __init__(self, db_path: str, workers: Dict[str, int],
+                 pipeline_options: Dict[str, Any], poll_interval: float = 1.0,
+                 lease_seconds: int = 60, retry_delay: int = 10,
+                 slots: Optional[Dict[str, int]] = None, metrics_interval: float = 10.0,
+                 on_demand: Iterable[str] = ()):
+        """
+        Initialize worker pool.
+        
+        Args:
+            db_path: Database path holding the jobs table
+            workers: Process count per media type, e.g. {"audio": 2, "video": 1}
+            pipeline_options: Keyword arguments for MediaPipeline in each worker
+            slots: Concurrent jobs per worker process by media type (default 1)
+            poll_interval: Seconds an idle worker waits before polling again
+            lease_seconds: Job lease length; renewed every lease_seconds / 3
+            retry_delay: Base delay in seconds before retrying a failed job
+            metrics_interval: Seconds between worker metrics snapshots
+            on_demand: Media types whose workers start on the first ensure()
+                       call instead of in start() (media workers load Whisper,
+                       which is wasted memory on a text-only deployment)
+        """
+        self.db_path = db_path
+        self.workers = {t: n for t, n in workers.items() if t in MEDIA_TYPES and n > 0}
+        self.pipeline_options = pipeline_options
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+        self.slots = slots or {}
+        self.metrics_interval = metrics_interval
+        self.on_demand = set(on_demand)
+        self._started = set()
+        self._lock = threading.Lock()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop_event = self._ctx.Event()
+        self._processes: List[tuple] = []
+        self._monitor = None
+    
+    def _spawn(self, media_type: str):
+        """Start one worker process."""
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(media_type, self.db_path, self.pipeline_options, self._stop_event,
+                  self.poll_interval, self.lease_seconds, self.retry_delay,
+                  self.slots.get(media_type, 1), self.metrics_interval),
+            name=f"job-worker-{media_type}",
+            # Not a daemon: media workers start their own transcription pool
+            daemon=False
+        )
+        process.start()
+        return process
+    
+    def start(self):
+        """Start worker processes (except on-demand ones) and the supervisor thread."""
+        for media_type in self.workers:
+            if media_type not in self.on_demand:
+                self.ensure(media_type)
+        
+        if self.workers:
+            self._monitor = threading.Thread(target=self._supervise, daemon=True)
+            self._monitor.start()
+    
+    def ensure(self, media_type: str):
+        """Start the workers for a media type unless they are already running."""
+        with self._lock:
+            if (media_type in self._started or media_type not in self.workers
+                    or self._stop_event.is_set()):
+                return
+            self._started.add(media_type)
+            for _ in range(self.workers[media_type]):
+                self._processes.append((media_type, self._spawn(media_type)))
+    
+    def _supervise(self):
+        """Replace crashed workers until stop() is called."""
+        while not self._stop_event.wait(5):
+            with self._lock:
+                for i, (media_type, process) in enumerate(self._processes):
+                    if not process.is_alive():
+                        self._processes[i] = (media_type, self._spawn(media_type))
+    
+    def stop(self, timeout: float = 10.0):
+        """Signal workers to finish their current job and exit."""
+        self._stop_event.set()
+        with self._lock:
+            processes, self._processes = self._processes, []
+        for _, process in processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
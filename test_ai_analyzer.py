@@ -0,0 +1,63 @@
+"""Tests for AI response validation and merging long-document chunk analyses."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.ai_analyzer import AIAnalyzer
+
+GOOD = {"sentiment": "positive", "sentiment_confidence": 0.9, "summary": "Apple grew.",
+        "entities": [{"text": "Apple", "type": "organization"}], "topics": ["technology"]}
+
+
+def test_malformed_chunk_counts_as_failed():
+    analyzer = AIAnalyzer(provider="fake")
+    bad_entities = {**GOOD, "entities": "Apple"}
+    no_sentiment = {k: v for k, v in GOOD.items() if k != "sentiment"}
+    
+    merged = analyzer._merge_chunks("text", ["one", "two", "three"], [GOOD, bad_entities, no_sentiment])
+    assert merged["failed_chunks"] == 2
+    assert merged["sentiment"] == "positive"
+    assert merged["entities"] == [{"text": "Apple", "type": "organization"}]
+
+
+def test_every_chunk_malformed_falls_back():
+    analyzer = AIAnalyzer(provider="fake")
+    merged = analyzer._merge_chunks("Apple is doing great.", ["one"], [{**GOOD, "topics": None}])
+    assert merged["model"] == "fake-1 (fallback)"
+    assert "topics" in merged["error"]
+
+
+class ReplyAnalyzer(AIAnalyzer):
+    """Analyzer whose provider always returns one canned reply."""
+    
+    def __init__(self, reply: dict):
+        super().__init__(provider="fake")
+        self.reply = json.dumps(reply)
+    
+    def _call_ai(self, prompt):
+        return self.reply
+
+
+@pytest.mark.parametrize("field, value", [
+    ("topics", "tech, finance"),
+    ("topics", [["tech"]]),
+    ("entities", [{"type": "organization"}]),
+    ("entities", {"text": "Apple", "type": "organization"}),
+    ("sentiment_confidence", "high"),
+])
+def test_wrongly_typed_response_falls_back(field, value):
+    result = ReplyAnalyzer({**GOOD, field: value}).analyze("Apple is doing great.")
+    assert result["model"] == "fake-1 (fallback)"
+    assert field.split("_")[0] in result["error"]
+    assert all(isinstance(t, str) and len(t) > 1 for t in result["topics"])
+
+
+def test_well_typed_response_is_kept():
+    result = ReplyAnalyzer(GOOD).analyze("Apple is doing great.")
+    assert "error" not in result
+    assert result["topics"] == ["technology"]
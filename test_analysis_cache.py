@@ -0,0 +1,98 @@
+"""Tests for the content-addressed analysis cache."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.ai_analyzer import AIAnalyzer
+from src.pipeline import Pipeline
+
+
+class CountingAnalyzer(AIAnalyzer):
+    """Analyzer that answers without a model and counts how often it is asked."""
+    
+    def __init__(self, model: str = "llama3", fail: bool = False, failed_chunks: int = None):
+        super().__init__(provider="ollama", model=model)
+        self.fail = fail
+        self.failed_chunks = failed_chunks
+        self.calls = 0
+    
+    def analyze(self, text):
+        self.calls += 1
+        result = {"sentiment": "positive", "sentiment_confidence": 0.9, "summary": text[:40],
+                  "entities": [{"text": "Berlin", "type": "LOCATION"}], "topics": ["travel"],
+                  "model": self.model}
+        if self.fail:
+            result["error"] = "provider down"
+        if self.failed_chunks is not None:
+            result.update(chunks=3, failed_chunks=self.failed_chunks)
+        return result
+    
+    async def aanalyze(self, text):
+        return self.analyze(text)
+
+
+def _pipeline(db_path, analyzer: CountingAnalyzer) -> Pipeline:
+    pipeline = Pipeline(db_path=str(db_path), ai_provider="ollama")
+    pipeline.analyzer = analyzer
+    return pipeline
+
+
+def test_repeated_text_skips_the_model(tmp_path):
+    analyzer = CountingAnalyzer()
+    pipeline = _pipeline(tmp_path / "cache.db", analyzer)
+    
+    first = pipeline.ingest("Berlin  is lovely in spring.", "test")
+    second = pipeline.ingest("Berlin is lovely in spring.\n", "test")
+    assert analyzer.calls == 1
+    assert "cached" not in first["analysis"]
+    assert second["analysis"]["cached"] is True
+    assert second["analysis"]["entities"] == first["analysis"]["entities"]
+    
+    # A new process (empty LRU) is served from the cache table
+    fresh = CountingAnalyzer()
+    assert _pipeline(tmp_path / "cache.db", fresh).ingest("Berlin is lovely in spring.")["status"] == "success"
+    assert fresh.calls == 0
+
+
+def test_other_model_or_fallback_result_misses(tmp_path):
+    pipeline = _pipeline(tmp_path / "cache.db", CountingAnalyzer())
+    pipeline.ingest("Berlin is lovely in spring.")
+    
+    other = CountingAnalyzer(model="mistral")
+    _pipeline(tmp_path / "cache.db", other).ingest("Berlin is lovely in spring.")
+    assert other.calls == 1
+    
+    failing = CountingAnalyzer(model="phi3", fail=True)
+    pipeline = _pipeline(tmp_path / "cache.db", failing)
+    pipeline.ingest("Paris is busy in summer.")
+    pipeline.ingest("Paris is busy in summer.")
+    assert failing.calls == 2
+
+
+def test_partial_long_document_merge_is_not_cached(tmp_path):
+    partial = CountingAnalyzer(failed_chunks=1)
+    pipeline = _pipeline(tmp_path / "cache.db", partial)
+    pipeline.ingest("Long report on Berlin.")
+    assert "cached" not in pipeline.ingest("Long report on Berlin.")["analysis"]
+    assert partial.calls == 2
+    
+    complete = CountingAnalyzer(failed_chunks=0)
+    pipeline.analyzer = complete
+    pipeline.ingest("Long report on Berlin.")
+    assert pipeline.ingest("Long report on Berlin.")["analysis"]["cached"] is True
+    assert complete.calls == 1
+
+
+def test_async_ingest_uses_the_cache(tmp_path):
+    analyzer = CountingAnalyzer()
+    pipeline = _pipeline(tmp_path / "cache.db", analyzer)
+    
+    async def ingest_twice():
+        await pipeline.aingest("Tokyo hosted the summit.")
+        return await pipeline.aingest("Tokyo hosted the summit.")
+    
+    assert asyncio.run(ingest_twice())["analysis"]["cached"] is True
+    assert analyzer.calls == 1
@@ -0,0 +1,91 @@
+"""Tests for splitting batched responses and re-analyzing the items they miss."""
+
+import asyncio
+import json
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.ai_analyzer import AIAnalyzer
+from src.batching_analyzer import BATCH_MARKER, BatchingAnalyzer
+
+
+def _item(item_id, summary: str) -> dict:
+    return {"id": item_id, "sentiment": "neutral", "sentiment_confidence": 0.7,
+            "entities": [], "topics": ["news"], "summary": summary}
+
+
+class StubAnalyzer(AIAnalyzer):
+    """Answers batched prompts with a canned array and single prompts per text."""
+    
+    def __init__(self, batch_items):
+        super().__init__(provider="fake")
+        self.batch_response = json.dumps(batch_items)
+        self.single_prompts = []
+    
+    def _answer(self, prompt: str) -> str:
+        if BATCH_MARKER in prompt:
+            return self.batch_response
+        self.single_prompts.append(prompt)
+        return json.dumps({k: v for k, v in _item(0, "single").items() if k != "id"})
+    
+    def _call_ai(self, prompt: str, max_tokens: int = 1000) -> str:
+        return self._answer(prompt)
+    
+    async def _acall_ai(self, prompt: str, max_tokens: int = 1000) -> str:
+        return self._answer(prompt)
+
+
+def test_parse_batch_drops_invalid_missing_and_duplicate_items():
+    batcher = BatchingAnalyzer(StubAnalyzer([]))
+    no_summary = {k: v for k, v in _item(1, "").items() if k != "summary"}
+    response = "```json\n" + json.dumps([
+        no_summary, _item(2, "two"), _item(3, "three"), _item(3, "three again"),
+        _item(9, "out of range"), "junk", {"summary": "no id"}
+    ]) + "\n```"
+    
+    results = batcher._parse_batch(response, 4)
+    assert results[0] is None and results[2] is None and results[3] is None
+    assert results[1]["summary"] == "two"
+    assert "id" not in results[1]
+    
+    wrapped = json.dumps({"results": [_item(1, "one"), _item(2, "two")]})
+    assert [r["summary"] for r in batcher._parse_batch(wrapped, 2)] == ["one", "two"]
+
+
+def test_missing_items_are_analyzed_on_their_own():
+    texts = ["First short text.", "Second short text.", "Third short text."]
+    analyzer = StubAnalyzer([_item(1, "one"), {"id": 2, "summary": "incomplete"}])
+    batcher = BatchingAnalyzer(analyzer, max_items=3)
+    
+    items = [(text, Future()) for text in texts]
+    batcher._run(items)
+    assert [f.result()["summary"] for _, f in items] == ["one", "single", "single"]
+    assert [p.endswith(t) for p, t in zip(analyzer.single_prompts, texts[1:])] == [True, True]
+
+
+def test_async_batch_redispatches_only_missing_items():
+    texts = ["First short text.", "Second short text.", "Third short text."]
+    analyzer = StubAnalyzer([_item(3, "three"), _item(1, "one")])
+    batcher = BatchingAnalyzer(analyzer, max_items=3, max_wait_ms=1000)
+    
+    async def run():
+        return await asyncio.gather(*(batcher.aanalyze(t) for t in texts))
+    
+    results = asyncio.run(run())
+    assert [r["summary"] for r in results] == ["one", "single", "three"]
+    assert len(analyzer.single_prompts) == 1
+    assert analyzer.single_prompts[0].endswith(texts[1])
+
+
+def test_unparseable_batch_redispatches_every_item():
+    analyzer = StubAnalyzer([])
+    analyzer.batch_response = "not json"
+    batcher = BatchingAnalyzer(analyzer, max_items=2)
+    
+    items = [(text, Future()) for text in ("One text.", "Two text.")]
+    batcher._run(items)
+    assert [f.result()["summary"] for _, f in items] == ["single", "single"]
+    assert len(analyzer.single_prompts) == 2
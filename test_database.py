@@ -0,0 +1,288 @@
+"""Tests for the database layer."""
+
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import Database, decode_cursor, encode_cursor, fts_query, normalize_entity
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "docs.db"))
+    yield db
+    db.close()
+
+
+def _analysis(summary: str) -> dict:
+    return {"sentiment": "neutral", "sentiment_confidence": 0.8, "summary": summary,
+            "topics": ["news"], "entities": [{"text": "Berlin", "type": "LOCATION"}],
+            "model": "fake-1"}
+
+
+@pytest.fixture
+def docs(db):
+    db.write_ingest_results([
+        {"content": f"Report {i} on solar transcription markets.", "source": "test",
+         "analysis": _analysis(f"Solar report {i}.")}
+        for i in range(7)
+    ])
+    return db
+
+
+def _pages(fetch):
+    """Follow next_cursor until the last page; return the pages' id lists."""
+    pages, cursor = [], None
+    while True:
+        items, cursor = fetch(cursor)
+        pages.append([item["id"] for item in items])
+        if cursor is None:
+            return pages
+
+
+def _count(conn) -> int:
+    return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+def _insert(conn, content: str):
+    conn.execute("INSERT INTO documents (content, source) VALUES (?, ?)", (content, "test"))
+
+
+def test_readers_do_not_wait_for_an_open_write(db):
+    in_write, release = threading.Event(), threading.Event()
+    
+    def write():
+        with db.get_connection() as conn:
+            _insert(conn, "draft")
+            in_write.set()
+            release.wait(5)
+    
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        assert in_write.wait(5)
+        started = time.monotonic()
+        with db.read_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert _count(conn) == 0
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+        writer.join()
+    
+    with db.read_connection() as conn:
+        assert _count(conn) == 1
+
+
+def test_read_connection_sees_one_snapshot(db):
+    with db.read_connection() as reader:
+        before = _count(reader)
+        with db.get_connection() as conn:
+            _insert(conn, "committed mid-read")
+        assert _count(reader) == before
+    
+    with db.read_connection() as reader:
+        assert _count(reader) == before + 1
+
+
+def test_failed_group_write_leaves_no_rows(db):
+    bad = _analysis("Broken.")
+    bad["entities"] = [{"type": "LOCATION"}]
+    records = [{"content": "Good report.", "source": "test", "analysis": _analysis("Good.")},
+               {"content": "Bad report.", "source": "test", "analysis": bad}]
+    
+    with pytest.raises(KeyError):
+        db.write_ingest_results(records)
+    with pytest.raises(KeyError):
+        db.write_ingest_result("Bad report.", "test", bad)
+    with db.read_connection() as conn:
+        assert _count(conn) == 0
+        assert conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] == 0
+    
+    doc_ids = db.write_ingest_results(records[:1] * 2)
+    assert [db.get_document(i)["entities"][0]["entity_text"] for i in doc_ids] == ["Berlin", "Berlin"]
+
+
+def test_text_search_ranks_and_highlights(db):
+    db.write_ingest_results([
+        {"content": text, "source": "test", "analysis": _analysis(summary)}
+        for text, summary in [("The café in Zürich serves coffee.", "A café review."),
+                              ("Solar panels, solar farms and solar subsidies.", "Solar energy."),
+                              ("A note about solar power.", "Energy note.")]
+        + [(f"Council minutes number {i}.", "Minutes.") for i in range(5)]
+    ])
+    
+    results, _ = db.search_documents(q="solar")
+    assert [r["id"] for r in results] == [2, 3]
+    assert results[0]["score"] > results[1]["score"]
+    assert results[1]["snippet"] == "A note about <mark>solar</mark> power."
+    assert db.search_documents(q="cafe")[0][0]["snippet"].startswith("The <mark>café</mark>")
+    assert db.search_documents(q="solar", sentiment="negative") == ([], None)
+
+
+def test_cursor_pages_cover_every_document_once(docs):
+    # All rows share one ingested_at second, so the id tiebreak does the work
+    pages = _pages(lambda cursor: docs.list_documents(limit=3, cursor=cursor))
+    assert pages == [[7, 6, 5], [4, 3, 2], [1]]
+    
+    search_pages = _pages(lambda cursor: docs.search_documents(sentiment="neutral", limit=3,
+                                                               cursor=cursor))
+    assert search_pages == pages
+
+
+def test_text_search_pages_by_rank(docs):
+    pages = _pages(lambda cursor: docs.search_documents(q="solar", limit=3, cursor=cursor))
+    assert sorted(i for page in pages for i in page) == list(range(1, 8))
+    assert [len(page) for page in pages] == [3, 3, 1]
+
+
+def test_cursor_of_another_listing_is_rejected(docs):
+    with pytest.raises(ValueError):
+        docs.list_documents(cursor=encode_cursor("search", "2024-01-01 00:00:00", 3))
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor!", "documents")
+    assert decode_cursor(encode_cursor("documents", "2024-01-01", 3), "documents") == ["2024-01-01", 3]
+
+
+def test_fts_query_escapes_operators():
+    assert fts_query('solar AND "New York" transcri* NEAR(x') == \
+        '"solar" "AND" "New York" "transcri"* "NEAR" "x"'
+    assert fts_query('"" -- ()') is None
+
+
+def test_search_text_never_raises_on_syntax(docs):
+    for q in ['"unbalanced', "solar OR", "NOT solar", "col:solar", "(solar", "*", "^solar"]:
+        docs.search_documents(q=q)
+    assert docs.search_documents(q='"solar report"')[0]
+    assert docs.search_documents(q="transcri*")[0]
+    assert docs.search_documents(q="%%%") == ([], None)
+
+
+def _row_counts(db) -> dict:
+    """Stats breakdowns recomputed from the rows with GROUP BY."""
+    queries = {
+        "sentiment_breakdown": "SELECT sentiment, COUNT(*) FROM analyses GROUP BY 1",
+        "source_breakdown": "SELECT source, COUNT(*) FROM documents GROUP BY 1",
+        "entity_type_breakdown": "SELECT entity_type, COUNT(*) FROM entities GROUP BY 1",
+        "model_breakdown": "SELECT ai_model, COUNT(*) FROM analyses GROUP BY 1",
+    }
+    with db.read_connection() as conn:
+        counts = {key: dict(conn.execute(sql).fetchall()) for key, sql in queries.items()}
+        counts["total_documents"] = _count(conn)
+    return counts
+
+
+def test_rollups_equal_row_counts(db):
+    records = []
+    for i, sentiment in enumerate(["positive", "negative", "positive", "neutral", "positive"]):
+        analysis = _analysis(f"Summary {i}.")
+        analysis["sentiment"] = sentiment
+        analysis["model"] = "fake-1" if i % 2 else "fake-2"
+        analysis["entities"] = [{"text": "Berlin", "type": "LOCATION"},
+                                {"text": f"Person {i}", "type": "PERSON"}][:1 + i % 2]
+        records.append({"content": f"Document {i}.", "source": "rss" if i < 3 else "api",
+                        "analysis": analysis})
+    db.write_ingest_results(records[:3])
+    db.write_ingest_result(records[3]["content"], "api", records[3]["analysis"])
+    db.write_ingest_results(records[4:])
+    
+    assert db.get_stats() == _row_counts(db)
+    now = datetime.now(timezone.utc)
+    for bucket in ("hour", "day"):
+        [point] = db.get_timeseries(bucket, now - timedelta(days=1), now)
+        assert point["documents"] == 5
+        assert point["sentiment"] == _row_counts(db)["sentiment_breakdown"]
+    
+    # A database written before the rollups existed is backfilled on open
+    with db.get_connection() as conn:
+        conn.execute("DROP TABLE stats_rollups")
+    db.close()
+    reopened = Database(db.db_path)
+    assert reopened.get_stats() == _row_counts(reopened)
+    reopened.close()
+
+
+def test_entity_pivots_ignore_spelling(db):
+    mentions = [
+        [("Apple Inc.", "ORGANIZATION"), ("Berlin", "LOCATION")],
+        [("apple", "ORGANIZATION"), ("The Apple", "ORGANIZATION")],
+        [("Berlin", "LOCATION")],
+        [("Apple", "PERSON")],
+    ]
+    records = []
+    for i, entities in enumerate(mentions):
+        analysis = _analysis(f"Summary {i}.")
+        analysis["entities"] = [{"text": text, "type": kind} for text, kind in entities]
+        records.append({"content": f"Document {i}.", "source": "test", "analysis": analysis})
+    db.write_ingest_results(records)
+    
+    assert normalize_entity("The  Apple, Inc.", "ORGANIZATION") == "apple"
+    assert normalize_entity("Apple Inc.", "PERSON") == "apple inc"
+    
+    results, _ = db.search_documents(entity="APPLE INC", entity_type="ORGANIZATION")
+    assert sorted(r["id"] for r in results) == [1, 2]
+    results, _ = db.search_documents(entity="apple")
+    assert sorted(r["id"] for r in results) == [1, 2, 4]
+    results, _ = db.search_documents(entity="apple", entity_type="PERSON")
+    assert [r["id"] for r in results] == [4]
+    results, _ = db.search_documents(entity="berlin", q="document")
+    assert sorted(r["id"] for r in results) == [1, 3]
+    assert db.search_documents(entity="Cupertino") == ([], None)
+    
+    top = db.top_entities(limit=2)
+    assert sorted((e["entity_type"], e["document_count"], e["mention_count"]) for e in top) == \
+        [("LOCATION", 2, 2), ("ORGANIZATION", 2, 3)]
+    assert [e["entity"] for e in db.top_entities("LOCATION")] == ["Berlin"]
+
+
+def test_topic_pivots_and_facets(db):
+    topic_lists = [["Earnings", "Tech"], ["earnings!", "Energy"], ["Energy policy"], ["tech", "Tech"]]
+    records = []
+    for i, topics in enumerate(topic_lists):
+        analysis = _analysis(f"Summary {i}.")
+        analysis["topics"] = topics
+        analysis["sentiment"] = "negative" if i == 1 else "neutral"
+        records.append({"content": f"Document {i}.", "source": "test", "analysis": analysis})
+    db.write_ingest_results(records)
+    
+    assert db.get_document(2)["analysis"]["topics"] == ["Earnings", "Energy"]
+    assert db.get_document(4)["analysis"]["topics"] == ["Tech"]
+    
+    results, _ = db.search_documents(topic="EARNINGS")
+    assert sorted(r["id"] for r in results) == [1, 2]
+    results, _ = db.search_documents(topic="earnings", sentiment="negative")
+    assert [r["id"] for r in results] == [2]
+    assert db.search_documents(topic="energy")[0][0]["id"] == 2
+    
+    facets = {f["topic"].casefold(): f["document_count"] for f in db.topic_facets()}
+    assert facets == {"earnings": 2, "tech": 2, "energy": 1, "energy policy": 1}
+    assert sorted(f["topic"] for f in db.topic_facets(prefix="ener")) == ["Energy", "Energy policy"]
+
+
+def test_sql_built_json_matches_dicts(docs):
+    docs.insert_document("Not analyzed yet.", "test")
+    for doc_id in (1, 8):
+        text, analyzed = docs.get_document_json(doc_id)
+        assert json.loads(text) == docs.get_document(doc_id)
+        assert analyzed == (doc_id == 1)
+    assert docs.get_document_json(99) is None
+    
+    items, next_cursor = docs.list_documents(limit=4)
+    text, count, json_cursor = docs.list_documents_json(limit=4)
+    assert json.loads(text) == items and count == 4 and json_cursor == next_cursor
+    
+    for filters in ({"sentiment": "neutral"}, {"q": "solar report"}, {"topic": "news"},
+                    {"entity": "berlin"}):
+        cursor = None
+        for _ in range(2):
+            items, next_cursor = docs.search_documents(limit=3, cursor=cursor, **filters)
+            text, count, json_cursor = docs.search_documents_json(limit=3, cursor=cursor, **filters)
+            assert json.loads(text) == items and count == len(items) and json_cursor == next_cursor
+            cursor = next_cursor
@@ -0,0 +1,45 @@
+"""Tests for the offline fake AI provider."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.ai_analyzer import AIAnalyzer
+from src.fake_provider import ANALYSIS_MARKER, FakeProvider
+
+TEXT = ("Apple Inc. reported record growth in Cupertino yesterday. Dr. Jane Smith praised "
+        "the innovation while analysts in New York raised concerns about supply chains.")
+PROMPTS = [f"Analyze this.\n{ANALYSIS_MARKER}Report {i}: {TEXT}" for i in range(5)]
+
+
+def test_same_prompt_same_response_and_latency():
+    first = FakeProvider(latency_ms=20, jitter_ms=10, seed=1)
+    second = FakeProvider(latency_ms=20, jitter_ms=10, seed=1)
+    assert [first.complete(p) for p in PROMPTS] == [second.complete(p) for p in PROMPTS]
+    assert [first._delay(p) for p in PROMPTS] == [second._delay(p) for p in PROMPTS]
+    assert all(0.01 <= first._delay(p) <= 0.03 for p in PROMPTS)
+    
+    # The seed moves latencies but never responses
+    reseeded = FakeProvider(latency_ms=20, jitter_ms=10, seed=2)
+    assert [reseeded.complete(p) for p in PROMPTS] == [first.complete(p) for p in PROMPTS]
+    assert [reseeded._delay(p) for p in PROMPTS] != [first._delay(p) for p in PROMPTS]
+
+
+def _analyze(analyzer: AIAnalyzer, asynchronous: bool = False) -> dict:
+    result = asyncio.run(analyzer.aanalyze(TEXT)) if asynchronous else analyzer.analyze(TEXT)
+    del result["timestamp"]
+    return result
+
+
+def test_analyzer_results_are_reproducible():
+    analyzer = AIAnalyzer(provider="fake")
+    result = _analyze(analyzer)
+    
+    assert result["model"] == "fake-1"
+    assert result["sentiment"] in ("positive", "negative", "neutral")
+    assert any(e["type"] == "ORGANIZATION" for e in result["entities"])
+    assert _analyze(analyzer) == result
+    assert _analyze(AIAnalyzer(provider="fake")) == result
+    assert _analyze(analyzer, asynchronous=True) == result
@@ -0,0 +1,104 @@
+"""Tests for batch ingestion: result order and per-item validation."""
+
+import asyncio
+import importlib
+import json
+import sys
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.ai_analyzer import AIAnalyzer
+from src.pipeline import Pipeline
+
+TEXTS = [f"Story {i}: the council in Berlin approved a new solar park near district {i}."
+         for i in range(6)]
+
+
+class SlowAnalyzer(AIAnalyzer):
+    """Analyzer whose latency varies per text, so analyses finish out of order."""
+    
+    def __init__(self):
+        super().__init__(provider="ollama")
+    
+    def analyze(self, text):
+        return {"sentiment": "positive", "sentiment_confidence": 0.8, "summary": text[:40],
+                "entities": [{"text": "Berlin", "type": "LOCATION"}], "topics": ["energy"],
+                "model": self.model}
+    
+    async def aanalyze(self, text):
+        await asyncio.sleep((zlib.crc32(text.encode()) % 15) / 1000)
+        return self.analyze(text)
+
+
+def test_results_follow_input_order(tmp_path):
+    pipeline = Pipeline(db_path=str(tmp_path / "batch.db"), ai_provider="ollama", cache_max_entries=0)
+    pipeline.analyzer = SlowAnalyzer()
+    items = [{"text": t, "source": "test"} for t in TEXTS]
+    items.insert(2, {"text": "   ", "source": "test"})
+    items.insert(5, {"text": "x" * 100001, "source": "test"})
+    
+    results = asyncio.run(pipeline.aingest_batch(items, concurrency=4, write_batch_size=2))
+    
+    assert [r["status"] for r in results] == ["success", "success", "error", "success", "success",
+                                              "error", "success", "success"]
+    assert results[2]["message"] == "Empty text provided"
+    assert "too large" in results[5]["message"]
+    for item, result in zip(items, results):
+        if result["status"] == "success":
+            stored = pipeline.retrieve(result["document_id"])
+            assert stored["data"]["document"]["content"] == item["text"]
+
+
+def test_bad_record_fails_alone(tmp_path, monkeypatch):
+    pipeline = Pipeline(db_path=str(tmp_path / "batch.db"), ai_provider="ollama", cache_max_entries=0)
+    pipeline.analyzer = SlowAnalyzer()
+    aanalyze = pipeline._aanalyze
+    
+    async def one_bad_analysis(text, source=None, local=True):
+        analysis = await aanalyze(text, source, local)
+        if text == TEXTS[2]:
+            analysis = {**analysis, "entities": [{"type": "LOCATION"}]}
+        return analysis
+    
+    monkeypatch.setattr(pipeline, "_aanalyze", one_bad_analysis)
+    results = asyncio.run(pipeline.aingest_batch([{"text": t} for t in TEXTS], write_batch_size=100))
+    
+    assert [r["status"] for r in results] == ["success", "success", "error",
+                                              "success", "success", "success"]
+    assert "Processing failed" in results[2]["message"]
+    assert pipeline.stats()["stats"]["total_documents"] == 5
+    for text, result in zip(TEXTS, results):
+        if result["status"] == "success":
+            assert pipeline.retrieve(result["document_id"])["data"]["document"]["content"] == text
+    pipeline.db.close()
+
+
+def test_batch_endpoint_reports_invalid_items(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    monkeypatch.setenv("AI_PROVIDER", "ollama")
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "api.db"))
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path / "uploads"))
+    for media_type in ("TEXT", "AUDIO", "VIDEO"):
+        monkeypatch.setenv(f"JOB_WORKERS_{media_type}", "0")
+    from fastapi.testclient import TestClient
+    api = importlib.import_module("src.api")
+    monkeypatch.setattr(api.pipeline, "analyzer", SlowAnalyzer())
+    
+    with TestClient(api.app) as client:
+        body = [{"text": TEXTS[0]}, {"source": "no text"}, {"text": ""}, {"text": TEXTS[1]}]
+        response = client.post("/ingest/batch", json=body)
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == ["success", "error", "error", "success"]
+        assert results[1]["message"].startswith("Invalid item")
+        
+        ndjson = "\n".join(json.dumps({"text": t}) for t in TEXTS[2:4])
+        response = client.post("/ingest/batch", content=ndjson,
+                               headers={"Content-Type": "application/x-ndjson"})
+        assert [r["status"] for r in response.json()["results"]] == ["success", "success"]
+        
+        assert client.post("/ingest/batch", json={"text": TEXTS[0]}).status_code == 400
+        assert client.post("/ingest/batch", content="[{").status_code == 400
@@ -0,0 +1,75 @@
+"""Tests for the local analysis tier and its routing thresholds."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.local_analyzer import MODEL, LocalAnalyzer, LocalPolicy
+from src.long_document import estimate_tokens
+from src.pipeline import Pipeline
+
+CLEAR = "Great service, very happy with the fast delivery."
+MIXED = "Good food but terrible service and a slow, rude waiter."
+LONG = " ".join([CLEAR] * 10)
+
+
+def test_policy_thresholds_are_inclusive():
+    policy = LocalPolicy(max_tokens=20, min_confidence=0.7, sources={"rss"})
+    assert policy.enabled and not LocalPolicy().enabled
+    assert policy.wants_local(20, "api") and not policy.wants_local(21, "api")
+    assert policy.wants_local(5000, "rss")
+    
+    assert policy.accept({"sentiment_confidence": 0.7}, "api")
+    assert not policy.accept({"sentiment_confidence": 0.69}, "api")
+    assert policy.accept({"sentiment_confidence": 0.1}, "rss")
+
+
+def test_batch_matches_single_analysis_and_dedupes():
+    analyzer = LocalAnalyzer()
+    results = analyzer.analyze_batch([CLEAR, MIXED, f"  {CLEAR}\n"])
+    for text, result in zip([CLEAR, MIXED], results):
+        expected = analyzer.analyze(text)
+        assert {k: v for k, v in result.items() if k != "timestamp"} == \
+            {k: v for k, v in expected.items() if k != "timestamp"}
+    assert results[2]["entities"] is not results[0]["entities"]
+    assert results[2]["sentiment_confidence"] == results[0]["sentiment_confidence"]
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    pipeline = Pipeline(db_path=str(tmp_path / "local.db"), ai_provider="fake",
+                        cache_max_entries=0, local_max_tokens=20,
+                        local_min_confidence=0.7, local_sources=["rss"])
+    pipeline.ai_calls = []
+    analyze, aanalyze = pipeline.analyzer.analyze, pipeline.analyzer.aanalyze
+    
+    async def counting_aanalyze(text):
+        pipeline.ai_calls.append(text)
+        return await aanalyze(text)
+    
+    monkeypatch.setattr(pipeline.analyzer, "analyze",
+                        lambda text: pipeline.ai_calls.append(text) or analyze(text))
+    monkeypatch.setattr(pipeline.analyzer, "aanalyze", counting_aanalyze)
+    return pipeline
+
+
+def test_routing_serves_short_confident_texts_locally(pipeline):
+    assert estimate_tokens(CLEAR) <= 20 < estimate_tokens(LONG)
+    
+    assert pipeline.ingest(CLEAR)["analysis"]["model"] == MODEL
+    assert pipeline.ingest(MIXED)["analysis"]["model"] != MODEL
+    assert pipeline.ingest(LONG)["analysis"]["model"] != MODEL
+    assert pipeline.ingest(LONG, source="rss")["analysis"]["model"] == MODEL
+    assert pipeline.ai_calls == [MIXED, LONG]
+
+
+def test_batch_routing_only_escalates_what_the_policy_rejects(pipeline):
+    items = [{"text": CLEAR}, {"text": MIXED}, {"text": LONG}, {"text": MIXED, "source": "rss"}]
+    results = asyncio.run(pipeline.aingest_batch(items))
+    
+    assert [r["analysis"]["model"] == MODEL for r in results] == [True, False, False, True]
+    assert sorted(pipeline.ai_calls) == sorted([MIXED, LONG])
@@ -0,0 +1,87 @@
+"""Tests for splitting long audio into windows and stitching the transcripts."""
+
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.long_audio import _drop_repeated_prefix, plan_chunks, stitch, transcribe_long
+
+RATE = 100  # Samples per second; keeps the arrays small
+
+
+def test_repeated_prefix_is_dropped_ignoring_case_and_punctuation():
+    previous = "and then the board voted to approve the".split()
+    assert _drop_repeated_prefix(previous, "Approve the, budget today.".split()) == ["budget", "today."]
+    assert _drop_repeated_prefix(previous, "budget today".split()) == ["budget", "today"]
+    assert _drop_repeated_prefix(previous, "the board".split()) == ["board"]
+    assert _drop_repeated_prefix([], "budget today".split()) == ["budget", "today"]
+    assert _drop_repeated_prefix(previous, "to approve the".split()) == []
+
+
+def test_repeated_prefix_prefers_the_longest_overlap():
+    previous = "the the the".split()
+    assert _drop_repeated_prefix(previous, "the the news".split()) == ["news"]
+    
+    long_previous = [f"w{i}" for i in range(30)]
+    # Overlaps longer than max_check are not searched
+    assert _drop_repeated_prefix(long_previous, long_previous[5:] + ["end"], max_check=12) == \
+        long_previous[5:] + ["end"]
+
+
+def test_stitch_keeps_owned_segments_and_removes_seam_repeats():
+    windows = [(0, 1200, 0, 1000), (800, 2000, 1000, 2000)]
+    results = [
+        {"language": "en", "segment_list": [
+            {"start": 0.0, "end": 5.0, "text": "Good morning everyone."},
+            {"start": 6.0, "end": 11.0, "text": "The council met to discuss"},
+        ]},
+        {"language": "en", "segment_list": [
+            {"start": 1.0, "end": 3.0, "text": "met to discuss"},  # Owned by window 0
+            {"start": 2.5, "end": 4.0, "text": "to discuss the budget."},
+            {"start": 5.0, "end": 9.0, "text": "It passed."},
+        ]},
+    ]
+    
+    stitched = stitch(windows, results, sample_rate=RATE)
+    assert stitched["text"] == "Good morning everyone. The council met to discuss the budget. It passed."
+    assert [s["start"] for s in stitched["segment_list"]] == [0.0, 6.0, 10.5, 13.0]
+    assert stitched["segment_list"][2]["text"] == "the budget."
+    assert stitched["language"] == "en" and stitched["chunks"] == 2
+    assert stitched["duration"] == 20.0
+
+
+def test_cuts_land_in_the_quiet_frame_near_each_boundary():
+    samples = np.ones(30 * RATE, dtype=np.float32)
+    samples[int(11.2 * RATE):int(11.3 * RATE)] = 0  # Pause 1.2 s after the 10 s boundary
+    
+    windows = plan_chunks(samples, chunk_seconds=10, overlap_seconds=1, search_seconds=3,
+                          sample_rate=RATE)
+    assert windows[0] == (0, 1225, 0, 1125)
+    assert windows[1][2] == 1125
+    assert windows[-1][1] == len(samples)
+    assert all(a[3] == b[2] for a, b in zip(windows, windows[1:]))
+
+
+def test_short_audio_is_one_window():
+    samples = np.zeros(5 * RATE, dtype=np.float32)
+    assert plan_chunks(samples, chunk_seconds=10, sample_rate=RATE) == [(0, 500, 0, 500)]
+
+
+def test_transcribe_long_submits_every_window():
+    samples = np.zeros(120, dtype=np.float32)
+    submitted = []
+    
+    def submit(chunk):
+        submitted.append(len(chunk))
+        future = Future()
+        future.set_result({"language": "en", "segment_list": [
+            {"start": 0.0, "end": 0.001, "text": f"part {len(submitted)}"}]})
+        return future
+    
+    result = transcribe_long(submit, samples, chunk_seconds=120)
+    assert submitted == [120]
+    assert result["text"] == "part 1"
@@ -0,0 +1,67 @@
+"""Tests for extractive prompt compression."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from samples.sample_data import get_samples
+from src.local_analyzer import extract_entities
+from src.long_document import estimate_tokens
+from src.prompt_compression import PromptCompressor, dedupe, normalize, strip_boilerplate
+
+NEWS = ("The company changed its privacy policy after the breach, angering regulators. "
+        "Revenue fell 20 percent. Click here to see how shareholders reacted with fury.")
+
+
+def test_footer_phrases_inside_prose_survive():
+    assert PromptCompressor().compress(NEWS) == NEWS
+    
+    wrapped = ("Regulators in Brussels said the new privacy policy\n"
+               "still lets the company share location data.\n")
+    assert strip_boilerplate(wrapped) == wrapped
+
+
+def test_standalone_footer_lines_are_dropped():
+    email = ("Acme Corp reported record sales in Berlin.\n"
+             "\n"
+             "Unsubscribe | Manage preferences\n"
+             "© 2024 Acme Corp. All rights reserved.\n")
+    assert PromptCompressor().compress(email) == "Acme Corp reported record sales in Berlin."
+
+
+def test_filler_and_repeats_are_removed():
+    assert normalize("Um, the vote [inaudible] passed!!!  Uh-huh, twice .") == "the vote passed! twice."
+    assert dedupe(["Prices rose.", "PRICES rose!", "Wages fell."]) == ["Prices rose.", "Wages fell."]
+
+
+def test_budget_keeps_entities_and_document_order():
+    sentences = [f"Filler sentence number {i} talks about nothing in particular today." for i in range(30)]
+    sentences[5] = "Angela Merkel met Tim Cook in Berlin."
+    sentences[20] = "Microsoft opened an office in Paris."
+    text = " ".join(sentences)
+    
+    compressed = PromptCompressor(budget_tokens=60).compress(text)
+    assert estimate_tokens(compressed) <= 60
+    for name in ("Angela Merkel", "Tim Cook", "Berlin", "Microsoft", "Paris"):
+        assert name in compressed
+    assert compressed.index("Berlin") < compressed.index("Paris")
+
+
+def test_disabled_compressor_returns_text_unchanged():
+    assert PromptCompressor(enabled=False).compress(NEWS + " " + NEWS) == NEWS + " " + NEWS
+
+
+def test_sample_data_fewer_tokens_same_entities():
+    # The measurement `python -m benchmarks.run --prompt-budgets 0,96` reports
+    texts = [s["text"] for s in get_samples()]
+    for budget in (0, 96):
+        compressor = PromptCompressor(budget_tokens=budget)
+        original = sent = 0
+        for text in texts:
+            short = compressor.compress(text)
+            original += estimate_tokens(text)
+            sent += estimate_tokens(short)
+            for entity in extract_entities(text):
+                assert entity["text"].lower() in short.lower()
+        assert sent < original * (0.9 if budget == 0 else 0.75)
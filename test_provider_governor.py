@@ -0,0 +1,135 @@
+"""Tests for provider rate budgets, AIMD concurrency and the circuit breaker."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.provider_governor import (AdaptiveLimiter, CircuitBreaker, CircuitOpenError,
+                                   ProviderError, ProviderGovernor, TokenBucket)
+
+
+class Clock:
+    """Stand-in for time.monotonic() that only moves when told to."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("src.provider_governor.time.monotonic", clock)
+    return clock
+
+
+def test_token_bucket_queues_callers_and_refills(clock):
+    bucket = TokenBucket(per_minute=60)  # One token per second
+    assert bucket.reserve(60, max_wait=0) == 0
+    assert bucket.reserve(1, max_wait=0) is None
+    assert bucket.reserve(2, max_wait=5) == pytest.approx(2.0)
+    assert bucket.reserve(2, max_wait=5) == pytest.approx(4.0)
+    
+    clock.now += 10
+    assert bucket.reserve(6, max_wait=0) == 0
+    assert bucket.reserve(1, max_wait=0) is None
+
+
+def test_aimd_halves_once_per_interval_and_grows_back(clock):
+    limiter = AdaptiveLimiter(initial=4, minimum=1, maximum=8, decrease_interval=1.0)
+    assert all(limiter.acquire(timeout=0) for _ in range(4))
+    assert not limiter.acquire(timeout=0)
+    
+    limiter.on_overload()
+    limiter.on_overload()  # Same brownout: counted once
+    assert limiter.limit == 2
+    clock.now += 1
+    limiter.on_overload()
+    assert limiter.limit == 1
+    clock.now += 1
+    limiter.on_overload()
+    assert limiter.limit == 1  # Never below the minimum
+    
+    for _ in range(4):
+        limiter.release()
+    assert limiter.in_flight == 0
+    limiter.on_success()
+    assert limiter.limit == 2
+    limiter.on_success()
+    assert limiter.limit == 2.5
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.limit == 8
+
+
+def test_breaker_opens_probes_and_closes(clock):
+    breaker = CircuitBreaker(failures=2, cooldown=10)
+    breaker.record(False)
+    assert breaker.state == "closed" and breaker.allow() is None
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert breaker.allow() == pytest.approx(10)
+    
+    clock.now += 10
+    assert breaker.allow() is None
+    assert breaker.state == "half_open"
+    assert breaker.allow() == pytest.approx(10)  # One probe at a time
+    breaker.record(False)
+    assert breaker.state == "open"
+    
+    clock.now += 10
+    assert breaker.allow() is None
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_breaker_replaces_a_probe_that_never_reports(clock):
+    breaker = CircuitBreaker(failures=1, cooldown=10)
+    breaker.record(False)
+    clock.now += 10
+    assert breaker.allow() is None
+    clock.now += 10
+    assert breaker.allow() is None
+    
+    breaker.release_probe()
+    assert breaker.allow() is None and breaker.state == "half_open"
+
+
+def test_governor_retries_then_fails_fast_while_open(clock):
+    governor = ProviderGovernor("test", max_concurrency=4, max_retries=1,
+                                backoff_base=0, breaker_failures=2, breaker_cooldown=30)
+    calls = []
+    
+    def send():
+        calls.append(1)
+        raise TimeoutError("slow")
+    
+    with pytest.raises(ProviderError, match="timed out after 2 attempt"):
+        governor.call(send)
+    assert len(calls) == 2
+    assert governor.breaker.state == "open"
+    assert governor.limiter.limit == 2
+    
+    with pytest.raises(CircuitOpenError):
+        governor.call(send)
+    assert len(calls) == 2
+
+
+def test_governor_does_not_retry_fatal_errors(clock):
+    governor = ProviderGovernor("test", max_retries=3, backoff_base=0)
+    calls = []
+    
+    def send():
+        calls.append(1)
+        raise ValueError("bad request")
+    
+    with pytest.raises(ProviderError, match="failed after 1 attempt"):
+        governor.call(send)
+    assert len(calls) == 1
+    assert governor.breaker.failures == 0
+    assert governor.call(lambda: "ok") == "ok"
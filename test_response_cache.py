@@ -0,0 +1,59 @@
+"""Tests for the API response cache and the keys documents are cached under."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import Database
+from src.response_cache import ResponseCache
+
+
+def test_lru_is_bounded_by_bytes():
+    cache = ResponseCache(max_entries=100, max_bytes=25)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"y" * 10)
+    cache.put("c", b"z" * 10)
+    assert cache.get("a") is None
+    assert cache.get("b")[1] == b"y" * 10
+    assert cache.stats()["lru_bytes"] == 20
+    
+    cache.put("big", b"!" * 26)
+    assert cache.get("big") is None
+    assert cache.stats()["lru_entries"] == 2
+
+
+def test_disk_tier_is_trimmed_to_bytes(tmp_path):
+    cache = ResponseCache(max_entries=1, disk_path=str(tmp_path / "responses.db"),
+                          disk_max_bytes=30)
+    cache.EVICT_EVERY = 1
+    for key in "abcd":
+        cache.put(key, key.encode() * 10)
+    rows = cache._disk.execute("SELECT key FROM responses ORDER BY key").fetchall()
+    assert [r[0] for r in rows] == ["b", "c", "d"]
+    cache.close()
+
+
+def test_document_version_changes_with_its_rows(tmp_path):
+    db = Database(str(tmp_path / "docs.db"))
+    doc_id = db.insert_document("Apple opened a store in Berlin.", "test")
+    assert db.get_document_version(doc_id) is None
+    
+    db.insert_analysis(doc_id, "positive", 0.9, "Apple opened a store.", ["retail"], "fake-1")
+    analyzed = db.get_document_version(doc_id)
+    assert analyzed is not None
+    
+    db.insert_entities(doc_id, [{"text": "Apple", "type": "organization"}])
+    assert db.get_document_version(doc_id) not in (None, analyzed)
+    assert db.get_document_version(doc_id + 1) is None
+    db.close()
+
+
+def test_database_id_differs_between_files(tmp_path):
+    first, second = Database(str(tmp_path / "a.db")), Database(str(tmp_path / "b.db"))
+    assert first.database_id != second.database_id
+    first.close()
+    reopened = Database(str(tmp_path / "a.db"))
+    assert reopened.database_id == first.database_id
+    second.close()
+    reopened.close()
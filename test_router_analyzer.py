@@ -0,0 +1,39 @@
+"""Tests for routing AI calls across backends."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.ai_analyzer import AIAnalyzer
+from src.router_analyzer import RouterAnalyzer
+
+
+def _backend(model: str, delay: float) -> AIAnalyzer:
+    backend = AIAnalyzer(provider="fake", model=model)
+    
+    async def call(prompt, max_tokens=1000):
+        await asyncio.sleep(delay)
+        return model
+    backend._acall_ai = call
+    return backend
+
+
+def test_router_initializes_as_an_analyzer():
+    router = RouterAnalyzer([_backend("fake-a", 0), _backend("fake-b", 0)])
+    assert router.provider == "router"
+    assert router.model == "fake-a+fake-b"
+    assert router.governor is None and router.client is None
+    assert router.compressor is not None
+    assert router.chunk_tokens == 1000
+
+
+def test_hedged_out_call_records_no_latency():
+    slow, fast = _backend("fake-slow", 1.0), _backend("fake-fast", 0)
+    router = RouterAnalyzer([slow, fast], hedge_initial_ms=20)
+    
+    response, backend = asyncio.run(router._aroute("prompt"))
+    assert (response, backend) == ("fake-fast", fast)
+    assert router.stats[id(fast)].samples == 1
+    assert router.stats[id(slow)].samples == 0
@@ -0,0 +1,71 @@
+"""Tests for streaming media uploads into the spool directory."""
+
+import hashlib
+import importlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+AUDIO = b"RIFF" + bytes(range(256)) * 40
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setenv("AI_PROVIDER", "fake")
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "api.db"))
+    for media_type in ("TEXT", "AUDIO", "VIDEO"):
+        monkeypatch.setenv(f"JOB_WORKERS_{media_type}", "0")
+    api = importlib.import_module("src.api")
+    monkeypatch.setattr(api, "UPLOAD_DIR", tmp_path / "uploads")
+    api.UPLOAD_DIR.mkdir()
+    return api
+
+
+@pytest.fixture
+def client(api):
+    from fastapi.testclient import TestClient
+    with TestClient(api.app) as client:
+        yield client
+
+
+def test_upload_is_spooled_once_with_its_hash(api, client):
+    response = client.post("/ingest/audio", files={"file": ("talk.WAV", AUDIO, "audio/wav")},
+                           data={"source": "podcast"})
+    assert response.status_code == 202
+    
+    job_id = response.json()["job_id"]
+    with api.pipeline.db.read_connection() as conn:
+        payload = json.loads(conn.execute("SELECT payload FROM jobs WHERE id = ?",
+                                          (job_id,)).fetchone()[0])
+    assert payload["size"] == len(AUDIO)
+    assert payload["sha256"] == hashlib.sha256(AUDIO).hexdigest()
+    assert Path(payload["path"]).read_bytes() == AUDIO
+    assert Path(payload["path"]).suffix == ".wav"
+    assert api.pipeline.db.get_job(job_id)["source"] == "podcast"
+
+
+def test_cap_is_enforced_while_streaming(api, client, monkeypatch):
+    monkeypatch.setattr(api, "UPLOAD_MAX_BYTES", len(AUDIO) - 1)
+    
+    # Declared too large: rejected before the body is read
+    response = client.post("/ingest/audio", files={"file": ("talk.wav", AUDIO * 100)})
+    assert response.status_code == 413
+    
+    # No Content-Length (chunked): rejected once the file passes the cap
+    body = client.build_request("POST", "/ingest/audio", files={"file": ("talk.wav", AUDIO)})
+    chunks = iter([body.read()])
+    response = client.post("/ingest/audio", content=chunks,
+                           headers={"Content-Type": body.headers["Content-Type"]})
+    assert response.status_code == 413
+    assert list(api.UPLOAD_DIR.iterdir()) == []
+
+
+def test_bad_uploads_leave_no_spool_files(api, client):
+    assert client.post("/ingest/audio", files={"file": ("notes.txt", b"hi")}).status_code == 400
+    assert client.post("/ingest/audio", data={"source": "no file"}).status_code in (400, 422)
+    assert client.post("/ingest/audio", content=b"raw bytes").status_code == 400
+    assert list(api.UPLOAD_DIR.iterdir()) == []
@@ -0,0 +1,125 @@
+"""Tests for job retries in the background workers."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import Database
+from src.worker import JobWorkerPool, _process_job
+
+
+class FlakyPipeline:
+    """Pipeline stand-in whose first ingest fails the way a provider timeout does."""
+    
+    def __init__(self, db: Database, failures: int = 1, retryable: bool = True):
+        self.db = db
+        self.failures = failures
+        self.retryable = retryable
+        self.calls = 0
+    
+    def ingest(self, text, source):
+        self.calls += 1
+        if self.calls <= self.failures:
+            return {"status": "error", "message": "Processing failed: timed out",
+                    "retryable": self.retryable}
+        return {"status": "success", "document_id": 7, "analysis": {}}
+
+
+def _run_next(db: Database, pipeline: FlakyPipeline) -> bool:
+    job = db.claim_job("text", "test-worker", lease_seconds=60)
+    if job is None:
+        return False
+    _process_job(pipeline, db, job, lease_seconds=60, retry_delay=0)
+    return True
+
+
+def test_transient_error_is_retried_until_success(tmp_path):
+    db = Database(str(tmp_path / "jobs.db"))
+    job_id = db.enqueue_job("text", {"text": "hello"}, "test", max_attempts=3)
+    pipeline = FlakyPipeline(db, failures=1)
+    
+    assert _run_next(db, pipeline)
+    job = db.get_job(job_id)
+    assert job["status"] == "queued"
+    assert job["attempts"] == 1
+    assert job["error"] == "Processing failed: timed out"
+    
+    assert _run_next(db, pipeline)
+    job = db.get_job(job_id)
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 2
+    assert job["document_id"] == 7
+    db.close()
+
+
+def test_transient_error_fails_after_max_attempts(tmp_path):
+    db = Database(str(tmp_path / "jobs.db"))
+    job_id = db.enqueue_job("text", {"text": "hello"}, "test", max_attempts=2)
+    pipeline = FlakyPipeline(db, failures=5)
+    
+    while _run_next(db, pipeline):
+        pass
+    job = db.get_job(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert pipeline.calls == 2
+    db.close()
+
+
+def test_permanent_error_is_final(tmp_path):
+    db = Database(str(tmp_path / "jobs.db"))
+    job_id = db.enqueue_job("text", {"text": "hello"}, "test", max_attempts=3)
+    pipeline = FlakyPipeline(db, failures=1, retryable=False)
+    
+    assert _run_next(db, pipeline)
+    assert not _run_next(db, pipeline)
+    job = db.get_job(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 1
+    db.close()
+
+
+class RecordingPool(JobWorkerPool):
+    """Worker pool that records spawns instead of starting processes."""
+    
+    def _spawn(self, media_type):
+        self.spawned.append(media_type)
+        return media_type
+    
+    def _supervise(self):
+        pass
+
+
+def test_on_demand_workers_start_with_first_job():
+    pool = RecordingPool("unused.db", {"text": 1, "audio": 2, "video": 1}, {},
+                         on_demand=["audio", "video"])
+    pool.spawned = []
+    
+    pool.start()
+    assert pool.spawned == ["text"]
+    
+    pool.ensure("audio")
+    pool.ensure("audio")
+    assert pool.spawned == ["text", "audio", "audio"]
+    
+    pool._stop_event.set()
+    pool.ensure("video")
+    assert "video" not in pool.spawned
+
+
+def test_metrics_snapshots_expire(tmp_path, monkeypatch):
+    db = Database(str(tmp_path / "jobs.db"))
+    now = 1000.0
+    monkeypatch.setattr("src.database.time.time", lambda: now)
+    db.put_metrics_snapshot("worker-a", '{"worker": "a"}', expire_seconds=30)
+    
+    now = 1020.0
+    db.put_metrics_snapshot("worker-b", '{"worker": "b"}', expire_seconds=30)
+    assert db.get_metrics_snapshots(max_age_seconds=10) == [{"worker": "b"}]
+    
+    now = 1040.0
+    db.put_metrics_snapshot("worker-b", '{"worker": "b"}', expire_seconds=30)
+    with db.read_connection() as conn:
+        assert [r[0] for r in conn.execute("SELECT process FROM metrics_snapshots")] == ["worker-b"]
+    db.close()